@@ -1,374 +1,30 @@
 import os
-import subprocess
-import re
-import time
-from datetime import timedelta
+import queue
+import traceback
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from yt_dlp import YoutubeDL
-from sentence_transformers import SentenceTransformer, util
-import torch
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from config import PASTA_VIDEOS, PASTA_CORTES, MODO_RENDER, AQUECER_MODELO
+from pipeline import ETAPAS, ProcessamentoCancelado, processar
+from renderizacao import AgendadorRender
+from embeddings import aquecer_modelo_em_segundo_plano
 
-# ================= CONFIG ===================
+# Intervalo (ms) em que a GUI lê a fila de eventos do processamento
+INTERVALO_EVENTOS_MS = 100
 
-load_dotenv()  # Carrega as variáveis do arquivo .env
 
-PASTA_VIDEOS = os.getenv("PASTA_VIDEOS")
-PASTA_CORTES = os.getenv("PASTA_CORTES")
-
-# ================= UTILITÁRIOS ==============
-def timestamp_to_seconds(t):
-    try:
-        # Remove espaços e divide por ":"
-        t_clean = t.strip()
-        parts = t_clean.split(":")
-        
-        # Converte para inteiros, ignorando texto extra
-        int_parts = []
-        for part in parts:
-            # Remove qualquer texto não numérico da parte
-            clean_part = ''.join(filter(str.isdigit, part))
-            if clean_part:
-                int_parts.append(int(clean_part))
-            else:
-                int_parts.append(0)
-        
-        if len(int_parts) == 2:
-            minutos, segundos = int_parts
-            return minutos * 60 + segundos
-        elif len(int_parts) == 3:
-            horas, minutos, segundos = int_parts
-            return horas * 3600 + minutos * 60 + segundos
-        elif len(int_parts) == 1:
-            # Apenas segundos
-            return int_parts[0]
-        else:
-            raise ValueError(f"Formato de tempo inválido: {t}")
-    except Exception as e:
-        raise ValueError(f"Não foi possível converter '{t}' para segundos: {e}")
-
-def segundos_para_timestamp(segundos):
-    return str(timedelta(seconds=int(segundos)))
-
-def parse_srt(caminho_arquivo):
-    with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-        conteudo = f.read()
-
-    blocos = re.split(r'\n\n+', conteudo.strip())
-    segmentos = []
-
-    for bloco in blocos:
-        linhas = bloco.strip().split('\n')
-        if len(linhas) >= 3:
-            tempo = linhas[1]
-            texto = " ".join(linhas[2:]).strip()
-            inicio, fim = tempo.split(' --> ')
-            segmentos.append((inicio.strip(), fim.strip(), texto))
-    return segmentos
-
-def str_time_to_seconds(t):
-    h, m, s = t.split(':')
-    if ',' in s:
-        s, ms = s.split(',')
-    else:
-        ms = '0'
-    return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000
-
-def _seconds_to_srt_time(sec_float):
-    """Converte segundos (float) para string SRT HH:MM:SS,mmm"""
-    if sec_float < 0:
-        sec_float = 0.0
-    total_ms = int(round(sec_float * 1000))
-    h = total_ms // 3600000
-    rem = total_ms % 3600000
-    m = rem // 60000
-    rem = rem % 60000
-    s = rem // 1000
-    ms = rem % 1000
-    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
-
-def salvar_legenda(caminho_saida, legendas):
-    with open(caminho_saida, 'w', encoding='utf-8') as f:
-        for idx, (inicio, fim, texto) in enumerate(legendas, start=1):
-            f.write(f"{idx}\n{inicio} --> {fim}\n{texto}\n\n")
-
-# ============ NOVO: limpeza de sobreposições ============
-def limpar_sobreposicoes_srt(segmentos, margem_segundos=0.05):
-    """
-    Ajusta tempos de legendas para evitar sobreposições:
-    se o fim da legenda atual ultrapassa o início da próxima,
-    o fim é ajustado para (início_da_próxima - margem).
-    """
-    corrigidos = []
-    for i in range(len(segmentos)):
-        inicio, fim, texto = segmentos[i]
-        if i < len(segmentos) - 1:
-            inicio_prox, _, _ = segmentos[i + 1]
-            inicio_prox_sec = str_time_to_seconds(inicio_prox)
-            fim_sec = str_time_to_seconds(fim)
-            ini_sec = str_time_to_seconds(inicio)
-
-            # Ajusta fim se houver sobreposição
-            limite = inicio_prox_sec - margem_segundos
-            if fim_sec > limite:
-                fim_sec = max(limite, ini_sec)  # evita duração negativa
-                fim = _seconds_to_srt_time(fim_sec)
-        corrigidos.append((inicio, fim, texto))
-    return corrigidos
-
-def limpar_arquivo_srt(caminho_srt, margem_segundos=0.05):
-    """Lê, limpa sobreposições e sobrescreve o SRT no mesmo arquivo."""
-    try:
-        segmentos = parse_srt(caminho_srt)
-        if not segmentos:
-            return False
-        limpos = limpar_sobreposicoes_srt(segmentos, margem_segundos=margem_segundos)
-        salvar_legenda(caminho_srt, limpos)
-        return True
-    except Exception:
-        return False
-# ========================================================
-
-def baixar_video_youtube(url, pasta_destino):
-    if not os.path.exists(pasta_destino):
-        os.makedirs(pasta_destino)
-
-    ydl_opts = {
-        'format': 'bestvideo+bestaudio/best',
-        'outtmpl': os.path.join(pasta_destino, '%(title)s.%(ext)s'),
-        'writesubtitles': True,
-        'writeautomaticsub': True,
-        'subtitleslangs': ['pt', 'en'],
-        'subtitlesformat': 'srt',
-        'quiet': True,
-        'merge_output_format': 'mp4',
-        'skip_download': False,
-        'no_warnings': True,
-        # Adiciona cookies do Chrome para autenticação
-        'cookiesfrombrowser': ('chrome',),
-        # Adiciona configurações para evitar problemas de impersonation
-        'extractor_args': {
-            'youtube': {
-                'skip': ['hls', 'dash'],
-                'player_skip': ['configs']
-            }
-        }
-    }
-
-    with YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(url, download=True)
-        titulo = info['title']
-        base_path = os.path.join(pasta_destino, titulo)
-        video_path = base_path + ".mp4"
-
-        possiveis_ext = ['.pt.srt', '.pt-BR.srt', '.en.srt', '.en-US.srt']
-        legenda_path = None
-
-        for ext in possiveis_ext:
-            caminho = base_path + ext
-            if os.path.exists(caminho):
-                legenda_path = caminho
-                break
-
-        if not legenda_path:
-            raise FileNotFoundError("Nenhuma legenda .srt encontrada em pt ou en.")
-
-        return video_path, legenda_path, titulo
-
-def detectar_pontos_de_corte_semantico(segmentos, intervalo_min=480, intervalo_max=720, limite_similaridade=0.6):
-    device = 'cuda' if torch.cuda.is_available() else 'cpu'
-    modelo = SentenceTransformer('all-MiniLM-L6-v2', device=device)
-
-    blocos = []
-    buffer = []
-    inicio_bloco = str_time_to_seconds(segmentos[0][0])
-
-    for i in range(len(segmentos)):
-        buffer.append(segmentos[i])
-        duracao_bloco = str_time_to_seconds(segmentos[i][1]) - inicio_bloco
-
-        if duracao_bloco >= 240:
-            texto_bloco = " ".join([b[2] for b in buffer])
-            blocos.append((inicio_bloco, str_time_to_seconds(segmentos[i][1]), texto_bloco))
-            buffer = []
-            if i + 1 < len(segmentos):
-                inicio_bloco = str_time_to_seconds(segmentos[i + 1][0])
-
-    if buffer:
-        texto_bloco = " ".join([b[2] for b in buffer])
-        blocos.append((inicio_bloco, str_time_to_seconds(segmentos[-1][1]), texto_bloco))
-
-    textos = [b[2] for b in blocos]
-    embeddings = modelo.encode(textos, convert_to_tensor=True)
-
-    cortes = [blocos[0][0]]
-    ultimo_corte = blocos[0][0]
-
-    for i in range(1, len(blocos)):
-        tempo_atual = blocos[i][0]
-        duracao = tempo_atual - ultimo_corte
-        similaridade = util.cos_sim(embeddings[i - 1], embeddings[i]).item()
-
-        if duracao >= intervalo_min and (similaridade < limite_similaridade or duracao >= intervalo_max):
-            cortes.append(tempo_atual)
-            ultimo_corte = tempo_atual
-
-    cortes.append(blocos[-1][1])
-    return [segundos_para_timestamp(c) for c in cortes]
-
-def validar_e_ajustar_cortes(cortes):
-    """Apenas para cortes automáticos - limita em 12 minutos"""
-    cortes_ajustados = [cortes[0]]  # Sempre mantém o primeiro corte
-
-    for i in range(1, len(cortes)):
-        tempo_anterior = timestamp_to_seconds(cortes_ajustados[-1])
-        tempo_atual = timestamp_to_seconds(cortes[i])
-        duracao = tempo_atual - tempo_anterior
-
-        if duracao > 720:
-            novo_tempo = tempo_anterior + 720
-            cortes_ajustados.append(segundos_para_timestamp(novo_tempo))
-
-            tempo_restante = tempo_atual - (tempo_anterior + 720)
-            if tempo_restante > 720:
-                segmentos_extras = int(tempo_restante // 720)
-                for j in range(1, segmentos_extras + 1):
-                    tempo_extra = tempo_anterior + 720 + (j * 720)
-                    cortes_ajustados.append(segundos_para_timestamp(tempo_extra))
-
-            if tempo_restante > 60:
-                cortes_ajustados.append(cortes[i])
-        else:
-            cortes_ajustados.append(cortes[i])
-
-    return cortes_ajustados
-
-def processar_cortes_manuais(cortes_raw):
-    """Processa cortes manuais sem limitações de duração"""
-    cortes = []
-    descricoes = []
-    
-    for c in cortes_raw:
-        c = c.strip()
-        if c:
-            if " - " in c:
-                tempo, descricao = c.split(" - ", 1)
-                tempo = tempo.strip()
-                descricao = descricao.strip()
-            else:
-                tempo = c
-                descricao = ""
-            
-            # Validar se o tempo está em formato válido
-            try:
-                # Testa se consegue converter para segundos
-                timestamp_to_seconds(tempo)
-                cortes.append(tempo)
-                descricoes.append(descricao)
-            except ValueError as e:
-                print(f"⚠️ Ignorando timestamp inválido: '{tempo}' - {e}")
-                continue
-    
-    if len(cortes) < 2:
-        raise ValueError("É necessário pelo menos 2 timestamps válidos para fazer cortes")
-    
-    # Ordena os cortes e descrições por tempo
-    cortes_com_desc = list(zip(cortes, descricoes))
-    cortes_com_desc.sort(key=lambda x: timestamp_to_seconds(x[0]))
-    
-    cortes_ordenados = [item[0] for item in cortes_com_desc]
-    desc_ordenadas = [item[1] for item in cortes_com_desc]
-    
-    return cortes_ordenados, desc_ordenadas
-
-def sanitizar_nome_arquivo(nome):
-    """Remove caracteres inválidos para nomes de arquivo"""
-    # Remove ou substitui caracteres problemáticos
-    nome = re.sub(r'[<>:"/\\|?*]', '', nome)  # Remove caracteres inválidos
-    nome = re.sub(r'\s+', '_', nome)  # Substitui espaços por underscore
-    nome = nome.strip('._')  # Remove pontos e underscores do início/fim
-    
-    # Limita o comprimento do nome
-    if len(nome) > 50:
-        nome = nome[:47] + "..."
-    
-    return nome if nome else "sem_nome"
-
-def filtrar_legendas_por_tempo(segmentos, tempo_inicio, tempo_fim):
-    inicio_sec = timestamp_to_seconds(tempo_inicio)
-    fim_sec = timestamp_to_seconds(tempo_fim)
-    return [ (i, f, txt) for (i, f, txt) in segmentos if inicio_sec <= str_time_to_seconds(i) < fim_sec ]
-
-def cortar_video(video_path, cortes, legenda_path, pasta_saida, descricoes=None):
-    # Lê e (por segurança) limpa novamente as legendas antes de usar
-    segmentos = parse_srt(legenda_path)
-    segmentos = limpar_sobreposicoes_srt(segmentos, margem_segundos=0.05)
-
-    for i in range(len(cortes) - 1):
-        inicio = cortes[i]
-        fim = cortes[i + 1]
-        
-        # Define o nome do arquivo baseado na descrição ou genérico
-        if descricoes and i < len(descricoes) - 1 and descricoes[i + 1]:
-            nome_base = sanitizar_nome_arquivo(descricoes[i + 1])
-        else:
-            nome_base = f"corte_{i+1:02d}"
-            
-        video_saida = os.path.join(pasta_saida, nome_base + ".mp4")
-        srt_saida = os.path.join(pasta_saida, nome_base + ".srt")
-
-        inicio_sec = timestamp_to_seconds(inicio)
-        fim_sec = timestamp_to_seconds(fim)
-        duracao = fim_sec - inicio_sec
-
-        legendas_corte = filtrar_legendas_por_tempo(segmentos, inicio, fim)
-
-        legendas_ajustadas = []
-        for leg_inicio, leg_fim, texto in legendas_corte:
-            leg_inicio_sec = str_time_to_seconds(leg_inicio) - inicio_sec
-            leg_fim_sec = str_time_to_seconds(leg_fim) - inicio_sec
-
-            if leg_inicio_sec < 0:
-                leg_inicio_sec = 0
-            if leg_fim_sec < 0:
-                continue
-
-            novo_inicio = _seconds_to_srt_time(leg_inicio_sec)
-            novo_fim = _seconds_to_srt_time(leg_fim_sec)
-
-            legendas_ajustadas.append((novo_inicio, novo_fim, texto))
-
-        salvar_legenda(srt_saida, legendas_ajustadas)
-
-        # Aplica o corte com fade in/out e hardcode da legenda no corte
-        subprocess.run([
-            'ffmpeg', '-y',
-            '-ss', inicio.replace(',', '.'),
-            '-to', fim.replace(',', '.'),
-            '-i', video_path,
-            '-vf', (
-                f"fade=in:0:60,"
-                f"fade=out:st={duracao-3}:d=90,"
-                f"subtitles='{srt_saida}':force_style="
-                "'FontName=Arial,FontSize=24,PrimaryColour=&HFFFFFF&,"
-                "OutlineColour=&H000000&,BorderStyle=1,Outline=1'"
-            ),
-            '-c:v', 'h264_nvenc',
-            '-preset', 'slow',
-            '-crf', '18',
-            '-c:a', 'aac',
-            '-b:a', '256k',
-            '-sn',
-            video_saida
-        ])
+def formatar_eta(segundos):
+    if segundos is None:
+        return "--:--"
+    minutos, segundos = divmod(int(segundos), 60)
+    return f"{minutos:02d}:{segundos:02d}"
 
 # ================= GUI (Tkinter) ================
 class App:
     def __init__(self, root):
         self.root = root
         self.root.title("YouTube Cutter IA")
-        self.root.geometry("700x600")
+        self.root.geometry("700x760")
         
         # Variáveis
         self.url = tk.StringVar()
@@ -377,8 +33,21 @@ class App:
         self.video_selecionado = tk.StringVar()
         self.srt_selecionado = tk.StringVar()
         self.cortes = []
+
+        # O processamento roda fora da thread do Tk; a comunicação é pela fila
+        self.eventos = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="processamento")
+        self.agendador = None
+        self.barras_cortes = {}
+        self.etas_cortes = {}
         
         self.criar_interface()
+        self.root.protocol("WM_DELETE_WINDOW", self.fechar)
+        self.root.after(INTERVALO_EVENTOS_MS, self.processar_eventos)
+
+        # Opcional: carrega o modelo de IA depois que a janela aparece
+        if AQUECER_MODELO:
+            self.root.after(500, aquecer_modelo_em_segundo_plano)
 
     def criar_interface(self):
         # Frame principal com scroll
@@ -462,7 +131,28 @@ class App:
         self.txt_cortes.insert("1.0", "00:00 - Introdução\n08:45 - Primeiro Tópico\n20:00 - Segundo Tópico\n30:00")
         
         # ========= SEÇÃO: CONTROLES =========
-        tk.Button(main_frame, text="Iniciar Processamento", command=self.iniciar, bg="#4CAF50", fg="white", font=("Arial", 12, "bold")).pack(pady=10)
+        controles_frame = tk.Frame(main_frame)
+        controles_frame.pack(pady=10)
+
+        self.btn_iniciar = tk.Button(controles_frame, text="Iniciar Processamento", command=self.iniciar, bg="#4CAF50", fg="white", font=("Arial", 12, "bold"))
+        self.btn_iniciar.pack(side=tk.LEFT, padx=5)
+
+        self.btn_cancelar = tk.Button(controles_frame, text="Cancelar", command=self.cancelar, bg="#F44336", fg="white", font=("Arial", 12, "bold"), state="disabled")
+        self.btn_cancelar.pack(side=tk.LEFT, padx=5)
+
+        # ========= SEÇÃO: PROGRESSO =========
+        progresso_frame = tk.LabelFrame(main_frame, text="Progresso", font=("Arial", 10, "bold"))
+        progresso_frame.pack(fill=tk.X, pady=(0, 10))
+
+        self.etapa_texto = tk.StringVar(value="Aguardando")
+        tk.Label(progresso_frame, textvariable=self.etapa_texto).pack(anchor=tk.W, padx=10, pady=(5, 0))
+
+        self.barra_etapa = ttk.Progressbar(progresso_frame, maximum=1.0)
+        self.barra_etapa.pack(fill=tk.X, padx=10, pady=5)
+
+        # Uma barra por corte, criadas conforme o progresso chega
+        self.cortes_progresso_frame = tk.Frame(progresso_frame)
+        self.cortes_progresso_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
         
         # ========= SEÇÃO: LOG =========
         log_frame = tk.LabelFrame(main_frame, text="Log de Execução", font=("Arial", 10, "bold"))
@@ -545,7 +235,7 @@ class App:
         filename = filedialog.askopenfilename(
             title="Selecionar arquivo de transcrição",
             filetypes=[
-                ("Arquivos SRT", "*.srt"),
+                ("Legendas (SRT/VTT)", "*.srt *.vtt"),
                 ("Todos os arquivos", "*.*")
             ]
         )
@@ -553,10 +243,83 @@ class App:
             self.srt_selecionado.set(filename)
 
     def logar(self, msg):
-        """Adiciona mensagem ao log"""
-        self.log.insert(tk.END, msg + "\n")
-        self.log.see(tk.END)
-        self.root.update()
+        """Adiciona mensagem ao log (pode ser chamado de qualquer thread)"""
+        self.eventos.put(("log", msg))
+
+    def ao_progresso(self, etapa, fracao, nome=None, eta=None):
+        """Recebe o andamento do pipeline (de qualquer thread)"""
+        self.eventos.put(("progresso", etapa, fracao, nome, eta))
+
+    def processar_eventos(self):
+        """Lê a fila de eventos na thread do Tk e atualiza a interface"""
+        try:
+            while True:
+                evento = self.eventos.get_nowait()
+                if evento[0] == "log":
+                    self.log.insert(tk.END, evento[1] + "\n")
+                    self.log.see(tk.END)
+                elif evento[0] == "progresso":
+                    self.atualizar_progresso(*evento[1:])
+                elif evento[0] == "fim":
+                    self.finalizar()
+        except queue.Empty:
+            pass
+        self.root.after(INTERVALO_EVENTOS_MS, self.processar_eventos)
+
+    def atualizar_progresso(self, etapa, fracao, nome, eta):
+        """Atualiza a barra da etapa atual ou a barra de um corte"""
+        if etapa != "corte":
+            self.barra_etapa["value"] = fracao
+            texto = f"{ETAPAS.get(etapa, etapa)}: {fracao:.0%}"
+            if etapa == "download" and eta is not None:
+                texto += f" (restam {formatar_eta(eta)})"
+            elif etapa == "render" and fracao < 1 and self.etas_cortes:
+                texto += f" (restam {formatar_eta(max(self.etas_cortes.values()))})"
+            self.etapa_texto.set(texto)
+            return
+
+        if nome not in self.barras_cortes:
+            linha = tk.Frame(self.cortes_progresso_frame)
+            linha.pack(fill=tk.X, pady=1)
+            rotulo = tk.Label(linha, width=38, anchor=tk.W)
+            rotulo.pack(side=tk.LEFT)
+            barra = ttk.Progressbar(linha, maximum=1.0)
+            barra.pack(side=tk.LEFT, fill=tk.X, expand=True)
+            self.barras_cortes[nome] = (rotulo, barra)
+
+        rotulo, barra = self.barras_cortes[nome]
+        barra["value"] = fracao
+        if fracao >= 1:
+            self.etas_cortes.pop(nome, None)
+            rotulo.config(text=f"{nome[:28]}  ✓")
+        else:
+            if eta is not None:
+                self.etas_cortes[nome] = eta
+            rotulo.config(text=f"{nome[:28]}  {formatar_eta(eta)}")
+
+    def limpar_progresso(self):
+        for rotulo, barra in self.barras_cortes.values():
+            rotulo.master.destroy()
+        self.barras_cortes.clear()
+        self.etas_cortes.clear()
+        self.barra_etapa["value"] = 0
+        self.etapa_texto.set("Aguardando")
+
+    def cancelar(self):
+        """Interrompe o processamento em andamento e mata os ffmpeg"""
+        if self.agendador and not self.agendador.cancelado:
+            self.logar("⛔ Cancelando processamento...")
+            self.agendador.cancelar()
+
+    def finalizar(self):
+        self.agendador = None
+        self.btn_iniciar.config(state="normal")
+        self.btn_cancelar.config(state="disabled")
+
+    def fechar(self):
+        self.cancelar()
+        self.executor.shutdown(wait=False)
+        self.root.destroy()
 
     def validar_entradas(self):
         """Valida as entradas do usuário"""
@@ -583,98 +346,53 @@ class App:
         return True
 
     def iniciar(self):
-        """Inicia o processamento"""
+        """Inicia o processamento numa thread de trabalho"""
+        if self.agendador is not None:
+            return
         if not self.validar_entradas():
             return
             
         modo = self.modo.get()
-        
+
+        if self.fonte_video.get() == "youtube":
+            # Fluxo original: download do YouTube
+            fonte = {'url': self.url.get().strip()}
+        else:
+            # Novo fluxo: usar arquivos selecionados
+            fonte = {
+                'video_path': self.video_selecionado.get(),
+                'legenda_path': self.srt_selecionado.get(),
+            }
+
+        cortes_raw = None
+        if modo == "manual":
+            cortes_raw = self.txt_cortes.get("1.0", tk.END).strip().split("\n")
+
+        self.limpar_progresso()
+        self.agendador = AgendadorRender()
+        self.btn_iniciar.config(state="disabled")
+        self.btn_cancelar.config(state="normal")
+
+        self.executor.submit(
+            self.executar_processamento, self.agendador,
+            modo=modo, cortes_raw=cortes_raw,
+            pasta_videos=PASTA_VIDEOS, pasta_saida=PASTA_CORTES, modo_render=MODO_RENDER,
+            **fonte,
+        )
+
+    def executar_processamento(self, agendador, **argumentos):
+        """Roda na thread de trabalho: nada de Tk aqui, só a fila de eventos"""
         try:
-            # Obter vídeo e legenda
-            if self.fonte_video.get() == "youtube":
-                # Fluxo original: download do YouTube
-                url = self.url.get().strip()
-                self.logar("📥 Baixando vídeo e legendas do YouTube...")
-                video_path, legenda_path, titulo = baixar_video_youtube(url, PASTA_VIDEOS)
-                self.logar(f"✅ Vídeo baixado: {titulo}")
-
-                # NOVO: Limpeza do SRT após o download
-                self.logar("🧹 Limpando sobreposições na legenda baixada...")
-                if limpar_arquivo_srt(legenda_path, margem_segundos=0.05):
-                    self.logar("✅ Legenda limpa com sucesso.")
-                else:
-                    self.logar("⚠️ Não foi possível limpar a legenda (arquivo vazio ou erro). Seguindo assim mesmo.")
-            else:
-                # Novo fluxo: usar arquivos selecionados
-                video_path = self.video_selecionado.get()
-                legenda_path = self.srt_selecionado.get()
-                titulo = os.path.splitext(os.path.basename(video_path))[0]
-                self.logar(f"📁 Usando arquivos selecionados:")
-                self.logar(f"   Vídeo: {os.path.basename(video_path)}")
-                self.logar(f"   Transcrição: {os.path.basename(legenda_path)}")
-
-                # NOVO: Limpeza do SRT para arquivos locais também (benefício extra)
-                self.logar("🧹 Limpando sobreposições na legenda selecionada...")
-                if limpar_arquivo_srt(legenda_path, margem_segundos=0.05):
-                    self.logar("✅ Legenda limpa com sucesso.")
-                else:
-                    self.logar("⚠️ Não foi possível limpar a legenda (arquivo vazio ou erro). Seguindo assim mesmo.")
-
-            # Processar cortes (lógica igual para ambos os fluxos)
-            if modo == "manual":
-                # CORTES MANUAIS - sem limitação de duração
-                self.logar("✂️ Processando cortes manuais...")
-                cortes_raw = self.txt_cortes.get("1.0", tk.END).strip().split("\n")
-                cortes, descricoes = processar_cortes_manuais(cortes_raw)
-                
-                if len(cortes) < 2:
-                    self.logar("⚠️ É necessário pelo menos 2 pontos de corte (início e fim).")
-                    return
-                    
-            else:
-                # CORTES AUTOMÁTICOS - com todas as validações e limitações
-                segmentos = parse_srt(legenda_path)
-                self.logar("🤖 Detectando mudanças de assunto com IA...")
-                cortes = detectar_pontos_de_corte_semantico(segmentos)
-                descricoes = None  # Cortes automáticos não têm descrições
-                
-                self.logar("⏱️ Validando duração dos cortes (máx 12 min)...")
-                cortes = validar_e_ajustar_cortes(cortes)
-                
-                if len(cortes) < 2:
-                    self.logar("⚠️ Poucos cortes detectados.")
-                    return
-
-            self.logar(f"✂️ Cortando vídeo em {len(cortes)-1} partes...")
-            
-            # Mostrar os cortes que serão aplicados
-            for i in range(len(cortes)-1):
-                inicio = cortes[i]
-                fim = cortes[i+1]
-                duracao_seg = timestamp_to_seconds(fim) - timestamp_to_seconds(inicio)
-                duracao_min = duracao_seg / 60
-                
-                # Determina o nome que será usado para o arquivo
-                if descricoes and i < len(descricoes) - 1 and descricoes[i + 1]:
-                    nome_arquivo = sanitizar_nome_arquivo(descricoes[i + 1])
-                    self.logar(f"  📝 {nome_arquivo}: {inicio} → {fim} (duração: {duracao_min:.1f} min)")
-                else:
-                    self.logar(f"  📹 Corte {i+1}: {inicio} → {fim} (duração: {duracao_min:.1f} min)")
-            
-            # Criar pasta de saída se não existir
-            if not os.path.exists(PASTA_CORTES):
-                os.makedirs(PASTA_CORTES)
-            
-            # Executar os cortes
-            cortar_video(video_path, cortes, legenda_path, PASTA_CORTES, descricoes)
-            self.logar("✅ Processamento finalizado com sucesso!")
-            self.logar(f"📁 Os cortes foram salvos em: {PASTA_CORTES}")
-            
+            processar(agendador=agendador, logar=self.logar, ao_progresso=self.ao_progresso, **argumentos)
+        except ProcessamentoCancelado as e:
+            self.logar(f"⛔ {e}")
+        except ValueError as e:
+            self.logar(f"⚠️ {e}")
         except Exception as e:
             self.logar(f"❌ Erro durante o processamento: {e}")
-            import traceback
             self.logar(f"🔍 Detalhes do erro: {traceback.format_exc()}")
-            return
+        finally:
+            self.eventos.put(("fim",))
 
 if __name__ == '__main__':
     root = tk.Tk()
@@ -0,0 +1,196 @@
+import os
+import subprocess
+
+from biblioteca import assinatura_arquivo
+from cortes import Corte, PlanoCortes
+
+# ================= ENVELOPE DE ÁUDIO ==============
+# O áudio do vídeo é decodificado uma única vez para PCM mono de baixa taxa
+# e reduzido a um nível (dBFS) por quadro de PASSO_ENVELOPE segundos. Com
+# ele, cada ponto de corte procura a pausa mais próxima numa janela, sem um
+# silencedetect do ffmpeg por corte. O envelope fica num .envelope.npz ao
+# lado do vídeo, invalidado se o vídeo mudar (como o índice de keyframes).
+
+TAXA_AMOSTRAGEM = 8000
+PASSO_ENVELOPE = 0.02  # 20 ms por quadro
+# Média móvel aplicada ao nível antes de procurar silêncio (s): ignora
+# quedas de um quadro só, no meio de uma palavra
+SUAVIZACAO = 0.2
+# Pausa mínima (s) para contar como silêncio
+SILENCIO_MINIMO = 0.15
+# Nível de silêncio padrão (dBFS). Em gravações com fundo constante o
+# limiar sobe até um pouco acima dos 10% mais baixos do próprio vídeo, mas
+# sempre fica bem abaixo do nível típico (mediana) da fala
+LIMIAR_SILENCIO_DB = -40.0
+MARGEM_PERCENTIL_DB = 3.0
+MARGEM_MEDIANA_DB = 15.0
+
+# Quadros lidos do ffmpeg por vez (~20 s de áudio)
+_QUADROS_POR_BLOCO = 1000
+
+
+def _caminho_envelope(video_path):
+    return video_path + ".envelope.npz"
+
+
+class EnvelopeAudio:
+    """Nível do áudio em dBFS, um valor a cada passo segundos a partir do tempo 0 do arquivo."""
+
+    def __init__(self, niveis_db, passo=PASSO_ENVELOPE):
+        self.niveis_db = niveis_db
+        self.passo = passo
+        self._limiares = {}
+
+    @property
+    def duracao(self):
+        return len(self.niveis_db) * self.passo
+
+    def limiar_silencio(self, limiar_db=LIMIAR_SILENCIO_DB):
+        import numpy as np
+
+        if limiar_db not in self._limiares:
+            limiar = limiar_db
+            if len(self.niveis_db):
+                p10, mediana = np.percentile(self.niveis_db, [10, 50])
+                adaptativo = min(p10 + MARGEM_PERCENTIL_DB, mediana - MARGEM_MEDIANA_DB)
+                limiar = max(limiar_db, float(adaptativo))
+            self._limiares[limiar_db] = limiar
+        return self._limiares[limiar_db]
+
+    def silencio_mais_proximo(self, tempo, janela, minimo=None, maximo=None, limiar_db=LIMIAR_SILENCIO_DB):
+        """
+        Meio da pausa mais próxima de tempo dentro de [tempo - janela,
+        tempo + janela] (limitado a [minimo, maximo]), ou None se não houver
+        pausa de pelo menos SILENCIO_MINIMO nesse trecho.
+        """
+        import numpy as np
+
+        inicio = max(tempo - janela, minimo if minimo is not None else 0.0, 0.0)
+        fim = min(tempo + janela, maximo if maximo is not None else self.duracao, self.duracao)
+        a, b = int(inicio / self.passo), int(np.ceil(fim / self.passo))
+        if b - a < 2:
+            return None
+
+        # Suaviza em potência e volta para dB; lê largura quadros a mais de
+        # cada lado para a média nas bordas da janela usar o áudio vizinho
+        largura = max(1, int(round(SUAVIZACAO / self.passo)))
+        a2, b2 = max(0, a - largura), min(len(self.niveis_db), b + largura)
+        potencia = 10 ** (self.niveis_db[a2:b2].astype(np.float64) / 10)
+        potencia = np.pad(potencia, (largura // 2, largura - 1 - largura // 2), mode='edge')
+        media = np.convolve(potencia, np.ones(largura) / largura, mode='valid')[a - a2:a - a2 + (b - a)]
+        suavizado = 10 * np.log10(media + 1e-12)
+
+        silencio = suavizado < self.limiar_silencio(limiar_db)
+        if not silencio.any():
+            return None
+        # Início e fim de cada sequência de quadros em silêncio
+        bordas = np.diff(np.concatenate(([0], silencio.astype(np.int8), [0])))
+        inicios = np.flatnonzero(bordas == 1)
+        fins = np.flatnonzero(bordas == -1)
+        longas = (fins - inicios) * self.passo >= SILENCIO_MINIMO
+        if not longas.any():
+            return None
+        meios = (a + (inicios[longas] + fins[longas]) / 2) * self.passo
+        return float(meios[np.argmin(np.abs(meios - tempo))])
+
+
+def calcular_envelope(video_path, passo=PASSO_ENVELOPE, taxa=TAXA_AMOSTRAGEM):
+    """
+    Decodifica a primeira trilha de áudio uma vez (PCM s16 mono a taxa Hz,
+    lido do ffmpeg em blocos) e calcula o RMS de cada quadro de passo
+    segundos, vetorizado. Retorna um EnvelopeAudio, ou None se o vídeo não
+    tem áudio.
+    """
+    import numpy as np
+
+    amostras_quadro = int(round(taxa * passo))
+    bytes_quadro = amostras_quadro * 2
+    proc = subprocess.Popen([
+        'ffmpeg', '-v', 'error', '-i', video_path,
+        '-map', '0:a:0', '-vn', '-sn', '-dn',
+        '-ac', '1', '-ar', str(taxa), '-f', 's16le', 'pipe:1',
+    ], stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    blocos = []
+    sobra = b""
+    try:
+        while True:
+            dados = proc.stdout.read(bytes_quadro * _QUADROS_POR_BLOCO)
+            if not dados:
+                break
+            dados = sobra + dados
+            completos = len(dados) // bytes_quadro * bytes_quadro
+            sobra = dados[completos:]
+            if completos:
+                amostras = np.frombuffer(dados[:completos], dtype='<i2').astype(np.float32)
+                quadros = amostras.reshape(-1, amostras_quadro)
+                blocos.append(np.sqrt(np.mean(quadros * quadros, axis=1)))
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+    if proc.returncode != 0 or not blocos:
+        return None
+    rms = np.concatenate(blocos)
+    niveis = (20 * np.log10(rms / 32768.0 + 1e-9)).astype(np.float32)
+    return EnvelopeAudio(niveis, passo)
+
+
+def obter_envelope(video_path):
+    """
+    EnvelopeAudio do vídeo, do cache .envelope.npz ao lado dele se o vídeo
+    não mudou; senão calcula e grava o cache. None se o vídeo não tem áudio.
+    """
+    import numpy as np
+
+    assinatura = assinatura_arquivo(video_path)
+    caminho_cache = _caminho_envelope(video_path)
+    if os.path.exists(caminho_cache):
+        try:
+            with np.load(caminho_cache) as dados:
+                if str(dados['assinatura']) == assinatura:
+                    return EnvelopeAudio(dados['niveis_db'], float(dados['passo']))
+        except (OSError, ValueError, KeyError):
+            pass
+
+    envelope = calcular_envelope(video_path)
+    if envelope is not None:
+        temporario = caminho_cache + ".tmp"
+        try:
+            with open(temporario, 'wb') as f:
+                np.savez(f, niveis_db=envelope.niveis_db, passo=envelope.passo, assinatura=assinatura)
+            os.replace(temporario, caminho_cache)
+        except OSError:
+            pass  # sem permissão de escrita: calcula de novo na próxima vez
+    return envelope
+
+
+def ajustar_plano_ao_silencio(plano, envelope, janela, deslocamento=0.0, limiar_db=LIMIAR_SILENCIO_DB):
+    """
+    Move cada ponto do plano (início e fim dos cortes, em segundos do
+    original) para a pausa mais próxima dentro de janela segundos.
+    deslocamento é o tempo do original em que o arquivo do envelope começa
+    (vídeo baixado só de um trecho). Um ponto nunca passa do vizinho, então
+    a ordem e a continuidade dos cortes se mantêm. Retorna (novo plano,
+    quantidade de pontos movidos).
+    """
+    pontos = sorted({c.inicio for c in plano} | {c.fim for c in plano})
+    novos = {}
+    for i, ponto in enumerate(pontos):
+        # Metade da distância até os vizinhos: dois pontos não se cruzam
+        minimo = (pontos[i - 1] + ponto) / 2 if i else None
+        maximo = (ponto + pontos[i + 1]) / 2 if i + 1 < len(pontos) else None
+        achado = envelope.silencio_mais_proximo(
+            ponto - deslocamento, janela,
+            minimo=None if minimo is None else minimo - deslocamento,
+            maximo=None if maximo is None else maximo - deslocamento,
+            limiar_db=limiar_db,
+        )
+        if achado is not None:
+            novos[ponto] = round(achado + deslocamento, 3)
+
+    movidos = sum(1 for p, n in novos.items() if abs(n - p) >= 0.001)
+    if not movidos:
+        return plano, 0
+    cortes = [Corte(novos.get(c.inicio, c.inicio), novos.get(c.fim, c.fim), c.descricao, c.nome) for c in plano]
+    return PlanoCortes(cortes), movidos
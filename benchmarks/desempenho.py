@@ -0,0 +1,314 @@
+"""
+Benchmark do pipeline com dados sintéticos, sem rede.
+
+Gera SRTs sintéticos (de 100 a 100 mil cues, normais e no estilo das
+legendas automáticas do YouTube, com linhas rolando de uma cue para a
+próxima) e, se houver ffmpeg, um vídeo curto com as fontes de teste do
+lavfi. Mede:
+  - parse_srt, limpar_sobreposicoes_srt e filtrar_legendas_por_tempo
+    (e os equivalentes da TrilhaLegenda, para comparar)
+  - colapsar_rolagem nas legendas automáticas
+  - detectar_pontos_de_corte_semantico, com um codificador falso
+    (vetores determinísticos, mede só a segmentação) ou com --modelo
+  - várias transcrições: detectar_pontos_de_corte_semantico em laço contra
+    detectar_pontos_em_lote (encode único + pool de processos)
+  - cortar_video em cada modo de renderização e no formato Shorts
+    (compare com --resolucao-video 1920x1080: o Short é recortado e
+    reduzido antes de fades e legenda)
+
+O resultado vai para um JSON; com --comparar, cada medida é comparada com a
+de uma execução anterior e o script sai com código 1 se alguma ficou mais
+lenta que o limite.
+
+    python benchmarks/desempenho.py --saida base.json
+    python benchmarks/desempenho.py --comparar base.json --limite 0.2
+    python benchmarks/desempenho.py --tamanhos 100 1000 --sem-video
+    python benchmarks/desempenho.py --modelo /caminho/modelo-pequeno
+    python benchmarks/desempenho.py --tamanhos 100 --resolucao-video 1920x1080
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import semantica  # noqa: E402
+from cortes import PlanoCortes  # noqa: E402
+from legendas import (  # noqa: E402
+    TrilhaLegenda, parse_srt, limpar_sobreposicoes_srt, filtrar_legendas_por_tempo,
+    ler_cues, colapsar_rolagem, ms_para_srt,
+)
+from renderizacao import MODOS_RENDER, MODO_RENDER_PARALELO, FORMATO_ORIGINAL, FORMATO_SHORTS, cortar_video  # noqa: E402
+
+TAMANHOS = (100, 1000, 10000, 100000)
+
+_PALAVRAS = (
+    "hoje vamos falar sobre o mercado de trabalho programação python dados vídeo "
+    "edição áudio câmera luz roteiro canal inscritos comentário pergunta resposta "
+    "exemplo projeto código função classe teste servidor banco rede segurança"
+).split()
+
+
+# ===== FIXTURES =====
+
+def gerar_srt(caminho, n, rolagem=False, semente=0):
+    """
+    SRT com n cues de ~3 s. Com rolagem, imita as legendas automáticas:
+    cada cue repete a linha anterior e mostra a nova crescendo, com tempos
+    sobrepostos.
+    """
+    rng = random.Random(semente)
+    t = 0
+    anterior = ""
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for i in range(1, n + 1):
+            duracao = rng.randint(1500, 4000)
+            linha = " ".join(rng.choice(_PALAVRAS) for _ in range(rng.randint(3, 9)))
+            if rolagem:
+                texto = f"{anterior}\n{linha}" if anterior else linha
+                fim = t + duracao + rng.randint(0, 800)  # sobrepõe a próxima
+                anterior = linha
+            else:
+                texto = linha
+                fim = t + duracao - 100
+            f.write(f"{i}\n{ms_para_srt(t)} --> {ms_para_srt(fim)}\n{texto}\n\n")
+            t += duracao
+    return t / 1000
+
+
+def gerar_video(caminho, duracao, resolucao="640x360"):
+    """Vídeo H.264 + AAC com testsrc2 e um seno (GOP de 2 s, como um upload comum)."""
+    subprocess.run([
+        'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'testsrc2=size={resolucao}:rate=30',
+        '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=48000',
+        '-t', str(duracao),
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '60', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-shortest', caminho,
+    ], check=True, capture_output=True)
+
+
+def _codificador_falso(textos, dimensao=64, **_):
+    """Vetores determinísticos por texto: mede a segmentação sem o custo do modelo."""
+    import numpy as np
+
+    vetores = np.empty((len(textos), dimensao), dtype=np.float32)
+    for i, texto in enumerate(textos):
+        semente = int.from_bytes(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'little')
+        vetores[i] = np.random.default_rng(semente).standard_normal(dimensao)
+    return vetores
+
+
+# ===== MEDIÇÃO =====
+
+def medir(funcao, repeticoes):
+    """Executa funcao repeticoes vezes; retorna o mínimo e a mediana (s)."""
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+    return {'min_s': round(min(tempos), 6), 'mediana_s': round(statistics.median(tempos), 6)}
+
+
+def bench_legendas(pasta, tamanhos, repeticoes):
+    resultados = {}
+    for n in tamanhos:
+        for estilo, rolagem in (('normal', False), ('rolagem', True)):
+            caminho = os.path.join(pasta, f"{estilo}_{n}.srt")
+            duracao = gerar_srt(caminho, n, rolagem=rolagem)
+            segmentos = parse_srt(caminho)
+            trilha = TrilhaLegenda.de_arquivo(caminho)
+            meio = duracao / 2
+            prefixo = f"{estilo}/{n}"
+
+            resultados[f"parse_srt/{prefixo}"] = medir(lambda: parse_srt(caminho), repeticoes)
+            resultados[f"trilha_de_arquivo/{prefixo}"] = medir(lambda: TrilhaLegenda.de_arquivo(caminho), repeticoes)
+            resultados[f"limpar_sobreposicoes_srt/{prefixo}"] = medir(
+                lambda: limpar_sobreposicoes_srt(segmentos), repeticoes)
+            resultados[f"trilha_limpar_sobreposicoes/{prefixo}"] = medir(
+                lambda: trilha.limpar_sobreposicoes(), repeticoes)
+            resultados[f"filtrar_legendas_por_tempo/{prefixo}"] = medir(
+                lambda: filtrar_legendas_por_tempo(segmentos, meio, meio + 600), repeticoes)
+            resultados[f"trilha_fatia/{prefixo}"] = medir(lambda: trilha.fatia(meio, meio + 600), repeticoes)
+            if rolagem:
+                resultados[f"colapsar_rolagem/{prefixo}"] = medir(
+                    lambda: list(colapsar_rolagem(ler_cues(caminho))), repeticoes)
+    return resultados
+
+
+def bench_deteccao(pasta, tamanhos, repeticoes, modelo=None):
+    resultados = {}
+    original = semantica.codificar_textos
+    if not modelo:
+        semantica.codificar_textos = _codificador_falso
+    try:
+        for n in tamanhos:
+            caminho = os.path.join(pasta, f"normal_{n}.srt")
+            if not os.path.exists(caminho):
+                gerar_srt(caminho, n)
+            trilha = TrilhaLegenda.de_arquivo(caminho)
+            opcoes = {'usar_cache': False}
+            if modelo:
+                opcoes['nome_modelo'] = modelo
+            for motor in semantica.MOTORES:
+                resultados[f"detectar_pontos_de_corte_semantico/{motor}/{n}"] = medir(
+                    lambda: semantica.detectar_pontos_de_corte_semantico(trilha, motor=motor, **opcoes),
+                    repeticoes)
+    finally:
+        semantica.codificar_textos = original
+    return resultados
+
+
+def bench_lote(pasta, n_transcricoes, cues, repeticoes, modelo=None, processos=None):
+    """Mesmas transcrições planejadas uma a uma e com detectar_pontos_em_lote."""
+    caminhos = []
+    for i in range(n_transcricoes):
+        caminho = os.path.join(pasta, f"lote_{i}.srt")
+        gerar_srt(caminho, cues, semente=i)
+        caminhos.append(caminho)
+
+    resultados = {}
+    original = semantica.codificar_textos
+    if not modelo:
+        semantica.codificar_textos = _codificador_falso
+    opcoes = {'usar_cache': False}
+    if modelo:
+        opcoes['nome_modelo'] = modelo
+    try:
+        def _laco():
+            for caminho in caminhos:
+                trilha = TrilhaLegenda.de_arquivo(caminho, colapsar=True).limpar_sobreposicoes()
+                semantica.detectar_pontos_de_corte_semantico(trilha, **opcoes)
+
+        rotulo = f"{n_transcricoes}x{cues}"
+        resultados[f"planejamento_em_laco/{rotulo}"] = medir(_laco, repeticoes)
+        resultados[f"detectar_pontos_em_lote/{rotulo}"] = medir(
+            lambda: semantica.detectar_pontos_em_lote(caminhos, processos=processos, **opcoes), repeticoes)
+    finally:
+        semantica.codificar_textos = original
+    return resultados
+
+
+def bench_render(pasta, repeticoes, duracao=60, n_cortes=3, resolucao="640x360"):
+    if not shutil.which('ffmpeg'):
+        print("⚠️ ffmpeg não encontrado: pulando cortar_video")
+        return {}
+
+    video = os.path.join(pasta, "fonte.mp4")
+    legenda = os.path.join(pasta, "fonte.srt")
+    gerar_video(video, duracao, resolucao)
+    gerar_srt(legenda, duracao // 3)
+    passo = duracao / n_cortes
+    # Cortes fora dos keyframes, para o modo inteligente ter GOP inicial a reencodar
+    plano = PlanoCortes.de_pontos([round(0.5 + i * passo, 3) for i in range(n_cortes)] + [duracao - 0.5])
+
+    resultados = {}
+    casos = [(modo, FORMATO_ORIGINAL) for modo in MODOS_RENDER] + [(MODO_RENDER_PARALELO, FORMATO_SHORTS)]
+    for modo, formato in casos:
+        rotulo = modo if formato == FORMATO_ORIGINAL else f"{modo}_{formato}"
+        saida = os.path.join(pasta, f"saida_{rotulo}")
+
+        def _rodar():
+            shutil.rmtree(saida, ignore_errors=True)
+            os.makedirs(saida)
+            falhas = [r for r in cortar_video(video, plano, legenda, saida, modo_render=modo, retomar=False,
+                                              formato=formato)
+                      if not r.ok]
+            if falhas:
+                raise RuntimeError(f"{rotulo}: ffmpeg falhou ({falhas[0].stderr.strip()[-300:]})")
+
+        resultados[f"cortar_video/{rotulo}/{resolucao}_{duracao}s_{n_cortes}_cortes"] = medir(_rodar, repeticoes)
+    return resultados
+
+
+def comparar(atual, anterior, limite):
+    """Imprime a variação de cada medida; retorna as que pioraram mais que limite (fração)."""
+    pioraram = []
+    for nome, medida in sorted(atual.items()):
+        base = anterior.get(nome)
+        if not base or not base['min_s']:
+            continue
+        variacao = medida['min_s'] / base['min_s'] - 1
+        marca = "❌" if variacao > limite else "✅"
+        print(f"{marca} {nome}: {base['min_s']*1000:.2f} → {medida['min_s']*1000:.2f} ms ({variacao:+.0%})")
+        if variacao > limite:
+            pioraram.append(nome)
+    return pioraram
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS), help="Quantidades de cues dos SRTs")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--modelo', help="Modelo local pequeno para a detecção (senão usa o codificador falso)")
+    parser.add_argument('--transcricoes', type=int, default=8,
+                        help="Transcrições no benchmark de planejamento em lote (0 pula)")
+    parser.add_argument('--cues-lote', type=int, default=2000, help="Cues de cada transcrição do lote")
+    parser.add_argument('--processos', type=int, help="Processos do planejamento em lote (padrão: um por CPU)")
+    parser.add_argument('--sem-video', action='store_true', help="Não mede cortar_video")
+    parser.add_argument('--duracao-video', type=int, default=60, help="Duração (s) do vídeo sintético")
+    parser.add_argument('--resolucao-video', default="640x360", help="Resolução do vídeo sintético (LxA)")
+    parser.add_argument('--saida', help="Arquivo JSON para salvar o resultado")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--limite', type=float, default=0.2, help="Piora máxima aceita no --comparar (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench_cortes_") as pasta:
+        medidas = {}
+        medidas.update(bench_legendas(pasta, args.tamanhos, args.repeticoes))
+        medidas.update(bench_deteccao(pasta, args.tamanhos, args.repeticoes, args.modelo))
+        if args.transcricoes:
+            medidas.update(bench_lote(pasta, args.transcricoes, args.cues_lote, args.repeticoes,
+                                      args.modelo, args.processos))
+        if not args.sem_video:
+            medidas.update(bench_render(pasta, args.repeticoes, args.duracao_video, resolucao=args.resolucao_video))
+
+    resultado = {
+        'commit': _commit_atual(),
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'codificador': args.modelo or 'falso',
+        'repeticoes': args.repeticoes,
+        'medidas': medidas,
+    }
+
+    for nome, medida in medidas.items():
+        print(f"{nome}: {medida['min_s']*1000:.2f} ms (mediana {medida['mediana_s']*1000:.2f} ms)")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            anterior = json.load(f)['medidas']
+        print(f"\nComparação com {args.comparar} (limite {args.limite:.0%}):")
+        pioraram = comparar(medidas, anterior, args.limite)
+        if pioraram:
+            print(f"❌ {len(pioraram)} medida(s) mais lenta(s) que o limite.")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Benchmark dos motores de download contra um servidor HTTP local, sem rede.
+
+Sobe um servidor em 127.0.0.1 que serve um arquivo grande (com suporte a
+Range) e o mesmo arquivo fatiado numa playlist HLS, limitando a taxa de
+cada conexão (--taxa-conexao) como um CDN que estrangula streams únicos.
+Baixa pelo yt-dlp com as opções de download.opcoes_motor e mede, em cada
+caso, tempo, MB/s e quantas conexões o servidor recebeu (pedaços e
+fragmentos reaproveitam conexões):
+  - simples_progressivo: um stream só (motor "simples")
+  - paralelo_pedacos: o arquivo em pedaços Range (motor "paralelo")
+  - simples_fragmentos / paralelo_fragmentos: HLS em série e com
+    CONEXOES_DOWNLOAD fragmentos ao mesmo tempo
+  - externo: motor "externo", se DOWNLOADER_EXTERNO estiver instalado
+  - limite_banda: dois downloads paralelos ao mesmo tempo sob um
+    ControleDownloads com --limite-mb; a taxa somada deve ficar no limite
+
+Todo arquivo baixado é conferido (sha256) contra o original.
+
+    python benchmarks/download_local.py
+    python benchmarks/download_local.py --tamanho-mb 256 --taxa-conexao 8 --conexoes 16
+    python benchmarks/download_local.py --saida download.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DOWNLOADER_EXTERNO  # noqa: E402
+from download import (  # noqa: E402
+    MOTOR_SIMPLES, MOTOR_PARALELO, MOTOR_EXTERNO, ControleDownloads, baixar_com_limites, opcoes_motor,
+)
+
+MB = 1024 * 1024
+_TIPOS = {'.mp4': 'video/mp4', '.m3u8': 'application/vnd.apple.mpegurl', '.ts': 'video/mp2t'}
+
+
+# ===== SERVIDOR =====
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: o cliente pode reaproveitar a conexão
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.conexoes += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._responder(corpo=False)
+
+    def do_GET(self):
+        self._responder()
+
+    def _responder(self, corpo=True):
+        caminho = os.path.join(self.server.pasta, os.path.basename(urlsplit(self.path).path))
+        if not os.path.isfile(caminho):
+            self.send_error(404)
+            return
+        tamanho = os.path.getsize(caminho)
+        inicio, fim = 0, tamanho - 1
+        faixa = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range') or '')
+        if faixa and (faixa.group(1) or faixa.group(2)):
+            if faixa.group(1):
+                inicio = int(faixa.group(1))
+                fim = min(int(faixa.group(2)), tamanho - 1) if faixa.group(2) else tamanho - 1
+            else:
+                inicio = max(0, tamanho - int(faixa.group(2)))
+            if inicio > fim:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{tamanho}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {inicio}-{fim}/{tamanho}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', _TIPOS.get(os.path.splitext(caminho)[1], 'application/octet-stream'))
+        self.send_header('Content-Length', str(fim - inicio + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        if corpo:
+            self._enviar(caminho, inicio, fim - inicio + 1)
+
+    def _enviar(self, caminho, inicio, restante):
+        """Envia em blocos de 64 KB sem passar de taxa_conexao bytes/s nesta conexão."""
+        taxa = self.server.taxa_conexao
+        t0, enviados = time.perf_counter(), 0
+        try:
+            with open(caminho, 'rb') as f:
+                f.seek(inicio)
+                while restante > 0:
+                    bloco = f.read(min(64 * 1024, restante))
+                    if not bloco:
+                        break
+                    self.wfile.write(bloco)
+                    enviados += len(bloco)
+                    restante -= len(bloco)
+                    if taxa:
+                        adiantado = enviados / taxa - (time.perf_counter() - t0)
+                        if adiantado > 0:
+                            time.sleep(adiantado)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class ServidorLocal(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, pasta, taxa_conexao):
+        super().__init__(('127.0.0.1', 0), _Manipulador)
+        self.pasta = pasta
+        self.taxa_conexao = taxa_conexao
+        self.conexoes = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def handle_error(self, request, client_address):
+        # Clientes fecham conexões do pool sem avisar: não é erro do benchmark
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def zerar_conexoes(self):
+        with self.lock:
+            self.conexoes = 0
+
+
+# ===== FIXTURES =====
+
+def gerar_arquivos(pasta, tamanho_mb, segmento_mb):
+    """video.mp4 com bytes aleatórios e video.m3u8 com o mesmo conteúdo em segmentos. Retorna o sha256."""
+    caminho = os.path.join(pasta, "video.mp4")
+    soma = hashlib.sha256()
+    with open(caminho, 'wb') as f:
+        for _ in range(tamanho_mb):
+            bloco = os.urandom(MB)
+            soma.update(bloco)
+            f.write(bloco)
+
+    linhas = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:4", "#EXT-X-MEDIA-SEQUENCE:0"]
+    with open(caminho, 'rb') as origem:
+        i = 0
+        while True:
+            dados = origem.read(segmento_mb * MB)
+            if not dados:
+                break
+            nome = f"seg_{i:05d}.ts"
+            with open(os.path.join(pasta, nome), 'wb') as f:
+                f.write(dados)
+            linhas += ["#EXTINF:4.0,", nome]
+            i += 1
+    linhas.append("#EXT-X-ENDLIST")
+    with open(os.path.join(pasta, "video.m3u8"), 'w', encoding='utf-8') as f:
+        f.write("\n".join(linhas) + "\n")
+    return soma.hexdigest()
+
+
+def _sha256(caminho):
+    soma = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(MB), b""):
+            soma.update(bloco)
+    return soma.hexdigest()
+
+
+# ===== MEDIÇÃO =====
+
+def baixar(url, pasta, motor, conexoes=None, controle=None):
+    """Baixa url com o motor dado (pelo extrator genérico do yt-dlp). Retorna o caminho do arquivo."""
+    os.makedirs(pasta, exist_ok=True)
+    opcoes = opcoes_motor(motor, conexoes)
+    opcoes.update({
+        'outtmpl': os.path.join(pasta, '%(id)s.%(ext)s'),
+        'format': 'best',
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True,
+        'overwrites': True,
+        'fixup': 'never',
+        'cachedir': False,
+    })
+    info, _ = baixar_com_limites(url, opcoes, controle or ControleDownloads())
+    return info['requested_downloads'][0]['filepath']
+
+
+def medir_download(servidor, url, pasta, motor, soma, repeticoes, conexoes=None):
+    tempos, conexoes_abertas, ok = [], [], True
+    for i in range(repeticoes):
+        servidor.zerar_conexoes()
+        destino = os.path.join(pasta, f"{motor}_{i}")
+        t0 = time.perf_counter()
+        caminho = baixar(url, destino, motor, conexoes)
+        tempos.append(time.perf_counter() - t0)
+        conexoes_abertas.append(servidor.conexoes)
+        ok = ok and _sha256(caminho) == soma
+        shutil.rmtree(destino, ignore_errors=True)
+    return {'min_s': round(min(tempos), 4), 'conexoes': max(conexoes_abertas), 'ok': ok}
+
+
+def medir_limite_banda(servidor, url, pasta, soma, limite_mb, conexoes=None, simultaneos=2):
+    """simultaneos downloads paralelos ao mesmo tempo, todos sob o mesmo ControleDownloads."""
+    controle = ControleDownloads(banda=int(limite_mb * MB))
+    caminhos, erros = [None] * simultaneos, []
+
+    def _baixar(i):
+        try:
+            caminhos[i] = baixar(url, os.path.join(pasta, f"limite_{i}"), MOTOR_PARALELO, conexoes, controle)
+        except Exception as e:
+            erros.append(e)
+
+    servidor.zerar_conexoes()
+    threads = [threading.Thread(target=_baixar, args=(i,)) for i in range(simultaneos)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - t0
+    if erros:
+        raise erros[0]
+    ok = all(_sha256(c) == soma for c in caminhos)
+    total = sum(os.path.getsize(c) for c in caminhos)
+    return {'min_s': round(duracao, 4), 'conexoes': servidor.conexoes, 'ok': ok,
+            'taxa_total_mb_s': round(total / MB / duracao, 2), 'limite_mb_s': limite_mb}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanho-mb', type=int, default=64, help="Tamanho do arquivo servido (MB)")
+    parser.add_argument('--segmento-mb', type=int, default=2, help="Tamanho de cada segmento HLS (MB)")
+    parser.add_argument('--taxa-conexao', type=float, default=4,
+                        help="Taxa máxima de cada conexão no servidor (MB/s; 0 = sem limite)")
+    parser.add_argument('--conexoes', type=int, help="Fragmentos/conexões simultâneos (padrão: CONEXOES_DOWNLOAD)")
+    parser.add_argument('--limite-mb', type=float, default=8,
+                        help="Banda total do caso limite_banda (MB/s; 0 pula o caso)")
+    parser.add_argument('--repeticoes', type=int, default=1)
+    parser.add_argument('--saida', help="Arquivo JSON para salvar o resultado")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench_download_") as pasta:
+        arquivos = os.path.join(pasta, "servidor")
+        os.makedirs(arquivos)
+        soma = gerar_arquivos(arquivos, args.tamanho_mb, args.segmento_mb)
+
+        servidor = ServidorLocal(arquivos, int(args.taxa_conexao * MB))
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        progressivo, hls = servidor.base + "video.mp4", servidor.base + "video.m3u8"
+        destino = os.path.join(pasta, "baixados")
+
+        casos = [
+            ('simples_progressivo', progressivo, MOTOR_SIMPLES),
+            ('paralelo_pedacos', progressivo, MOTOR_PARALELO),
+            ('simples_fragmentos', hls, MOTOR_SIMPLES),
+            ('paralelo_fragmentos', hls, MOTOR_PARALELO),
+        ]
+        if shutil.which(DOWNLOADER_EXTERNO):
+            casos.append(('externo', progressivo, MOTOR_EXTERNO))
+        else:
+            print(f"⚠️ {DOWNLOADER_EXTERNO} não encontrado: caso externo ignorado.")
+
+        medidas = {}
+        try:
+            for nome, url, motor in casos:
+                medidas[nome] = medir_download(servidor, url, destino, motor, soma, args.repeticoes, args.conexoes)
+            if args.limite_mb:
+                medidas['limite_banda'] = medir_limite_banda(servidor, hls, destino, soma, args.limite_mb,
+                                                             args.conexoes)
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+
+    for nome, medida in medidas.items():
+        mb = args.tamanho_mb * (2 if nome == 'limite_banda' else 1)
+        medida.setdefault('mb_s', round(mb / medida['min_s'], 2))
+        extra = (f", total {medida['taxa_total_mb_s']} MB/s (limite {medida['limite_mb_s']})"
+                 if 'limite_mb_s' in medida else "")
+        print(f"{nome}: {medida['min_s']:.2f} s, {medida['mb_s']} MB/s, "
+              f"{medida['conexoes']} conexões{extra}{'' if medida['ok'] else ' ❌ arquivo diferente'}")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({
+                'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'plataforma': platform.platform(),
+                'tamanho_mb': args.tamanho_mb,
+                'taxa_conexao_mb_s': args.taxa_conexao,
+                'medidas': medidas,
+            }, f, ensure_ascii=False, indent=2)
+
+    falhas = [nome for nome, medida in medidas.items() if not medida['ok']]
+    limite = medidas.get('limite_banda')
+    if limite and limite['taxa_total_mb_s'] > limite['limite_mb_s'] * 1.15:
+        print("❌ A banda somada passou do limite.")
+        return 1
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
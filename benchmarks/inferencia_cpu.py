@@ -0,0 +1,115 @@
+"""
+Compara a inferência fp32 na CPU com o modo "cpu_int8" (quantização dinâmica).
+
+Mede o tempo de encode de uma transcrição (ou de frases sintéticas), o
+speedup do int8, a diferença dos embeddings (similaridade de cosseno entre
+o vetor fp32 e o int8 de cada texto) e, com --srt, quanto os cortes
+escolhidos pelo segmentador mudam.
+
+    python benchmarks/inferencia_cpu.py --srt video.srt --threads 4
+    python benchmarks/inferencia_cpu.py --frases 2000 --saida inferencia.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings import NOME_MODELO, MODO_CPU, MODO_CPU_INT8, carregar_modelo  # noqa: E402
+from legendas import parse_srt  # noqa: E402
+from semantica import segmentar_por_topicos  # noqa: E402
+
+_PALAVRAS = (
+    "hoje vamos falar sobre o mercado de trabalho programação python dados vídeo "
+    "edição áudio câmera luz roteiro canal inscritos comentário pergunta resposta "
+    "exemplo projeto código função classe teste servidor banco rede segurança"
+).split()
+
+
+def frases_sinteticas(n, semente=0):
+    rng = random.Random(semente)
+    return [" ".join(rng.choice(_PALAVRAS) for _ in range(rng.randint(4, 30))) for _ in range(n)]
+
+
+def medir_encode(nome_modelo, modo, textos, tamanho_lote, threads, repeticoes):
+    import numpy as np
+
+    t0 = time.perf_counter()
+    modelo = carregar_modelo(nome_modelo, modo, threads=threads)
+    carga = time.perf_counter() - t0
+
+    modelo.encode(textos[:tamanho_lote], batch_size=tamanho_lote)  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        vetores = modelo.encode(textos, batch_size=tamanho_lote, convert_to_numpy=True)
+        tempos.append(time.perf_counter() - t0)
+    return np.asarray(vetores, dtype=np.float32), carga, min(tempos)
+
+
+def _cosseno_por_linha(a, b):
+    import numpy as np
+
+    na = np.linalg.norm(a, axis=1)
+    nb = np.linalg.norm(b, axis=1)
+    return np.einsum('ij,ij->i', a, b) / np.maximum(na * nb, 1e-12)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modelo', default=NOME_MODELO, help="Nome ou caminho local do modelo")
+    parser.add_argument('--srt', help="Transcrição real para medir (senão usa frases sintéticas)")
+    parser.add_argument('--frases', type=int, default=1000, help="Quantidade de frases sintéticas")
+    parser.add_argument('--threads', type=int, help="Threads intra-op do PyTorch")
+    parser.add_argument('--lote', type=int, default=128, help="Tamanho do lote do encode")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--saida', help="Arquivo JSON para salvar o resultado")
+    args = parser.parse_args(argv)
+
+    segmentos = parse_srt(args.srt) if args.srt else None
+    textos = [s[2] for s in segmentos] if segmentos else frases_sinteticas(args.frases)
+
+    fp32, carga_fp32, tempo_fp32 = medir_encode(args.modelo, MODO_CPU, textos, args.lote, args.threads, args.repeticoes)
+    int8, carga_int8, tempo_int8 = medir_encode(args.modelo, MODO_CPU_INT8, textos, args.lote, args.threads, args.repeticoes)
+
+    cossenos = _cosseno_por_linha(fp32, int8)
+    resultado = {
+        'modelo': args.modelo,
+        'textos': len(textos),
+        'threads': args.threads,
+        'lote': args.lote,
+        'fp32': {'carga_s': round(carga_fp32, 3), 'encode_s': round(tempo_fp32, 3)},
+        'int8': {'carga_s': round(carga_int8, 3), 'encode_s': round(tempo_int8, 3)},
+        'speedup': round(tempo_fp32 / tempo_int8, 2) if tempo_int8 else None,
+        'deriva': {
+            'cosseno_medio': round(float(cossenos.mean()), 5),
+            'cosseno_minimo': round(float(cossenos.min()), 5),
+        },
+    }
+
+    if segmentos:
+        cortes_fp32 = segmentar_por_topicos(segmentos, embeddings=fp32)
+        cortes_int8 = segmentar_por_topicos(segmentos, embeddings=int8)
+        iguais = len(set(cortes_fp32) & set(cortes_int8))
+        resultado['cortes'] = {
+            'fp32': cortes_fp32,
+            'int8': cortes_int8,
+            'concordancia': round(iguais / max(len(cortes_fp32), len(cortes_int8)), 3),
+        }
+
+    print(f"fp32: {tempo_fp32:.2f}s  int8: {tempo_int8:.2f}s  speedup: {resultado['speedup']}x")
+    print(f"cosseno fp32×int8: médio {resultado['deriva']['cosseno_medio']}, mínimo {resultado['deriva']['cosseno_minimo']}")
+    if 'cortes' in resultado:
+        print(f"concordância dos cortes: {resultado['cortes']['concordancia']:.0%}")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Benchmark de inicialização a frio.
+
+Mede quanto tempo um processo Python novo leva para importar os pontos de
+entrada (app.py e cli.py) e confere que as dependências pesadas (torch,
+sentence_transformers, yt_dlp) não são carregadas nessa hora.
+Sai com código 1 se a mediana passar do orçamento.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --orcamento 0.8 --repeticoes 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS_PESADOS = ('torch', 'sentence_transformers', 'yt_dlp')
+
+# Roda dentro do processo filho: importa o módulo e informa tempo e módulos pesados carregados
+_SCRIPT_FILHO = """
+import sys, time, json
+t0 = time.perf_counter()
+import {modulo}
+t1 = time.perf_counter()
+pesados = [m for m in {pesados!r} if m in sys.modules]
+print(json.dumps({{"import": t1 - t0, "pesados": pesados}}))
+"""
+
+
+def medir(modulo, repeticoes):
+    tempos_total = []
+    tempos_import = []
+    pesados = set()
+    for _ in range(repeticoes):
+        script = _SCRIPT_FILHO.format(modulo=modulo, pesados=MODULOS_PESADOS)
+        t0 = time.perf_counter()
+        saida = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout
+        tempos_total.append(time.perf_counter() - t0)
+        dados = json.loads(saida.strip().splitlines()[-1])
+        tempos_import.append(dados['import'])
+        pesados.update(dados['pesados'])
+    return {
+        'modulo': modulo,
+        'total_mediana': statistics.median(tempos_total),
+        'import_mediana': statistics.median(tempos_import),
+        'pesados_carregados': sorted(pesados),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orcamento', type=float, default=1.0, help="Tempo máximo (s) da mediana do processo inteiro")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--modulos', nargs='+', default=['cli', 'app'])
+    args = parser.parse_args(argv)
+
+    falhou = False
+    for modulo in args.modulos:
+        try:
+            r = medir(modulo, args.repeticoes)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ {modulo}: falhou ao importar\n{e.stderr}")
+            falhou = True
+            continue
+
+        dentro = r['total_mediana'] <= args.orcamento
+        print(
+            f"{'✅' if dentro else '❌'} {modulo}: processo {r['total_mediana']*1000:.0f} ms, "
+            f"import {r['import_mediana']*1000:.0f} ms (orçamento {args.orcamento*1000:.0f} ms)"
+        )
+        if r['pesados_carregados']:
+            print(f"   ❌ módulos pesados carregados na inicialização: {', '.join(r['pesados_carregados'])}")
+            falhou = True
+        falhou = falhou or not dentro
+
+    return 1 if falhou else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,241 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from download import MidiaBaixada
+
+# ================= BIBLIOTECA DE MÍDIA ==============
+# Índice dos vídeos já baixados em PASTA_VIDEOS, por ID do YouTube, para
+# que a mesma URL não seja baixada de novo. Fica num SQLite dentro da
+# própria pasta de vídeos, junto com um arquivo de downloads no formato
+# do --download-archive do yt-dlp.
+
+ARQUIVO_INDICE = "biblioteca.sqlite"
+ARQUIVO_DOWNLOADS = "downloads.txt"
+
+# Bytes lidos do começo e do fim do arquivo para a assinatura
+BLOCO_ASSINATURA = 4 * 1024 * 1024
+
+_RE_ID_YOUTUBE = re.compile(
+    r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|live/|embed/|v/)|youtu\.be/)([A-Za-z0-9_-]{11})'
+)
+
+
+def extrair_id_video(url):
+    """ID do vídeo a partir da URL do YouTube, sem acessar a rede (None se não reconhecer)."""
+    m = _RE_ID_YOUTUBE.search(url or "")
+    return m.group(1) if m else None
+
+
+def assinatura_arquivo(caminho):
+    """
+    Checksum rápido: sha256 do tamanho + primeiros e últimos BLOCO_ASSINATURA
+    bytes. Ler vídeos de vários GB inteiros a cada consulta não compensa, e
+    um download truncado ou trocado muda o tamanho ou o fim do arquivo.
+    """
+    tamanho = os.path.getsize(caminho)
+    h = hashlib.sha256(str(tamanho).encode())
+    with open(caminho, 'rb') as f:
+        h.update(f.read(BLOCO_ASSINATURA))
+        if tamanho > BLOCO_ASSINATURA:
+            f.seek(max(BLOCO_ASSINATURA, tamanho - BLOCO_ASSINATURA))
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class BibliotecaMidia:
+    """
+    Índice persistente (SQLite) dos downloads de uma pasta de vídeos.
+    midias guarda um registro por ID (título, duração, formato, legenda e
+    idiomas); arquivos guarda os vídeos baixados daquele ID, inteiros ou
+    trechos, com tamanho, mtime e checksum. Arquivos que sumiram ou mudaram
+    são detectados na consulta e removidos do índice.
+    Seguro para uso por várias threads.
+    """
+
+    def __init__(self, pasta):
+        os.makedirs(pasta, exist_ok=True)
+        self.pasta = pasta
+        self.caminho = os.path.join(pasta, ARQUIVO_INDICE)
+        self.arquivo_downloads = os.path.join(pasta, ARQUIVO_DOWNLOADS)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS midias (
+                video_id TEXT PRIMARY KEY,
+                url TEXT,
+                titulo TEXT NOT NULL,
+                duracao REAL,
+                formato TEXT,
+                legenda_path TEXT,
+                idiomas TEXT,
+                atualizado_em REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS arquivos (
+                caminho TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                inicio REAL,
+                fim REAL,
+                tamanho INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                checksum TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_arquivos_video ON arquivos (video_id);
+        """)
+        self._conexao.commit()
+
+    # ----- registro -----
+
+    def registrar(self, midia):
+        """Guarda (ou atualiza) uma MidiaBaixada e o vídeo dela, se houver."""
+        with self._lock:
+            atual = self._conexao.execute(
+                "SELECT legenda_path, idiomas FROM midias WHERE video_id = ?", (midia.video_id,)
+            ).fetchone()
+            # Download só do trecho não traz legenda: mantém a registrada
+            legenda_path = midia.legenda_path or (atual[0] if atual else None)
+            idiomas = midia.idiomas or (json.loads(atual[1]) if atual and atual[1] else [])
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO midias "
+                "(video_id, url, titulo, duracao, formato, legenda_path, idiomas, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (midia.video_id, midia.url, midia.titulo, midia.duracao, midia.formato,
+                 legenda_path, json.dumps(idiomas), time.time()),
+            )
+            self._conexao.commit()
+
+        if midia.video_path and os.path.exists(midia.video_path):
+            inicio, fim = midia.trecho if midia.trecho else (None, None)
+            self.registrar_arquivo(midia.video_id, midia.video_path, inicio, fim)
+
+    def registrar_arquivo(self, video_id, caminho, inicio=None, fim=None):
+        """
+        Registra um vídeo baixado (inteiro, ou o trecho [inicio, fim]). Só o
+        vídeo inteiro entra no arquivo de downloads.
+        """
+        st = os.stat(caminho)
+        checksum = assinatura_arquivo(caminho)
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO arquivos (caminho, video_id, inicio, fim, tamanho, mtime, checksum) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(caminho), video_id, inicio, fim, st.st_size, st.st_mtime, checksum),
+            )
+            self._conexao.commit()
+            if inicio is None and fim is None:
+                self._anotar_download(video_id)
+
+    def _anotar_download(self, video_id):
+        # Mesmo formato do --download-archive do yt-dlp ("youtube <id>")
+        if self._no_arquivo_downloads(video_id):
+            return
+        with open(self.arquivo_downloads, 'a', encoding='utf-8') as f:
+            f.write(f"youtube {video_id}\n")
+
+    def _no_arquivo_downloads(self, video_id):
+        if not os.path.exists(self.arquivo_downloads):
+            return False
+        with open(self.arquivo_downloads, 'r', encoding='utf-8') as f:
+            return any(linha.split()[-1:] == [video_id] for linha in f)
+
+    def no_arquivo_downloads(self, video_id):
+        """True se o ID já está no arquivo de downloads (inclusive de downloads feitos pelo yt-dlp)."""
+        with self._lock:
+            return self._no_arquivo_downloads(video_id)
+
+    # ----- consulta -----
+
+    def _arquivo_valido(self, caminho, tamanho, mtime, checksum):
+        """Confere se o arquivo ainda é o registrado; atualiza o mtime se só ele mudou."""
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            return False
+        if st.st_size != tamanho:
+            return False
+        if st.st_mtime == mtime:
+            return True
+        # mtime mudou (cópia, restore de backup...): decide pelo conteúdo
+        if assinatura_arquivo(caminho) != checksum:
+            return False
+        self._conexao.execute("UPDATE arquivos SET mtime = ? WHERE caminho = ?", (st.st_mtime, caminho))
+        self._conexao.commit()
+        return True
+
+    def buscar(self, video_id):
+        """
+        Retorna a MidiaBaixada registrada para o ID (com a legenda, sem vídeo)
+        ou None. Se a legenda sumiu, o registro não serve e retorna None.
+        """
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT url, titulo, duracao, formato, legenda_path, idiomas FROM midias WHERE video_id = ?",
+                (video_id,),
+            ).fetchone()
+        if not linha:
+            return None
+        url, titulo, duracao, formato, legenda_path, idiomas = linha
+        if not legenda_path or not os.path.exists(legenda_path):
+            return None
+        return MidiaBaixada(
+            video_id, url, titulo, legenda_path=legenda_path, duracao=duracao,
+            formato=formato, idiomas=json.loads(idiomas) if idiomas else [],
+        )
+
+    def buscar_video(self, video_id, inicio=None, fim=None):
+        """
+        Procura um vídeo já baixado do ID que cubra [inicio, fim] (ou o vídeo
+        inteiro, se não for dado intervalo). Prefere o vídeo inteiro; senão o
+        menor trecho que contém o intervalo. Retorna (caminho, trecho) — trecho
+        é None para o vídeo inteiro — ou None. Entradas cujo arquivo sumiu ou
+        mudou são removidas.
+        """
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT caminho, inicio, fim, tamanho, mtime, checksum FROM arquivos WHERE video_id = ? "
+                "ORDER BY inicio IS NOT NULL, fim - inicio",
+                (video_id,),
+            ).fetchall()
+
+            for caminho, ini, fi, tamanho, mtime, checksum in linhas:
+                if not self._arquivo_valido(caminho, tamanho, mtime, checksum):
+                    self._conexao.execute("DELETE FROM arquivos WHERE caminho = ?", (caminho,))
+                    self._conexao.commit()
+                    continue
+                if ini is None:
+                    return caminho, None
+                if inicio is not None and ini <= inicio and fim is not None and fim <= fi:
+                    return caminho, (ini, fi)
+        return None
+
+    def verificar(self):
+        """Revalida todos os arquivos do índice; retorna os caminhos removidos por estarem velhos."""
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT caminho, tamanho, mtime, checksum FROM arquivos"
+            ).fetchall()
+            removidos = []
+            for caminho, tamanho, mtime, checksum in linhas:
+                if not self._arquivo_valido(caminho, tamanho, mtime, checksum):
+                    removidos.append(caminho)
+            self._conexao.executemany("DELETE FROM arquivos WHERE caminho = ?", [(c,) for c in removidos])
+            self._conexao.commit()
+        return removidos
+
+
+_bibliotecas = {}
+_lock_bibliotecas = threading.Lock()
+
+
+def obter_biblioteca(pasta):
+    """Biblioteca compartilhada pelo processo para uma pasta de vídeos."""
+    pasta = os.path.abspath(pasta)
+    with _lock_bibliotecas:
+        if pasta not in _bibliotecas:
+            _bibliotecas[pasta] = BibliotecaMidia(pasta)
+        return _bibliotecas[pasta]
@@ -0,0 +1,231 @@
+"""
+Linha de comando do YouTube Cutter (sem interface gráfica).
+
+Exemplos:
+    python cli.py processar --url https://youtu.be/... --cortes-arquivo cortes.txt
+    python cli.py processar --video aula.mp4 --legenda aula.srt --modo auto
+    python cli.py processar --video aula.mp4 --legenda aula.srt --modo auto --previa
+    python cli.py aprovar ~/.cache/youtube-cutter/previas/aula corte_01 corte_03
+    python cli.py processar --video aula.mp4 --legenda aula.srt --modo auto --shorts
+    python cli.py lote manifesto.json --concorrencia 2
+    python cli.py planejar legendas/*.srt --arquivo planos.json
+    python cli.py servir --porta 8765 --trabalhadores 2
+"""
+import sys
+import json
+import argparse
+
+from pipeline import (
+    MODOS_CORTE, TAMANHO_FILA_ETAPAS, processar, processar_lote, carregar_manifesto, ler_arquivo_cortes,
+    aprovar_previa,
+)
+from renderizacao import MODOS_RENDER, FORMATO_SHORTS
+from download import MOTORES_DOWNLOAD
+from embeddings import NOME_MODELO
+from semantica import MOTORES, MOTOR_TEXTTILING, planejar_cortes_em_lote
+from encoders import PERFIS, perfil_para_host
+
+
+def _adicionar_opcoes_render(parser):
+    parser.add_argument("--saida", help="Pasta de saída dos cortes (padrão: PASTA_CORTES do .env)")
+    parser.add_argument("--modo-render", choices=MODOS_RENDER, help="Modo de renderização (padrão: MODO_RENDER do .env)")
+    parser.add_argument("--perfil", choices=PERFIS, help="Perfil de velocidade/qualidade do encode")
+    parser.add_argument("--encoder", help="Encoder de vídeo preferido (ex.: libx264, h264_nvenc)")
+    parser.add_argument("--jobs-cpu", type=int, help="Máximo de ffmpeg simultâneos com encoder de CPU")
+    parser.add_argument("--jobs-hw", type=int, help="Máximo de sessões simultâneas de encoder de hardware")
+    parser.add_argument("--refazer", action="store_true",
+                        help="Renderiza todos os cortes de novo, mesmo os que já estão prontos e sem mudanças")
+    silencio = parser.add_mutually_exclusive_group()
+    silencio.add_argument("--ajuste-silencio", action="store_true",
+                          help="Move também os cortes digitados para a pausa mais próxima no áudio")
+    silencio.add_argument("--sem-ajuste-silencio", action="store_true",
+                          help="Mantém os pontos de corte exatos, sem procurar a pausa mais próxima no áudio")
+    parser.add_argument("--janela-silencio", type=float,
+                        help="Segundos antes/depois de cada ponto em que a pausa é procurada (padrão: JANELA_SILENCIO do .env)")
+    parser.add_argument("--shorts", action="store_true",
+                        help="Cortes verticais 1080x1920 para Shorts, com duração máxima (padrão: FORMATO_SAIDA do .env)")
+    parser.add_argument("--posicao-shorts", type=float,
+                        help="Posição horizontal do recorte vertical: 0 (esquerda) a 1 (direita); padrão 0.5")
+    parser.add_argument("--duracao-shorts", type=float,
+                        help="Duração máxima de cada Short em segundos (padrão: DURACAO_MAXIMA_SHORTS do .env)")
+    parser.add_argument("--perfilar", action="store_true",
+                        help="Roda as etapas sob o cProfile e inclui as funções mais caras no relatório de métricas")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado final em JSON")
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Cortes de vídeo do YouTube sem interface gráfica.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("processar", help="Processa um vídeo (YouTube ou arquivos locais)")
+    fonte = p.add_mutually_exclusive_group(required=True)
+    fonte.add_argument("--url", help="Link do vídeo no YouTube")
+    fonte.add_argument("--video", help="Arquivo de vídeo local (exige --legenda)")
+    p.add_argument("--legenda", help="Arquivo de transcrição SRT ou WebVTT local")
+    p.add_argument("--pasta-videos", help="Pasta de download (padrão: PASTA_VIDEOS do .env)")
+    p.add_argument("--video-inteiro", action="store_true", help="Baixa o vídeo inteiro em vez de só o trecho dos cortes")
+    p.add_argument("--motor-download", choices=MOTORES_DOWNLOAD,
+                   help="Motor de download (padrão: MOTOR_DOWNLOAD do .env)")
+    p.add_argument("--modo", choices=MODOS_CORTE, default="manual", help="Cortes manuais ou automáticos por IA")
+    p.add_argument("--cortes-arquivo", help="Arquivo com um corte por linha: HH:MM:SS - Descrição")
+    p.add_argument("--corte", action="append", default=[], help="Um corte (pode repetir): 'HH:MM:SS - Descrição'")
+    p.add_argument("--previa", action="store_true",
+                   help="Renderiza prévias rápidas em baixa resolução (PASTA_PREVIAS) para aprovar depois")
+    _adicionar_opcoes_render(p)
+
+    a = sub.add_parser("aprovar", help="Renderiza em qualidade final os cortes aprovados de uma prévia")
+    a.add_argument("pasta_previa", help="Pasta da prévia (mostrada ao final do processar --previa)")
+    a.add_argument("cortes", nargs="*", help="Nomes dos cortes aprovados (padrão: todos)")
+    _adicionar_opcoes_render(a)
+
+    l = sub.add_parser("lote", help="Processa um manifesto JSON/CSV com vários vídeos")
+    l.add_argument("manifesto", help="Arquivo .json ou .csv com os jobs")
+    l.add_argument("--concorrencia", type=int, help="Vídeos simultâneos em cada etapa (padrão: limites de cada etapa)")
+    l.add_argument("--downloads", type=int, help="Downloads simultâneos (etapa de download)")
+    l.add_argument("--renders", type=int, help="Vídeos renderizando ao mesmo tempo (etapa de renderização)")
+    l.add_argument("--fila", type=int, default=TAMANHO_FILA_ETAPAS, help="Vídeos esperando entre uma etapa e a próxima")
+    l.add_argument("--pasta-videos", help="Pasta de download (padrão: PASTA_VIDEOS do .env)")
+    l.add_argument("--video-inteiro", action="store_true", help="Baixa o vídeo inteiro em vez de só o trecho dos cortes")
+    l.add_argument("--motor-download", choices=MOTORES_DOWNLOAD,
+                   help="Motor de download (padrão: MOTOR_DOWNLOAD do .env)")
+    l.add_argument("--pular-baixados", action="store_true",
+                   help="Ignora vídeos que já estão no arquivo de downloads da pasta de vídeos "
+                        "(que também vai para o yt-dlp como --download-archive)")
+    l.add_argument("--previa", action="store_true", help="Renderiza prévias em baixa resolução de todos os jobs")
+    _adicionar_opcoes_render(l)
+
+    pl = sub.add_parser("planejar", help="Planeja cortes automáticos (IA) de várias transcrições de uma vez")
+    pl.add_argument("legendas", nargs="+", help="Arquivos SRT/WebVTT")
+    pl.add_argument("--motor", choices=MOTORES, default=MOTOR_TEXTTILING, help="Motor de segmentação")
+    pl.add_argument("--processos", type=int,
+                    help="Processos para leitura e segmentação (padrão: um por CPU; o encode é um só)")
+    pl.add_argument("--modelo", default=NOME_MODELO, help="Modelo de embeddings (nome ou pasta local)")
+    pl.add_argument("--arquivo", help="Grava os planos num manifesto JSON (padrão: imprime na saída)")
+
+    s = sub.add_parser("servir", help="Sobe o serviço HTTP local de jobs (veja servico.py)")
+    s.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: só esta máquina)")
+    s.add_argument("--porta", type=int, default=8765)
+    s.add_argument("--trabalhadores", type=int, default=1, help="Jobs executados ao mesmo tempo")
+    s.add_argument("--fila", help="Arquivo SQLite da fila de jobs (padrão: servico.sqlite em PASTA_CACHE)")
+    s.add_argument("--sem-aquecer", action="store_true",
+                   help="Não carrega o modelo de IA nem testa os encoders ao subir (só no primeiro job)")
+    s.add_argument("--pasta-videos", help="Pasta de download (padrão: PASTA_VIDEOS do .env)")
+    s.add_argument("--video-inteiro", action="store_true", help="Baixa o vídeo inteiro em vez de só o trecho dos cortes")
+    s.add_argument("--motor-download", choices=MOTORES_DOWNLOAD,
+                   help="Motor de download (padrão: MOTOR_DOWNLOAD do .env)")
+    _adicionar_opcoes_render(s)
+
+    return parser
+
+
+def _opcoes_render(args):
+    perfil = None
+    if args.perfil or args.encoder:
+        perfil = perfil_para_host(args.perfil or "qualidade", preferido=args.encoder)
+    return {
+        'modo_render': args.modo_render,
+        'perfil': perfil,
+        'max_jobs_cpu': args.jobs_cpu,
+        'max_jobs_hw': args.jobs_hw,
+        'pasta_videos': getattr(args, 'pasta_videos', None),
+        'baixar_so_trechos': False if getattr(args, 'video_inteiro', False) else None,
+        'motor_download': getattr(args, 'motor_download', None),
+        'retomar': not args.refazer,
+        'perfilar': True if args.perfilar else None,
+        'ajustar_ao_silencio': False if args.sem_ajuste_silencio else (True if args.ajuste_silencio else None),
+        'janela_silencio': args.janela_silencio,
+        'previa': getattr(args, 'previa', False),
+        'formato': FORMATO_SHORTS if args.shorts else None,
+        'posicao_shorts': args.posicao_shorts,
+        'duracao_maxima_shorts': args.duracao_shorts,
+    }
+
+
+def main(argv=None):
+    parser = _criar_parser()
+    args = parser.parse_args(argv)
+    if args.comando == "planejar":
+        # Log na saída de erro: a saída padrão pode ser o próprio manifesto
+        logar = (lambda msg: print(msg, file=sys.stderr))
+        logar(f"🤖 Planejando {len(args.legendas)} transcrições em lote...")
+        planos = planejar_cortes_em_lote(args.legendas, logar=logar, motor=args.motor,
+                                         processos=args.processos, nome_modelo=args.modelo)
+        # Mesmo formato do manifesto de lote: basta acrescentar "video" ou "url"
+        jobs = [
+            {'legenda': legenda, 'plano': plano.para_dict()['cortes']} if plano else
+            {'legenda': legenda, 'erro': "Poucos pontos de corte."}
+            for legenda, plano in zip(args.legendas, planos)
+        ]
+        texto = json.dumps({'jobs': jobs}, ensure_ascii=False, indent=2)
+        if args.arquivo:
+            with open(args.arquivo, 'w', encoding='utf-8') as f:
+                f.write(texto)
+            logar(f"✅ Planos salvos em {args.arquivo}")
+        else:
+            print(texto)
+        return 0 if all(planos) else 1
+
+    logar = (lambda msg: print(msg, file=sys.stderr)) if args.json else print
+
+    if args.comando == "servir":
+        # Importado aqui: só o serviço precisa do http.server
+        from servico import servir
+        servir(
+            host=args.host, porta=args.porta, trabalhadores=args.trabalhadores, fila=args.fila,
+            pasta_saida=args.saida, aquecer=not args.sem_aquecer, **_opcoes_render(args),
+        )
+        return 0
+
+    if args.comando == "processar":
+        if args.video and not args.legenda:
+            parser.error("--video exige --legenda")
+
+        cortes_raw = list(args.corte)
+        if args.cortes_arquivo:
+            cortes_raw += ler_arquivo_cortes(args.cortes_arquivo)
+
+        try:
+            resultado = processar(
+                url=args.url, video_path=args.video, legenda_path=args.legenda,
+                modo=args.modo, cortes_raw=cortes_raw, pasta_saida=args.saida,
+                logar=logar, **_opcoes_render(args),
+            )
+        except ValueError as e:
+            logar(f"⚠️ {e}")
+            return 2
+        resultados = [resultado]
+    elif args.comando == "aprovar":
+        opcoes = _opcoes_render(args)
+        # Vídeo e tempos são os da prévia: sem download nem novo ajuste ao silêncio
+        for chave in ('pasta_videos', 'baixar_so_trechos', 'ajustar_ao_silencio', 'janela_silencio', 'previa'):
+            opcoes.pop(chave)
+        try:
+            resultado = aprovar_previa(args.pasta_previa, args.cortes or None, pasta_saida=args.saida,
+                                       logar=logar, **opcoes)
+        except ValueError as e:
+            logar(f"⚠️ {e}")
+            return 2
+        resultados = [resultado]
+    else:
+        jobs = carregar_manifesto(args.manifesto, pasta_videos=args.pasta_videos, pular_baixados=args.pular_baixados)
+        limites = {}
+        if args.downloads:
+            limites['download'] = limites['video'] = args.downloads
+        if args.renders:
+            limites['render'] = args.renders
+        resultados = processar_lote(
+            jobs, concorrencia=args.concorrencia, limites=limites, tamanho_fila=args.fila,
+            pasta_saida=args.saida, logar=logar, usar_arquivo_downloads=args.pular_baixados,
+            **_opcoes_render(args),
+        )
+        ok = sum(1 for r in resultados if r.ok)
+        logar(f"📊 Lote finalizado: {ok} de {len(resultados)} vídeos sem erros.")
+
+    if args.json:
+        print(json.dumps([r.para_dict() for r in resultados], ensure_ascii=False, indent=2))
+
+    return 0 if all(r.ok for r in resultados) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import os
+from dotenv import load_dotenv
+
+# ================= CONFIG ===================
+
+load_dotenv()  # Carrega as variáveis do arquivo .env
+
+PASTA_VIDEOS = os.getenv("PASTA_VIDEOS")
+PASTA_CORTES = os.getenv("PASTA_CORTES")
+MODO_RENDER = os.getenv("MODO_RENDER") or "paralelo"
+
+# Formato dos cortes: "original" (resolução e proporção da fonte) ou "shorts" (vertical 1080x1920)
+FORMATO_SAIDA = os.getenv("FORMATO_SAIDA") or "original"
+# Shorts: posição horizontal do recorte 9:16 no quadro (0 = esquerda, 0.5 = centro, 1 = direita)
+POSICAO_SHORTS = float(os.getenv("POSICAO_SHORTS") or 0.5)
+# Shorts: duração máxima de cada corte (s); cortes maiores são divididos no planejamento
+DURACAO_MAXIMA_SHORTS = float(os.getenv("DURACAO_MAXIMA_SHORTS") or 60)
+
+# Encoder de vídeo forçado (ex.: "libx264"); vazio = detecção automática
+ENCODER = os.getenv("ENCODER") or None
+# Perfil de velocidade/qualidade do encode: "rapido", "equilibrado" ou "qualidade"
+PERFIL_ENCODE = os.getenv("PERFIL_ENCODE") or "qualidade"
+# Dispositivo usado pelos encoders VAAPI
+DISPOSITIVO_VAAPI = os.getenv("DISPOSITIVO_VAAPI") or "/dev/dri/renderD128"
+
+# Baixa só o trecho do vídeo que contém os cortes (legenda primeiro, vídeo depois).
+# "0" volta a baixar o vídeo inteiro antes de planejar os cortes
+BAIXAR_SO_TRECHOS = os.getenv("BAIXAR_SO_TRECHOS", "1").lower() not in ("0", "false", "nao", "não")
+# Segundos extras baixados antes do primeiro e depois do último corte
+MARGEM_TRECHO = float(os.getenv("MARGEM_TRECHO") or 5)
+
+# Motor de download: "simples" (um stream progressivo, sem DASH/HLS), "paralelo"
+# (DASH/HLS com fragmentos simultâneos) ou "externo" (DOWNLOADER_EXTERNO, ex.: aria2c)
+MOTOR_DOWNLOAD = os.getenv("MOTOR_DOWNLOAD") or "simples"
+# Fragmentos baixados ao mesmo tempo (ou conexões por arquivo no downloader externo)
+CONEXOES_DOWNLOAD = int(os.getenv("CONEXOES_DOWNLOAD") or 8)
+# Tamanho (MB) de cada pedaço dos streams progressivos no motor paralelo
+TAMANHO_PEDACO_DOWNLOAD_MB = float(os.getenv("TAMANHO_PEDACO_DOWNLOAD_MB") or 10)
+DOWNLOADER_EXTERNO = os.getenv("DOWNLOADER_EXTERNO") or "aria2c"
+# Tentativas por requisição/fragmento; a espera entre elas dobra (1, 2, 4... até 30 s)
+TENTATIVAS_DOWNLOAD = int(os.getenv("TENTATIVAS_DOWNLOAD") or 10)
+# Banda total (MB/s) somando todos os downloads do processo; 0 = sem limite
+LIMITE_BANDA_MB = float(os.getenv("LIMITE_BANDA_MB") or 0)
+# Downloads de vídeo ao mesmo tempo no processo, somando todos os jobs; 0 = sem limite
+DOWNLOADS_SIMULTANEOS = int(os.getenv("DOWNLOADS_SIMULTANEOS") or 0) or None
+
+# Move pontos de corte para a pausa mais próxima no áudio: "auto" (padrão) só nos
+# cortes automáticos (IA e divisões), "1" também nos digitados, "0" em nenhum
+AJUSTAR_AO_SILENCIO = (os.getenv("AJUSTAR_AO_SILENCIO") or "auto").lower()
+AJUSTAR_AO_SILENCIO = "auto" if AJUSTAR_AO_SILENCIO == "auto" else AJUSTAR_AO_SILENCIO in ("1", "true", "sim")
+# Até quantos segundos antes ou depois do ponto digitado/detectado procurar a pausa
+JANELA_SILENCIO = float(os.getenv("JANELA_SILENCIO") or 2)
+
+# Carrega o modelo de IA em segundo plano assim que a janela abre ("1" para ativar)
+AQUECER_MODELO = os.getenv("AQUECER_MODELO", "").lower() in ("1", "true", "sim")
+
+# Inferência do modelo de IA: "padrao" (fp32, GPU se houver), "cpu" ou "cpu_int8" (CPU quantizado)
+MODO_INFERENCIA = os.getenv("MODO_INFERENCIA") or "padrao"
+# Threads intra-op do PyTorch na inferência (vazio = padrão do PyTorch)
+THREADS_INFERENCIA = int(os.getenv("THREADS_INFERENCIA") or 0) or None
+
+# Roda cada etapa dos jobs sob o cProfile e inclui as funções mais caras no relatório ("1" para ativar)
+PERFILAR = os.getenv("PERFILAR", "").lower() in ("1", "true", "sim")
+
+# Tamanho máximo do cache de embeddings em disco (MB); os menos usados são removidos
+CACHE_EMBEDDINGS_MB = int(os.getenv("CACHE_EMBEDDINGS_MB") or 256)
+
+# Pasta para caches persistentes (probe de encoders, embeddings etc.)
+PASTA_CACHE = os.getenv("PASTA_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "youtube-cutter")
+
+# Prévias de baixa resolução (--previa): pasta e altura em pixels
+PASTA_PREVIAS = os.getenv("PASTA_PREVIAS") or os.path.join(PASTA_CACHE, "previas")
+ALTURA_PREVIA = int(os.getenv("ALTURA_PREVIA") or 360)
+
+
+def caminho_cache(nome):
+    """Caminho de um arquivo dentro de PASTA_CACHE (cria a pasta se preciso)."""
+    os.makedirs(PASTA_CACHE, exist_ok=True)
+    return os.path.join(PASTA_CACHE, nome)
@@ -0,0 +1,287 @@
+import re
+import math
+import json
+
+# ================= UTILITÁRIOS ==============
+def timestamp_to_seconds(t):
+    """
+    Converte "HH:MM:SS", "MM:SS" ou "SS" em segundos. A última parte pode ter
+    fração ("08:45.500" ou "08:45,500"); nesse caso o retorno é float.
+    """
+    try:
+        # Remove espaços e divide por ":"
+        t_clean = t.strip()
+        parts = t_clean.split(":")
+        
+        # Converte para números, ignorando texto extra
+        num_parts = []
+        for part in parts[:-1]:
+            # Remove qualquer texto não numérico da parte
+            clean_part = ''.join(filter(str.isdigit, part))
+            num_parts.append(int(clean_part) if clean_part else 0)
+        clean_part = ''.join(c for c in parts[-1].replace(',', '.') if c.isdigit() or c == '.')
+        if '.' in clean_part.strip('.'):
+            num_parts.append(float(clean_part))
+        else:
+            clean_part = clean_part.replace('.', '')
+            num_parts.append(int(clean_part) if clean_part else 0)
+        
+        if len(num_parts) == 2:
+            minutos, segundos = num_parts
+            return minutos * 60 + segundos
+        elif len(num_parts) == 3:
+            horas, minutos, segundos = num_parts
+            return horas * 3600 + minutos * 60 + segundos
+        elif len(num_parts) == 1:
+            # Apenas segundos
+            return num_parts[0]
+        else:
+            raise ValueError(f"Formato de tempo inválido: {t}")
+    except Exception as e:
+        raise ValueError(f"Não foi possível converter '{t}' para segundos: {e}")
+
+def segundos_para_timestamp(segundos):
+    """Formata segundos como H:MM:SS, com milissegundos (H:MM:SS.mmm) se houver fração."""
+    ms = int(round(segundos * 1000))
+    horas, ms = divmod(ms, 3600000)
+    minutos, ms = divmod(ms, 60000)
+    seg, ms = divmod(ms, 1000)
+    texto = f"{horas}:{minutos:02d}:{seg:02d}"
+    return f"{texto}.{ms:03d}" if ms else texto
+
+# ================= CORTES ==============
+# Duração máxima de uma parte nos cortes automáticos (12 min)
+DURACAO_MAXIMA_CORTE = 720
+# Sobra menor que isso depois da divisão é juntada à parte anterior
+DURACAO_MINIMA_SOBRA = 60
+
+def validar_e_ajustar_cortes(pontos, duracao_maxima=DURACAO_MAXIMA_CORTE):
+    """Apenas para cortes automáticos - limita em 12 minutos. Recebe e retorna pontos em segundos."""
+    pontos_ajustados = [pontos[0]]  # Sempre mantém o primeiro corte
+
+    for tempo_atual in pontos[1:]:
+        tempo_anterior = pontos_ajustados[-1]
+        duracao = tempo_atual - tempo_anterior
+
+        if duracao > duracao_maxima:
+            pontos_ajustados.append(tempo_anterior + duracao_maxima)
+
+            tempo_restante = tempo_atual - (tempo_anterior + duracao_maxima)
+            if tempo_restante > duracao_maxima:
+                segmentos_extras = int(tempo_restante // duracao_maxima)
+                for j in range(1, segmentos_extras + 1):
+                    pontos_ajustados.append(tempo_anterior + duracao_maxima + (j * duracao_maxima))
+
+            if tempo_restante > DURACAO_MINIMA_SOBRA:
+                pontos_ajustados.append(tempo_atual)
+        else:
+            pontos_ajustados.append(tempo_atual)
+
+    return pontos_ajustados
+
+def ler_pontos_manuais(cortes_raw):
+    """
+    Lê as linhas "HH:MM:SS - Descrição" da caixa de texto (sem limitações de
+    duração). Retorna [(segundos, descricao)] na ordem digitada; linhas com
+    tempo inválido são ignoradas com aviso.
+    """
+    pontos = []
+    for c in cortes_raw:
+        c = c.strip()
+        if not c:
+            continue
+        if " - " in c:
+            tempo, descricao = c.split(" - ", 1)
+        else:
+            tempo, descricao = c, ""
+        try:
+            pontos.append((float(timestamp_to_seconds(tempo.strip())), descricao.strip()))
+        except ValueError as e:
+            print(f"⚠️ Ignorando timestamp inválido: '{tempo.strip()}' - {e}")
+    return pontos
+
+
+# ================= PLANO DE CORTES ==============
+
+class Corte:
+    """Uma parte do vídeo: início e fim em segundos, descrição e nome do arquivo de saída (sem extensão)."""
+
+    __slots__ = ('inicio', 'fim', 'descricao', 'nome')
+
+    def __init__(self, inicio, fim, descricao="", nome=None):
+        self.inicio = float(inicio)
+        self.fim = float(fim)
+        self.descricao = descricao or ""
+        self.nome = nome
+
+    @property
+    def duracao(self):
+        return self.fim - self.inicio
+
+    def deslocado(self, delta):
+        return Corte(self.inicio + delta, self.fim + delta, self.descricao, self.nome)
+
+    def para_dict(self):
+        return {'inicio': self.inicio, 'fim': self.fim, 'descricao': self.descricao, 'nome': self.nome}
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(dados['inicio'], dados['fim'], dados.get('descricao', ""), dados.get('nome'))
+
+    def __eq__(self, outro):
+        return isinstance(outro, Corte) and self.para_dict() == outro.para_dict()
+
+    def __repr__(self):
+        return (f"Corte({segundos_para_timestamp(self.inicio)} → {segundos_para_timestamp(self.fim)}, "
+                f"{self.nome!r})")
+
+
+class PlanoCortes:
+    """
+    Os cortes de um vídeo, do planejamento até o ffmpeg. Os tempos ficam em
+    segundos (float, sem perder milissegundos) e o plano é ordenado e
+    validado uma vez, na criação: cada corte tem fim depois do início, os
+    cortes não se sobrepõem e todos têm um nome de arquivo único.
+    """
+
+    __slots__ = ('cortes',)
+
+    def __init__(self, cortes):
+        cortes = sorted(cortes, key=lambda c: (c.inicio, c.fim))
+        if not cortes:
+            raise ValueError("O plano precisa de pelo menos um corte.")
+
+        nomes = set()
+        for i, corte in enumerate(cortes):
+            if corte.inicio < 0 or corte.fim <= corte.inicio:
+                raise ValueError(f"Corte inválido: {segundos_para_timestamp(max(corte.inicio, 0))} → "
+                                 f"{segundos_para_timestamp(max(corte.fim, 0))}")
+            if i and corte.inicio < cortes[i - 1].fim:
+                raise ValueError(f"Cortes sobrepostos em {segundos_para_timestamp(corte.inicio)}")
+            if not corte.nome:
+                corte.nome = f"corte_{i+1:02d}"
+            # Duas descrições iguais não podem gravar no mesmo arquivo
+            nome, n = corte.nome, 2
+            while nome in nomes:
+                nome = f"{corte.nome}_{n}"
+                n += 1
+            corte.nome = nome
+            nomes.add(nome)
+        self.cortes = tuple(cortes)
+
+    @classmethod
+    def de_pontos(cls, pontos, descricoes=None):
+        """
+        Plano com as partes entre pontos consecutivos (em segundos).
+        descricoes, alinhadas aos pontos, dão nome às partes: a parte i usa
+        a descrição do ponto i+1, como no formato da caixa de texto.
+        """
+        if len(pontos) < 2:
+            raise ValueError("É necessário pelo menos 2 timestamps válidos para fazer cortes")
+        pares = sorted(zip(pontos, descricoes or [""] * len(pontos)), key=lambda p: p[0])
+        cortes = []
+        for (inicio, _), (fim, descricao) in zip(pares, pares[1:]):
+            if fim <= inicio:
+                continue  # pontos repetidos
+            nome = sanitizar_nome_arquivo(descricao) if descricao else None
+            cortes.append(Corte(inicio, fim, descricao, nome))
+        return cls(cortes)
+
+    @classmethod
+    def de_texto(cls, cortes_raw):
+        """Plano a partir das linhas "HH:MM:SS - Descrição" (cortes manuais)."""
+        pontos = ler_pontos_manuais(cortes_raw)
+        if len(pontos) < 2:
+            raise ValueError("É necessário pelo menos 2 timestamps válidos para fazer cortes")
+        return cls.de_pontos([p[0] for p in pontos], [p[1] for p in pontos])
+
+    def __len__(self):
+        return len(self.cortes)
+
+    def __iter__(self):
+        return iter(self.cortes)
+
+    def __getitem__(self, indice):
+        return self.cortes[indice]
+
+    @property
+    def inicio(self):
+        return self.cortes[0].inicio
+
+    @property
+    def fim(self):
+        return self.cortes[-1].fim
+
+    def deslocado(self, delta):
+        """Mesmo plano com todos os tempos somados a delta (ex.: vídeo baixado só de um trecho)."""
+        # Deslocar não muda ordem, durações nem nomes: não precisa validar de novo
+        plano = object.__new__(PlanoCortes)
+        plano.cortes = tuple(c.deslocado(delta) for c in self.cortes)
+        return plano
+
+    def dividido(self, duracao_maxima):
+        """
+        Plano em que cortes mais longos que duracao_maxima viram partes
+        iguais (o menor número de partes que cabe no limite). Os nomes
+        voltam ao nome base (sem o _2, _3... de descrições repetidas) e são
+        numerados de novo em ordem, então as partes de "A_2" não viram
+        "A_2_2". Os tempos dos cortes que cabem no limite não mudam.
+        """
+        if all(c.duracao <= duracao_maxima for c in self.cortes):
+            return self
+        cortes = []
+        for c in self.cortes:
+            nome = _nome_base(c)
+            partes = max(1, math.ceil(round(c.duracao / duracao_maxima, 6)))
+            passo = c.duracao / partes
+            for i in range(partes):
+                fim = c.fim if i == partes - 1 else round(c.inicio + (i + 1) * passo, 3)
+                cortes.append(Corte(round(c.inicio + i * passo, 3), fim, c.descricao, nome))
+        return PlanoCortes(cortes)
+
+    def aparado(self, duracao_maxima):
+        """Plano com o fim de cada corte puxado para que nenhum passe de duracao_maxima."""
+        if all(c.duracao <= duracao_maxima for c in self.cortes):
+            return self
+        return PlanoCortes([
+            Corte(c.inicio, min(c.fim, round(c.inicio + duracao_maxima, 3)), c.descricao, c.nome)
+            for c in self.cortes
+        ])
+
+    def para_dict(self):
+        return {'cortes': [c.para_dict() for c in self.cortes]}
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls([Corte.de_dict(c) for c in dados['cortes']])
+
+    def para_json(self, **opcoes):
+        return json.dumps(self.para_dict(), ensure_ascii=False, **opcoes)
+
+    @classmethod
+    def de_json(cls, texto):
+        return cls.de_dict(json.loads(texto))
+
+    def __repr__(self):
+        return f"PlanoCortes({list(self.cortes)!r})"
+
+def _nome_base(corte):
+    """Nome do corte sem o sufixo _N que o PlanoCortes acrescenta a descrições repetidas."""
+    if corte.descricao:
+        base = sanitizar_nome_arquivo(corte.descricao)
+        if re.fullmatch(re.escape(base) + r'(_\d+)?', corte.nome or ''):
+            return base
+    return corte.nome
+
+def sanitizar_nome_arquivo(nome):
+    """Remove caracteres inválidos para nomes de arquivo"""
+    # Remove ou substitui caracteres problemáticos
+    nome = re.sub(r'[<>:"/\\|?*]', '', nome)  # Remove caracteres inválidos
+    nome = re.sub(r'\s+', '_', nome)  # Substitui espaços por underscore
+    nome = nome.strip('._')  # Remove pontos e underscores do início/fim
+    
+    # Limita o comprimento do nome
+    if len(nome) > 50:
+        nome = nome[:47] + "..."
+    
+    return nome if nome else "sem_nome"
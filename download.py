@@ -0,0 +1,324 @@
+import os
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+
+from config import (
+    MOTOR_DOWNLOAD, CONEXOES_DOWNLOAD, TAMANHO_PEDACO_DOWNLOAD_MB, DOWNLOADER_EXTERNO,
+    TENTATIVAS_DOWNLOAD, LIMITE_BANDA_MB, DOWNLOADS_SIMULTANEOS,
+)
+
+# ================= DOWNLOAD (YouTube) ==============
+
+IDIOMAS_LEGENDA = ['.pt', '.pt-BR', '.en', '.en-US']
+
+# ================= MOTOR DE DOWNLOAD ==============
+# "simples" (padrão): um stream progressivo por vídeo, sem HLS/DASH
+# "paralelo": libera DASH/HLS e baixa CONEXOES_DOWNLOAD fragmentos ao mesmo
+#   tempo; streams progressivos vão em pedaços (Range) pela mesma conexão,
+#   que o yt-dlp reaproveita entre requisições
+# "externo": entrega o arquivo ao DOWNLOADER_EXTERNO (aria2c: várias
+#   conexões por arquivo); sem ele instalado, cai no "paralelo"
+MOTOR_SIMPLES = "simples"
+MOTOR_PARALELO = "paralelo"
+MOTOR_EXTERNO = "externo"
+MOTORES_DOWNLOAD = (MOTOR_SIMPLES, MOTOR_PARALELO, MOTOR_EXTERNO)
+
+# Espera máxima (s) entre tentativas; antes disso ela dobra a cada falha (1, 2, 4...)
+ESPERA_MAXIMA_TENTATIVA = 30
+
+
+def _espera_tentativa(n):
+    return min(ESPERA_MAXIMA_TENTATIVA, 2 ** n)
+
+
+def opcoes_motor(motor=None, conexoes=None, logar=print):
+    """
+    Opções do yt-dlp para o motor de download (MOTOR_DOWNLOAD por padrão):
+    formatos liberados, paralelismo, downloader externo e tentativas com
+    espera exponencial. Não inclui destino, legendas nem progress_hooks.
+    logar recebe o aviso quando o downloader externo não está instalado.
+    """
+    motor = motor or MOTOR_DOWNLOAD
+    if motor not in MOTORES_DOWNLOAD:
+        raise ValueError(f"Motor de download inválido: {motor} (use {', '.join(MOTORES_DOWNLOAD)})")
+    conexoes = max(1, conexoes or CONEXOES_DOWNLOAD)
+    if motor == MOTOR_EXTERNO and not shutil.which(DOWNLOADER_EXTERNO):
+        logar(f"⚠️ {DOWNLOADER_EXTERNO} não encontrado; usando o motor de download paralelo.")
+        motor = MOTOR_PARALELO
+
+    opcoes = {
+        'retries': TENTATIVAS_DOWNLOAD,
+        'fragment_retries': TENTATIVAS_DOWNLOAD,
+        'retry_sleep_functions': {'http': _espera_tentativa, 'fragment': _espera_tentativa},
+        'extractor_args': {'youtube': {'player_skip': ['configs']}},
+    }
+    if motor == MOTOR_SIMPLES:
+        # Só formatos progressivos, como antes dos motores de download
+        opcoes['extractor_args']['youtube']['skip'] = ['hls', 'dash']
+        return opcoes
+
+    opcoes['concurrent_fragment_downloads'] = conexoes
+    if motor == MOTOR_PARALELO:
+        opcoes['http_chunk_size'] = int(TAMANHO_PEDACO_DOWNLOAD_MB * 1024 * 1024)
+    else:
+        nome = os.path.splitext(os.path.basename(DOWNLOADER_EXTERNO))[0]
+        opcoes['external_downloader'] = {'default': DOWNLOADER_EXTERNO}
+        if nome == 'aria2c':
+            opcoes['external_downloader_args'] = {'aria2c': [f'-x{conexoes}', f'-s{conexoes}', f'-j{conexoes}']}
+    return opcoes
+
+
+class ControleDownloads:
+    """
+    Limites compartilhados por todos os downloads de mídia do processo
+    (jobs do lote, trabalhadores do serviço, janela): quantos baixam ao
+    mesmo tempo e a banda total em bytes/s. Cada download desconta o que
+    recebeu de um mesmo balde de fichas, no progress_hook do yt-dlp, e a
+    thread que o esvaziou espera: a soma fica no limite mesmo com vários
+    fragmentos e vários jobs em paralelo.
+    """
+
+    def __init__(self, simultaneos=None, banda=None):
+        self.simultaneos = simultaneos or None
+        self.banda = banda or None
+        self._vagas = threading.BoundedSemaphore(self.simultaneos) if self.simultaneos else None
+        self._lock = threading.Lock()
+        self._fichas = float(self.banda or 0)
+        self._ultimo = time.monotonic()
+        self.ativos = 0
+
+    @contextmanager
+    def download(self):
+        """
+        Ocupa uma vaga enquanto o bloco roda (espera se todas estão em uso).
+        Retorna o progress_hook que desconta a banda, ou None sem limite.
+        """
+        if self._vagas:
+            self._vagas.acquire()
+        with self._lock:
+            self.ativos += 1
+        try:
+            yield self._hook_banda() if self.banda else None
+        finally:
+            with self._lock:
+                self.ativos -= 1
+            if self._vagas:
+                self._vagas.release()
+
+    def parcela_banda(self):
+        """Banda de um download que começa agora (divisão igual entre os ativos)."""
+        if not self.banda:
+            return None
+        with self._lock:
+            return int(self.banda / max(1, self.ativos))
+
+    def consumir(self, n):
+        """Desconta n bytes do balde; espera o tempo de reabastecer o que faltou."""
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.banda, self._fichas + (agora - self._ultimo) * self.banda)
+            self._ultimo = agora
+            self._fichas -= n
+            espera = -self._fichas / self.banda if self._fichas < 0 else 0.0
+        if espera > 0:
+            time.sleep(espera)
+
+    def _hook_banda(self):
+        recebidos = {}
+
+        def hook(status):
+            if status.get('status') not in ('downloading', 'finished'):
+                return
+            # 'finished' não traz tmpfilename: a chave é o nome final do formato
+            chave = status.get('filename')
+            atual = status.get('downloaded_bytes') or 0
+            novo = atual - recebidos.get(chave, 0)
+            recebidos[chave] = max(atual, recebidos.get(chave, 0))
+            if novo > 0:
+                self.consumir(novo)
+        return hook
+
+
+_controle = None
+_lock_controle = threading.Lock()
+
+
+def controle_downloads():
+    """ControleDownloads do processo, com DOWNLOADS_SIMULTANEOS e LIMITE_BANDA_MB."""
+    global _controle
+    with _lock_controle:
+        if _controle is None:
+            _controle = ControleDownloads(DOWNLOADS_SIMULTANEOS, int(LIMITE_BANDA_MB * 1024 * 1024))
+        return _controle
+
+
+def baixar_com_limites(url, ydl_opts, controle=None):
+    """
+    extract_info com download dentro dos limites de controle (padrão
+    controle_downloads()): espera uma vaga e, com limite de banda, registra
+    o hook do balde. O balde divide a banda entre os fragmentos do yt-dlp;
+    um downloader externo não passa por ele e recebe só a sua parcela.
+    Retorna (info, caminho do arquivo sem extensão).
+    """
+    from yt_dlp import YoutubeDL
+
+    controle = controle or controle_downloads()
+    with controle.download() as hook_banda:
+        if hook_banda:
+            ydl_opts = dict(ydl_opts, progress_hooks=list(ydl_opts.get('progress_hooks') or []) + [hook_banda])
+            ydl_opts['ratelimit'] = (controle.parcela_banda() if ydl_opts.get('external_downloader')
+                                     else controle.banda)
+        with YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+            if info is None:
+                # O yt-dlp pula (e retorna None) o que já está no download_archive
+                raise ValueError(f"Vídeo já está no arquivo de downloads: {url}")
+            return info, os.path.splitext(ydl.prepare_filename(info))[0]
+
+
+def _opcoes_ydl(pasta_destino, ao_progresso=None, motor=None, logar=print):
+    """Opções comuns a todos os downloads (vídeo, legendas e trechos)."""
+    ydl_opts = {
+        'format': 'bestvideo+bestaudio/best',
+        'outtmpl': os.path.join(pasta_destino, '%(title)s.%(ext)s'),
+        'writesubtitles': True,
+        'writeautomaticsub': True,
+        'subtitleslangs': ['pt', 'en'],
+        # YouTube serve as legendas em VTT; SRT só quando disponível, sem conversão
+        'subtitlesformat': 'srt/vtt/best',
+        'quiet': True,
+        'merge_output_format': 'mp4',
+        'skip_download': False,
+        'no_warnings': True,
+        # Adiciona cookies do Chrome para autenticação
+        'cookiesfrombrowser': ('chrome',),
+    }
+    # Formatos, paralelismo, tentativas e extractor_args (player_skip evita
+    # problemas de impersonation) vêm do motor de download
+    ydl_opts.update(opcoes_motor(motor, logar=logar))
+
+    if ao_progresso:
+        ydl_opts['progress_hooks'] = [ao_progresso]
+    return ydl_opts
+
+
+class MidiaBaixada:
+    """O que um download trouxe: arquivos e metadados usados pela biblioteca."""
+
+    def __init__(self, video_id, url, titulo, video_path=None, legenda_path=None,
+                 duracao=None, formato=None, idiomas=None, trecho=None):
+        self.video_id = video_id
+        self.url = url
+        self.titulo = titulo
+        self.video_path = video_path
+        self.legenda_path = legenda_path
+        self.duracao = duracao
+        self.formato = formato
+        self.idiomas = idiomas or []
+        # (inicio, fim) em segundos quando só um trecho do vídeo foi baixado
+        self.trecho = trecho
+
+
+def _encontrar_legenda(info, base_path):
+    """Caminho da legenda baixada, preferindo pt e depois en."""
+    baixadas = info.get('requested_subtitles') or {}
+    for idioma in IDIOMAS_LEGENDA:
+        caminho = (baixadas.get(idioma.lstrip('.')) or {}).get('filepath')
+        if caminho and os.path.exists(caminho):
+            return caminho
+    for idioma in IDIOMAS_LEGENDA:
+        for formato in ('.srt', '.vtt'):
+            caminho = base_path + idioma + formato
+            if os.path.exists(caminho):
+                return caminho
+    raise FileNotFoundError("Nenhuma legenda .srt ou .vtt encontrada em pt ou en.")
+
+
+def baixar_midia_youtube(url, pasta_destino, ao_progresso=None, so_legendas=False, trecho=None, motor=None,
+                         logar=print, arquivo_downloads=None):
+    """
+    Baixa do YouTube e retorna uma MidiaBaixada.
+      - padrão: vídeo inteiro + legenda (pt ou en)
+      - so_legendas=True: só metadados e legenda (skip_download), o
+        suficiente para planejar os cortes
+      - trecho=(inicio, fim): só esse intervalo do vídeo, sem legenda
+        (download_ranges do yt-dlp; o ffmpeg lê apenas os segmentos do
+        trecho). No arquivo gerado o tempo 0 corresponde a inicio.
+    Os arquivos levam o ID do vídeo no nome, então vídeos com o mesmo
+    título não se sobrescrevem. ao_progresso, se dado, é registrado como
+    progress_hook do yt-dlp (recebe o dicionário de status dele).
+    motor escolhe o motor de download (MOTORES_DOWNLOAD; padrão
+    MOTOR_DOWNLOAD) e logar recebe os avisos dele. Downloads de vídeo
+    respeitam os limites de controle_downloads(), compartilhados com os
+    outros jobs do processo.
+    arquivo_downloads, se dado, vira o download_archive do yt-dlp no
+    download do vídeo inteiro (legendas e trechos não entram nele): um
+    vídeo que já está lá não é baixado de novo (ValueError).
+    """
+    from yt_dlp import YoutubeDL  # import pesado: só quando há download
+
+    if not os.path.exists(pasta_destino):
+        os.makedirs(pasta_destino)
+
+    ydl_opts = _opcoes_ydl(pasta_destino, ao_progresso, motor, logar)
+    ydl_opts['outtmpl'] = os.path.join(pasta_destino, '%(title)s [%(id)s].%(ext)s')
+    if so_legendas:
+        ydl_opts['skip_download'] = True
+    if trecho:
+        from yt_dlp.utils import download_range_func
+
+        inicio, fim = trecho
+        ydl_opts.update({
+            'outtmpl': os.path.join(pasta_destino, f'%(title)s [%(id)s].trecho_{int(inicio)}-{int(fim)}.%(ext)s'),
+            'writesubtitles': False,
+            'writeautomaticsub': False,
+            'download_ranges': download_range_func(None, [(inicio, fim)]),
+        })
+    if arquivo_downloads and not (so_legendas or trecho):
+        ydl_opts['download_archive'] = arquivo_downloads
+
+    if so_legendas:
+        with YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+            base_path = os.path.splitext(ydl.prepare_filename(info))[0]
+    else:
+        info, base_path = baixar_com_limites(url, ydl_opts)
+
+    midia = MidiaBaixada(
+        info['id'], info.get('webpage_url') or url, info['title'],
+        duracao=info.get('duration'), formato=info.get('format_id'),
+        idiomas=sorted((info.get('requested_subtitles') or {}).keys()),
+        trecho=tuple(trecho) if trecho else None,
+    )
+    if not so_legendas:
+        baixados = info.get('requested_downloads') or []
+        if baixados and baixados[0].get('filepath'):
+            midia.video_path = baixados[0]['filepath']
+        else:
+            midia.video_path = base_path + ".mp4"
+    if not trecho:
+        midia.legenda_path = _encontrar_legenda(info, base_path)
+    return midia
+
+
+def baixar_video_youtube(url, pasta_destino, ao_progresso=None, motor=None):
+    """Baixa vídeo e legenda (pt ou en). Retorna (video_path, legenda_path, titulo)."""
+    midia = baixar_midia_youtube(url, pasta_destino, ao_progresso=ao_progresso, motor=motor)
+    return midia.video_path, midia.legenda_path, midia.titulo
+
+
+def listar_playlist(url):
+    """Lista (video_id, url) dos vídeos de uma playlist/canal, sem baixar nada."""
+    from yt_dlp import YoutubeDL
+
+    ydl_opts = {'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist', 'skip_download': True}
+    with YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    videos = []
+    for entrada in info.get('entries') or []:
+        if entrada and entrada.get('id'):
+            videos.append((entrada['id'], entrada.get('url') or f"https://www.youtube.com/watch?v={entrada['id']}"))
+    return videos
@@ -0,0 +1,235 @@
+import time
+import sqlite3
+import hashlib
+import threading
+
+from config import caminho_cache, CACHE_EMBEDDINGS_MB, MODO_INFERENCIA, THREADS_INFERENCIA
+from metricas import span
+
+# ================= MODELO DE EMBEDDINGS ==============
+# torch e sentence_transformers levam segundos e centenas de MB para
+# carregar, então só são importados quando o modo automático é usado.
+
+NOME_MODELO = 'all-MiniLM-L6-v2'
+
+# Modos de inferência:
+#   "padrao": fp32, GPU se houver
+#   "cpu": fp32 forçado na CPU (referência para comparar com o int8)
+#   "cpu_int8": CPU com quantização dinâmica int8 das camadas Linear
+MODO_PADRAO = "padrao"
+MODO_CPU = "cpu"
+MODO_CPU_INT8 = "cpu_int8"
+MODOS_INFERENCIA = (MODO_PADRAO, MODO_CPU, MODO_CPU_INT8)
+
+_modelos = {}
+_lock_modelo = threading.Lock()
+
+
+def _configurar_threads(threads):
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+
+
+def carregar_modelo(nome=NOME_MODELO, modo=None, threads=None):
+    """
+    Retorna o modelo de embeddings, carregando (uma vez por processo e modo) se preciso.
+    threads limita as threads intra-op do PyTorch (padrão: THREADS_INFERENCIA do .env).
+    """
+    modo = modo or MODO_INFERENCIA
+    if modo not in MODOS_INFERENCIA:
+        raise ValueError(f"Modo de inferência inválido: {modo} (use {', '.join(MODOS_INFERENCIA)})")
+
+    with _lock_modelo, span('carregar_modelo', modelo=nome, modo=modo) as medida:
+        if medida is not None:
+            medida['ja_carregado'] = (nome, modo) in _modelos
+        if (nome, modo) not in _modelos:
+            import torch
+            from sentence_transformers import SentenceTransformer
+
+            _configurar_threads(threads or THREADS_INFERENCIA)
+            if modo == MODO_CPU_INT8:
+                modelo = SentenceTransformer(nome, device='cpu')
+                modelo = torch.ao.quantization.quantize_dynamic(modelo, {torch.nn.Linear}, dtype=torch.qint8)
+            elif modo == MODO_CPU:
+                modelo = SentenceTransformer(nome, device='cpu')
+            else:
+                device = 'cuda' if torch.cuda.is_available() else 'cpu'
+                modelo = SentenceTransformer(nome, device=device)
+            _modelos[(nome, modo)] = modelo
+        return _modelos[(nome, modo)]
+
+
+def chave_modelo(nome=NOME_MODELO, modo=None):
+    """Identificador do modelo no cache: vetores int8 e fp32 não se misturam."""
+    modo = modo or MODO_INFERENCIA
+    return f"{nome}@{modo}" if modo == MODO_CPU_INT8 else nome
+
+
+def aquecer_modelo_em_segundo_plano(nome=NOME_MODELO):
+    """Carrega o modelo numa thread daemon, para o primeiro corte automático não esperar."""
+    thread = threading.Thread(target=carregar_modelo, args=(nome,), name="aquecer-modelo", daemon=True)
+    thread.start()
+    return thread
+
+
+# ================= CACHE DE EMBEDDINGS ==============
+
+class CacheEmbeddings:
+    """
+    Cache em disco (SQLite) de embeddings, endereçado pelo conteúdo:
+    a chave é o hash do nome do modelo + texto do bloco. Quando o total
+    passa de limite_bytes, os vetores usados há mais tempo são removidos (LRU).
+    Seguro para uso por várias threads.
+    """
+
+    def __init__(self, caminho=None, limite_bytes=None):
+        self.caminho = caminho or caminho_cache("embeddings.sqlite")
+        self.limite_bytes = limite_bytes if limite_bytes is not None else CACHE_EMBEDDINGS_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                chave TEXT PRIMARY KEY,
+                modelo TEXT NOT NULL,
+                dimensao INTEGER NOT NULL,
+                vetor BLOB NOT NULL,
+                ultimo_uso REAL NOT NULL
+            )
+        """)
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_ultimo_uso ON embeddings (ultimo_uso)")
+        self._conexao.commit()
+
+    @staticmethod
+    def chave(modelo, texto):
+        return hashlib.sha256(f"{modelo}\0{texto}".encode('utf-8')).hexdigest()
+
+    def buscar(self, chaves):
+        """Retorna {chave: vetor numpy float32} para as chaves encontradas e marca o uso."""
+        import numpy as np
+
+        if not chaves:
+            return {}
+        encontrados = {}
+        with self._lock:
+            unicas = list(dict.fromkeys(chaves))
+            # SQLite limita o número de parâmetros por consulta
+            for i in range(0, len(unicas), 500):
+                lote = unicas[i:i + 500]
+                marcadores = ",".join("?" * len(lote))
+                linhas = self._conexao.execute(
+                    f"SELECT chave, vetor FROM embeddings WHERE chave IN ({marcadores})", lote
+                ).fetchall()
+                for chave, vetor in linhas:
+                    encontrados[chave] = np.frombuffer(vetor, dtype=np.float32)
+            if encontrados:
+                agora = time.time()
+                self._conexao.executemany(
+                    "UPDATE embeddings SET ultimo_uso = ? WHERE chave = ?",
+                    [(agora, c) for c in encontrados],
+                )
+                self._conexao.commit()
+        return encontrados
+
+    def guardar(self, modelo, itens):
+        """Guarda [(chave, vetor)] e aplica o limite de tamanho."""
+        import numpy as np
+
+        if not itens:
+            return
+        agora = time.time()
+        linhas = []
+        for chave, vetor in itens:
+            vetor = np.asarray(vetor, dtype=np.float32)
+            linhas.append((chave, modelo, vetor.shape[-1], vetor.tobytes(), agora))
+        with self._lock:
+            self._conexao.executemany(
+                "INSERT OR REPLACE INTO embeddings (chave, modelo, dimensao, vetor, ultimo_uso) "
+                "VALUES (?, ?, ?, ?, ?)",
+                linhas,
+            )
+            self._conexao.commit()
+            self._aplicar_limite()
+
+    def _aplicar_limite(self):
+        total = self._conexao.execute("SELECT COALESCE(SUM(LENGTH(vetor)), 0) FROM embeddings").fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        excesso = total - self.limite_bytes
+        removidas = []
+        for chave, tamanho in self._conexao.execute(
+            "SELECT chave, LENGTH(vetor) FROM embeddings ORDER BY ultimo_uso ASC"
+        ):
+            removidas.append((chave,))
+            excesso -= tamanho
+            if excesso <= 0:
+                break
+        self._conexao.executemany("DELETE FROM embeddings WHERE chave = ?", removidas)
+        self._conexao.commit()
+
+    def limpar(self):
+        with self._lock:
+            self._conexao.execute("DELETE FROM embeddings")
+            self._conexao.commit()
+
+
+_cache = None
+_lock_cache = threading.Lock()
+
+
+def obter_cache():
+    """Cache de embeddings compartilhado pelo processo."""
+    global _cache
+    with _lock_cache:
+        if _cache is None:
+            _cache = CacheEmbeddings()
+        return _cache
+
+
+# Lote grande: com textos curtos (segmentos de legenda) o custo por chamada domina
+TAMANHO_LOTE = 128
+
+
+def codificar_textos(textos, nome_modelo=NOME_MODELO, cache=None, usar_cache=True, tamanho_lote=TAMANHO_LOTE,
+                     modo=None):
+    """
+    Retorna os embeddings de textos como array numpy (n, dim) float32.
+    Textos já vistos vêm do cache em disco; o modelo só é carregado se
+    algum texto ainda não tiver embedding guardado.
+    O encode do sentence_transformers já ordena cada chamada por tamanho de
+    texto antes de montar os lotes, então o padding fica mínimo; por isso
+    todos os textos que faltam vão numa chamada só.
+    """
+    import numpy as np
+
+    if not textos:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    if not usar_cache:
+        modelo = carregar_modelo(nome_modelo, modo)
+        with span('embeddings', textos=len(textos), cache=False):
+            novos = modelo.encode(list(textos), batch_size=tamanho_lote, convert_to_numpy=True)
+        return np.asarray(novos, dtype=np.float32)
+
+    cache = cache or obter_cache()
+    identificador = chave_modelo(nome_modelo, modo)
+    chaves = [CacheEmbeddings.chave(identificador, t) for t in textos]
+    encontrados = cache.buscar(chaves)
+
+    faltando = {}
+    for chave, texto in zip(chaves, textos):
+        if chave not in encontrados and chave not in faltando:
+            faltando[chave] = texto
+
+    if faltando:
+        modelo = carregar_modelo(nome_modelo, modo)
+        with span('embeddings', textos=len(faltando), do_cache=len(textos) - len(faltando)):
+            novos = modelo.encode(list(faltando.values()), batch_size=tamanho_lote, convert_to_numpy=True)
+        novos = np.asarray(novos, dtype=np.float32)
+        itens = list(zip(faltando.keys(), novos))
+        cache.guardar(identificador, itens)
+        encontrados.update(itens)
+
+    return np.stack([encontrados[c] for c in chaves])
@@ -0,0 +1,245 @@
+import os
+import json
+import socket
+import subprocess
+import threading
+
+from config import caminho_cache, DISPOSITIVO_VAAPI
+
+# ============ DETECÇÃO DE ENCODERS ============
+
+# Ordem de preferência por família de codec: hardware primeiro, CPU por último
+CADEIA_ENCODERS = {
+    'h264': ['h264_nvenc', 'h264_vaapi', 'h264_qsv', 'libx264'],
+    'hevc': ['hevc_nvenc', 'hevc_vaapi', 'hevc_qsv', 'libx265'],
+}
+# Último recurso se nada da família escolhida funcionar
+ENCODERS_CPU = ['libx264', 'libx265']
+
+PERFIS = ("rapido", "equilibrado", "qualidade")
+# Perfil das prévias de baixa resolução: o preset mais rápido de cada
+# encoder, qualidade só suficiente para conferir cortes e legendas
+PERFIL_PREVIA = "previa"
+
+# Sufixos de encoders que ocupam uma sessão de hardware (GPU/iGPU)
+SUFIXOS_ENCODER_HW = ('_nvenc', '_qsv', '_vaapi', '_amf', '_videotoolbox', '_v4l2m2m')
+
+# Argumentos de rate control / preset por encoder e perfil.
+# Cada encoder tem a sua própria escala: -crf só vale para x264/x265,
+# NVENC usa -cq, QSV -global_quality e VAAPI -qp.
+_ARGS_POR_ENCODER = {
+    'libx264': {
+        'rapido': ['-preset', 'veryfast', '-crf', '23'],
+        'equilibrado': ['-preset', 'medium', '-crf', '20'],
+        'qualidade': ['-preset', 'slow', '-crf', '18'],
+        'previa': ['-preset', 'ultrafast', '-crf', '28'],
+    },
+    'libx265': {
+        'rapido': ['-preset', 'veryfast', '-crf', '26'],
+        'equilibrado': ['-preset', 'medium', '-crf', '23'],
+        'qualidade': ['-preset', 'slow', '-crf', '20'],
+        'previa': ['-preset', 'ultrafast', '-crf', '30'],
+    },
+    'nvenc': {
+        'rapido': ['-preset', 'p2', '-rc', 'vbr', '-cq', '25', '-b:v', '0'],
+        'equilibrado': ['-preset', 'p4', '-rc', 'vbr', '-cq', '22', '-b:v', '0'],
+        'qualidade': ['-preset', 'p6', '-tune', 'hq', '-rc', 'vbr', '-cq', '19', '-b:v', '0'],
+        'previa': ['-preset', 'p1', '-rc', 'vbr', '-cq', '30', '-b:v', '0'],
+    },
+    'qsv': {
+        'rapido': ['-preset', 'veryfast', '-global_quality', '25'],
+        'equilibrado': ['-preset', 'medium', '-global_quality', '22'],
+        'qualidade': ['-preset', 'slower', '-global_quality', '19'],
+        'previa': ['-preset', 'veryfast', '-global_quality', '30'],
+    },
+    'vaapi': {
+        'rapido': ['-rc_mode', 'CQP', '-qp', '25'],
+        'equilibrado': ['-rc_mode', 'CQP', '-qp', '22'],
+        'qualidade': ['-rc_mode', 'CQP', '-qp', '19'],
+        'previa': ['-rc_mode', 'CQP', '-qp', '30'],
+    },
+}
+
+_lock = threading.Lock()
+_encoders_funcionando = None
+
+
+def encoder_de_hardware(codec):
+    """Retorna True se o encoder de vídeo usa uma sessão de hardware."""
+    return bool(codec) and codec.endswith(SUFIXOS_ENCODER_HW)
+
+
+class PerfilEncoder:
+    """
+    Tudo o que o ffmpeg precisa para usar um encoder num perfil:
+    args_entrada vão antes do -i, filtro_final é anexado à cadeia -vf
+    e args_video vão junto das opções de saída.
+    """
+
+    def __init__(self, encoder, perfil, args_video, args_entrada=None, filtro_final=""):
+        self.encoder = encoder
+        self.perfil = perfil
+        self.args_video = args_video
+        self.args_entrada = args_entrada or []
+        self.filtro_final = filtro_final
+
+    @property
+    def hardware(self):
+        return encoder_de_hardware(self.encoder)
+
+    def filtro(self, cadeia):
+        """Completa uma cadeia de filtros de vídeo com o sufixo do encoder."""
+        if not self.filtro_final:
+            return cadeia
+        return f"{cadeia},{self.filtro_final}" if cadeia else self.filtro_final
+
+    def __repr__(self):
+        return f"PerfilEncoder({self.encoder!r}, {self.perfil!r})"
+
+
+def _tipo_encoder(encoder):
+    for sufixo in ('nvenc', 'qsv', 'vaapi'):
+        if encoder.endswith('_' + sufixo):
+            return sufixo
+    return encoder
+
+
+def perfil_encoder(encoder, perfil="qualidade"):
+    """Monta o PerfilEncoder com preset/rate control corretos para o encoder."""
+    if perfil not in PERFIS and perfil != PERFIL_PREVIA:
+        raise ValueError(f"Perfil de encode inválido: {perfil} (use {', '.join(PERFIS)})")
+
+    tipo = _tipo_encoder(encoder)
+    args = ['-c:v', encoder] + list(_ARGS_POR_ENCODER.get(tipo, {}).get(perfil, []))
+
+    if tipo == 'vaapi':
+        return PerfilEncoder(
+            encoder, perfil, args,
+            args_entrada=['-vaapi_device', DISPOSITIVO_VAAPI],
+            filtro_final="format=nv12,hwupload",
+        )
+    if tipo == 'qsv':
+        return PerfilEncoder(encoder, perfil, args, filtro_final="format=nv12")
+    return PerfilEncoder(encoder, perfil, args + ['-pix_fmt', 'yuv420p'])
+
+
+def _versao_ffmpeg():
+    try:
+        saida = subprocess.run(['ffmpeg', '-hide_banner', '-version'],
+                               capture_output=True, text=True, check=True).stdout
+        return saida.splitlines()[0] if saida else ""
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _encoders_compilados():
+    """Nomes dos encoders de vídeo que o ffmpeg instalado lista em -encoders."""
+    try:
+        saida = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                               capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return set()
+
+    nomes = set()
+    for linha in saida.splitlines():
+        partes = linha.split()
+        # Linhas de encoder: " V....D libx264   descrição"
+        if len(partes) >= 2 and len(partes[0]) == 6 and partes[0].startswith('V'):
+            nomes.add(partes[1])
+    return nomes
+
+
+def _testar_encoder(encoder):
+    """Faz um encode minúsculo de uma fonte sintética para ver se o encoder funciona de fato."""
+    perfil = perfil_encoder(encoder, "rapido")
+    comando = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin',
+        *perfil.args_entrada,
+        '-f', 'lavfi', '-i', 'testsrc2=size=256x144:rate=30',
+        '-frames:v', '5',
+        '-vf', perfil.filtro("format=yuv420p"),
+        *perfil.args_video,
+        '-f', 'null', '-',
+    ]
+    try:
+        return subprocess.run(comando, capture_output=True, timeout=30).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def _chave_host():
+    return f"{socket.gethostname()}|{_versao_ffmpeg()}"
+
+
+def detectar_encoders(forcar=False):
+    """
+    Retorna {encoder: funciona} para todos os encoders candidatos.
+    O probe (ffmpeg -encoders + encode de teste) roda uma vez por host e
+    versão do ffmpeg; o resultado fica em PASTA_CACHE/encoders.json.
+    """
+    global _encoders_funcionando
+
+    with _lock:
+        if _encoders_funcionando is not None and not forcar:
+            return _encoders_funcionando
+
+        caminho = caminho_cache("encoders.json")
+        chave = _chave_host()
+
+        if not forcar and os.path.exists(caminho):
+            try:
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    dados = json.load(f)
+                if dados.get('chave') == chave:
+                    _encoders_funcionando = dados['encoders']
+                    return _encoders_funcionando
+            except (OSError, ValueError, KeyError):
+                pass
+
+        candidatos = []
+        for cadeia in list(CADEIA_ENCODERS.values()) + [ENCODERS_CPU]:
+            for encoder in cadeia:
+                if encoder not in candidatos:
+                    candidatos.append(encoder)
+
+        compilados = _encoders_compilados()
+        resultado = {enc: enc in compilados and _testar_encoder(enc) for enc in candidatos}
+
+        # Sem ffmpeg no PATH não há o que guardar: tenta de novo na próxima execução
+        if compilados:
+            try:
+                with open(caminho, 'w', encoding='utf-8') as f:
+                    json.dump({'chave': chave, 'encoders': resultado}, f, indent=2)
+            except OSError:
+                pass
+
+        _encoders_funcionando = resultado
+        return resultado
+
+
+def escolher_encoder(familia="h264", preferido=None):
+    """
+    Escolhe o encoder mais rápido que funciona neste host.
+    Se preferido for dado e funcionar, ele é usado; senão segue a cadeia
+    da família (nvenc → vaapi → qsv → CPU) e, por fim, qualquer encoder de CPU.
+    """
+    if familia not in CADEIA_ENCODERS:
+        raise ValueError(f"Família de codec desconhecida: {familia}")
+
+    funcionando = detectar_encoders()
+    if preferido and preferido not in funcionando:
+        # Encoder fora da cadeia conhecida (ex.: h264_amf): confia na escolha do usuário
+        return preferido
+
+    cadeia = ([preferido] if preferido else []) + CADEIA_ENCODERS[familia] + ENCODERS_CPU
+    for encoder in cadeia:
+        if funcionando.get(encoder):
+            return encoder
+
+    # Nada passou no teste (ex.: ffmpeg ausente no PATH): tenta libx264 e deixa o erro aparecer no render
+    return 'libx264'
+
+
+def perfil_para_host(perfil="qualidade", familia="h264", preferido=None):
+    """Atalho: escolhe o encoder do host e devolve o PerfilEncoder pronto."""
+    return perfil_encoder(escolher_encoder(familia, preferido), perfil)
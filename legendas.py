@@ -0,0 +1,381 @@
+import os
+import re
+import html
+from collections import deque
+
+from cortes import timestamp_to_seconds
+
+# ================= LEGENDAS (SRT) ==============
+def parse_srt(caminho_arquivo):
+    """Lê um SRT (ou WebVTT) e retorna a lista de tuplas (inicio, fim, texto)."""
+    return [(ms_para_srt(ini), ms_para_srt(fim), " ".join(texto.split("\n")))
+            for ini, fim, texto in ler_cues(caminho_arquivo)]
+
+def str_time_to_seconds(t):
+    h, m, s = t.split(':')
+    if ',' in s:
+        s, ms = s.split(',')
+    else:
+        ms = '0'
+    return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000
+
+def _seconds_to_srt_time(sec_float):
+    """Converte segundos (float) para string SRT HH:MM:SS,mmm"""
+    if sec_float < 0:
+        sec_float = 0.0
+    total_ms = int(round(sec_float * 1000))
+    h = total_ms // 3600000
+    rem = total_ms % 3600000
+    m = rem // 60000
+    rem = rem % 60000
+    s = rem // 1000
+    ms = rem % 1000
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+def salvar_legenda(caminho_saida, legendas):
+    with open(caminho_saida, 'w', encoding='utf-8') as f:
+        for idx, (inicio, fim, texto) in enumerate(legendas, start=1):
+            f.write(f"{idx}\n{inicio} --> {fim}\n{texto}\n\n")
+
+# ============ NOVO: limpeza de sobreposições ============
+def limpar_sobreposicoes_srt(segmentos, margem_segundos=0.05):
+    """
+    Ajusta tempos de legendas para evitar sobreposições:
+    se o fim da legenda atual ultrapassa o início da próxima,
+    o fim é ajustado para (início_da_próxima - margem).
+    """
+    corrigidos = []
+    for i in range(len(segmentos)):
+        inicio, fim, texto = segmentos[i]
+        if i < len(segmentos) - 1:
+            inicio_prox, _, _ = segmentos[i + 1]
+            inicio_prox_sec = str_time_to_seconds(inicio_prox)
+            fim_sec = str_time_to_seconds(fim)
+            ini_sec = str_time_to_seconds(inicio)
+
+            # Ajusta fim se houver sobreposição
+            limite = inicio_prox_sec - margem_segundos
+            if fim_sec > limite:
+                fim_sec = max(limite, ini_sec)  # evita duração negativa
+                fim = _seconds_to_srt_time(fim_sec)
+        corrigidos.append((inicio, fim, texto))
+    return corrigidos
+
+def limpar_arquivo_srt(caminho_srt, margem_segundos=0.05, colapsar=False, caminho_saida=None):
+    """
+    Lê, limpa sobreposições e sobrescreve o SRT no mesmo arquivo (ou salva
+    em caminho_saida, se dado). Com colapsar=True também remove as
+    repetições de legendas automáticas.
+    """
+    try:
+        trilha = TrilhaLegenda.de_arquivo(caminho_srt, colapsar=colapsar)
+        if not trilha:
+            return False
+        trilha.limpar_sobreposicoes(int(round(margem_segundos * 1000))).salvar(caminho_saida or caminho_srt)
+        return True
+    except Exception:
+        return False
+# ========================================================
+
+def _para_segundos(t):
+    """Aceita timestamp em texto ou já em segundos (int/float)."""
+    if isinstance(t, (int, float)):
+        return t
+    return timestamp_to_seconds(t)
+
+def filtrar_legendas_por_tempo(segmentos, tempo_inicio, tempo_fim):
+    inicio_sec = _para_segundos(tempo_inicio)
+    fim_sec = _para_segundos(tempo_fim)
+    if isinstance(segmentos, TrilhaLegenda):
+        return segmentos.fatia(inicio_sec, fim_sec)
+    return [ (i, f, txt) for (i, f, txt) in segmentos if inicio_sec <= str_time_to_seconds(i) < fim_sec ]
+
+
+# ============ LEITURA EM STREAMING (SRT / WebVTT) ============
+
+_RE_TEMPO = re.compile(
+    r'^\s*((?:\d+:)?\d{1,2}:\d{2}(?:[.,]\d{1,3})?)\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}(?:[.,]\d{1,3})?)'
+)
+_RE_TAG = re.compile(r'<[^>]*>')
+
+# Cues de rolagem mais afastadas que isso da anterior não são comparadas
+_INTERVALO_ROLAGEM_MS = 2000
+# Folga para considerar uma cue colada na anterior, e duração máxima das
+# cues "relâmpago" (10 ms) que só repetem o texto
+_FOLGA_ROLAGEM_MS = 20
+
+
+def tempo_para_ms(t):
+    """Converte 'HH:MM:SS,mmm', 'MM:SS.mmm' (WebVTT) etc. para milissegundos."""
+    partes = t.strip().replace(',', '.').split(':')
+    segundos, _, ms = partes[-1].partition('.')
+    total = int(segundos) * 1000 + int((ms or '0').ljust(3, '0')[:3])
+    multiplicador = 60000
+    for parte in reversed(partes[:-1]):
+        total += int(parte) * multiplicador
+        multiplicador *= 60
+    return total
+
+
+def _limpar_texto(linhas):
+    # Remove tags (<c>, <i>, timestamps inline do WebVTT) e entidades HTML
+    limpas = (html.unescape(_RE_TAG.sub('', l)).strip() for l in linhas)
+    return "\n".join(l for l in limpas if l)
+
+
+def ler_cues(caminho):
+    """
+    Gera (inicio_ms, fim_ms, texto) lendo o arquivo linha a linha, sem
+    carregar tudo na memória. Aceita SRT e WebVTT; blocos sem linha de
+    tempo válida (cabeçalho, NOTE, STYLE, lixo) são ignorados e blocos
+    sem linha em branco entre eles são separados pela própria linha de tempo.
+    O texto mantém as quebras de linha originais.
+    """
+    with open(caminho, 'r', encoding='utf-8-sig', errors='replace') as f:
+        tempo = None
+        linhas = []
+        for linha in f:
+            linha = linha.rstrip('\r\n')
+            m = _RE_TEMPO.match(linha)
+            if m:
+                if tempo is not None:
+                    # Bloco anterior sem linha em branco: a última linha pode ser o índice do próximo
+                    if linhas and linhas[-1].strip().isdigit():
+                        linhas.pop()
+                    texto = _limpar_texto(linhas)
+                    if texto:
+                        yield tempo[0], tempo[1], texto
+                try:
+                    ini, fim = tempo_para_ms(m.group(1)), tempo_para_ms(m.group(2))
+                    tempo = (ini, max(ini, fim))
+                except ValueError:
+                    tempo = None
+                linhas = []
+            elif not linha.strip():
+                if tempo is not None:
+                    texto = _limpar_texto(linhas)
+                    if texto:
+                        yield tempo[0], tempo[1], texto
+                tempo = None
+                linhas = []
+            elif tempo is not None:
+                linhas.append(linha)
+
+        if tempo is not None:
+            texto = _limpar_texto(linhas)
+            if texto:
+                yield tempo[0], tempo[1], texto
+
+
+def _normalizar(linha):
+    return " ".join(linha.lower().split())
+
+
+def colapsar_rolagem(cues):
+    """
+    Remove as repetições das legendas automáticas do YouTube, em streaming.
+
+    Nessas legendas cada frase aparece em 2–3 cues seguidas: a linha de
+    baixo de uma cue vira a linha de cima da próxima, às vezes crescendo
+    palavra a palavra, e há cues de 10 ms só repetindo o texto. Aqui cada
+    linha falada vira um segmento único: numa cue colada na anterior (ou
+    de 10 ms), linhas já vistas nas cues recentes são descartadas (apenas
+    estendendo o fim do segmento atual), e uma linha que completa a
+    anterior com mais palavras a substitui. Falas repetidas em cues
+    separadas no tempo ("ok", pausa, "ok") ficam.
+    """
+    pendente = None          # [inicio, fim, [linhas]]
+    recentes = deque(maxlen=3)
+    fim_anterior = None      # fim da última cue lida
+
+    for ini, fim, texto in cues:
+        linhas = [l.strip() for l in texto.split("\n") if l.strip()]
+        if not linhas:
+            continue
+
+        if pendente is not None and ini - pendente[1] > _INTERVALO_ROLAGEM_MS:
+            recentes.clear()
+        rolagem = fim_anterior is not None and (
+            ini <= fim_anterior + _FOLGA_ROLAGEM_MS or fim - ini <= _FOLGA_ROLAGEM_MS
+        )
+        fim_anterior = fim
+
+        # Linhas do topo que já foram mostradas (rolagem)
+        while rolagem and linhas and _normalizar(linhas[0]) in recentes:
+            linhas.pop(0)
+
+        # Linha que cresce palavra a palavra: substitui a última mostrada
+        if rolagem and linhas and pendente is not None and recentes:
+            primeira = _normalizar(linhas[0])
+            if primeira.startswith(recentes[-1] + " "):
+                pendente[2][-1] = linhas.pop(0)
+                recentes[-1] = primeira
+
+        if not linhas:
+            if pendente is not None:
+                pendente[1] = max(pendente[1], fim)
+            continue
+
+        if pendente is not None:
+            yield pendente[0], pendente[1], "\n".join(pendente[2])
+        pendente = [ini, fim, linhas]
+        recentes.extend(_normalizar(l) for l in linhas)
+
+    if pendente is not None:
+        yield pendente[0], pendente[1], "\n".join(pendente[2])
+
+
+def converter_para_srt(caminho, caminho_saida=None, colapsar=True):
+    """Converte SRT/WebVTT para um SRT limpo (por padrão ao lado, com extensão .srt)."""
+    if caminho_saida is None:
+        caminho_saida = os.path.splitext(caminho)[0] + ".srt"
+    TrilhaLegenda.de_arquivo(caminho, colapsar=colapsar).salvar(caminho_saida)
+    return caminho_saida
+
+
+# ============ TRILHA DE LEGENDA (colunar, em milissegundos) ============
+
+def srt_para_ms(t):
+    """Converte 'HH:MM:SS,mmm' (ou com '.') para milissegundos inteiros."""
+    return tempo_para_ms(t)
+
+
+def ms_para_srt(ms):
+    """Converte milissegundos inteiros para 'HH:MM:SS,mmm'."""
+    ms = max(0, int(ms))
+    h, rem = divmod(ms, 3600000)
+    m, rem = divmod(rem, 60000)
+    s, ms = divmod(rem, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+class TrilhaLegenda:
+    """
+    Legenda em formato colunar: início e fim de cada cue em arrays numpy de
+    milissegundos (int64) e os textos numa lista à parte. Os tempos são
+    convertidos de texto uma única vez, na leitura; recortes por intervalo
+    usam busca binária e deslocamentos são uma operação vetorizada.
+
+    Também se comporta como a lista de tuplas (inicio, fim, texto) de
+    parse_srt (len, índice, iteração), para o código que ainda usa strings.
+    """
+
+    __slots__ = ('inicios', 'fins', 'textos')
+
+    def __init__(self, inicios, fins, textos):
+        import numpy as np
+
+        self.inicios = np.asarray(inicios, dtype=np.int64)
+        self.fins = np.asarray(fins, dtype=np.int64)
+        self.textos = list(textos)
+
+        # Garante ordem por início (estável), necessária para a busca binária
+        if len(self.inicios) > 1 and np.any(self.inicios[1:] < self.inicios[:-1]):
+            ordem = np.argsort(self.inicios, kind='stable')
+            self.inicios = self.inicios[ordem]
+            self.fins = self.fins[ordem]
+            self.textos = [self.textos[i] for i in ordem]
+
+    @classmethod
+    def de_segmentos(cls, segmentos):
+        """Cria a trilha a partir de tuplas (inicio, fim, texto) em texto SRT."""
+        return cls(
+            [srt_para_ms(i) for i, _, _ in segmentos],
+            [srt_para_ms(f) for _, f, _ in segmentos],
+            [t for _, _, t in segmentos],
+        )
+
+    @classmethod
+    def de_cues(cls, cues):
+        """Cria a trilha consumindo um iterável de (inicio_ms, fim_ms, texto)."""
+        inicios, fins, textos = [], [], []
+        for ini, fim, texto in cues:
+            inicios.append(ini)
+            fins.append(fim)
+            textos.append(" ".join(texto.split("\n")))
+        return cls(inicios, fins, textos)
+
+    @classmethod
+    def de_arquivo(cls, caminho, colapsar=False):
+        """
+        Lê SRT ou WebVTT em streaming. Com colapsar=True as repetições das
+        legendas automáticas do YouTube são removidas na leitura.
+        """
+        cues = ler_cues(caminho)
+        if colapsar:
+            cues = colapsar_rolagem(cues)
+        return cls.de_cues(cues)
+
+    # ---- comportamento de lista de tuplas ----
+    def __len__(self):
+        return len(self.textos)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return TrilhaLegenda(self.inicios[idx], self.fins[idx], self.textos[idx])
+        return (ms_para_srt(self.inicios[idx]), ms_para_srt(self.fins[idx]), self.textos[idx])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return f"TrilhaLegenda({len(self)} cues)"
+
+    # ---- operações ----
+    def indices_intervalo(self, inicio_sec, fim_sec):
+        """Faixa [a, b) das cues com início em [inicio_sec, fim_sec). O(log n)."""
+        a, b = self.inicios.searchsorted([int(round(inicio_sec * 1000)), int(round(fim_sec * 1000))], side='left')
+        return int(a), int(b)
+
+    def fatia(self, inicio_sec, fim_sec):
+        """Cues que começam dentro de [inicio_sec, fim_sec), sem copiar os textos um a um."""
+        a, b = self.indices_intervalo(inicio_sec, fim_sec)
+        return self[a:b]
+
+    def deslocar(self, delta_sec):
+        """
+        Nova trilha com todos os tempos somados a delta_sec. Inícios negativos
+        viram 0 e cues que terminariam antes de 0 são descartadas.
+        """
+        import numpy as np
+
+        delta = int(round(delta_sec * 1000))
+        inicios = self.inicios + delta
+        fins = self.fins + delta
+        manter = fins >= 0
+        if not manter.all():
+            textos = [t for t, ok in zip(self.textos, manter) if ok]
+            inicios, fins = inicios[manter], fins[manter]
+        else:
+            textos = self.textos
+        return TrilhaLegenda(np.maximum(inicios, 0), fins, textos)
+
+    def limpar_sobreposicoes(self, margem_ms=50):
+        """
+        Mesma regra de limpar_sobreposicoes_srt, vetorizada: se o fim de uma
+        cue passa do início da próxima menos a margem, o fim é puxado para lá
+        (sem ficar antes do próprio início).
+        """
+        import numpy as np
+
+        fins = self.fins.copy()
+        if len(fins) > 1:
+            limite = self.inicios[1:] - margem_ms
+            atual = fins[:-1]
+            fins[:-1] = np.where(atual > limite, np.maximum(limite, self.inicios[:-1]), atual)
+        return TrilhaLegenda(self.inicios, fins, self.textos)
+
+    def inicios_segundos(self):
+        return self.inicios / 1000.0
+
+    def fins_segundos(self):
+        return self.fins / 1000.0
+
+    def salvar(self, caminho_saida):
+        """Escreve a trilha como SRT."""
+        with open(caminho_saida, 'w', encoding='utf-8') as f:
+            f.write("".join(
+                f"{idx}\n{ms_para_srt(ini)} --> {ms_para_srt(fim)}\n{texto}\n\n"
+                for idx, (ini, fim, texto) in enumerate(zip(self.inicios.tolist(), self.fins.tolist(), self.textos), start=1)
+            ))
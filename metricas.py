@@ -0,0 +1,192 @@
+import os
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import contextvars
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ================= MÉTRICAS DE EXECUÇÃO ==============
+# Spans com tempo de parede, CPU, pico de memória e bytes lidos/escritos
+# de cada etapa de um job, mais uma entrada por corte renderizado (com os
+# números do próprio ffmpeg). Medidor.relatorio() junta tudo num dict
+# pronto para JSON.
+#
+# Funções de outros módulos abrem spans com metricas.span(nome): o span
+# entra no Medidor ativo na thread (o da etapa em execução) e não faz nada
+# se não houver um, então o custo fora de um job medido é desprezível.
+
+# Quantas funções do cProfile entram no relatório
+FUNCOES_PERFIL = 25
+
+_medidor_atual = contextvars.ContextVar('medidor_atual', default=None)
+_span_atual = contextvars.ContextVar('span_atual', default=None)
+
+
+def rss_pico_mb(uso=None):
+    """Pico de memória residente (MB) do processo, ou do rusage dado (ex.: de um ffmpeg)."""
+    if uso is None:
+        if resource is None:
+            return None
+        uso = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(uso.ru_maxrss / divisor, 1)
+
+
+def _io_processo():
+    """(bytes lidos, bytes escritos) pelo processo até agora, via /proc (None fora do Linux)."""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            campos = dict(linha.split(':', 1) for linha in f if ':' in linha)
+        return int(campos['rchar']), int(campos['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class Medidor:
+    """
+    Coleta os spans de um job. Cada span mede:
+      - parede_s: tempo de parede
+      - cpu_s: CPU da thread que executou o span (etapas de vídeos diferentes
+        rodam em threads diferentes no lote)
+      - rss_pico_mb: pico de memória do processo até o fim do span
+      - bytes_lidos/bytes_escritos: E/S do processo inteiro durante o span
+        (inclui outras threads que estiverem rodando junto)
+    Com perfilar=True cada span de nível mais alto roda sob o cProfile e o
+    relatório traz as funções Python mais caras de todas as etapas.
+    Seguro para uso por várias threads.
+    """
+
+    def __init__(self, perfilar=False):
+        self.perfilar = perfilar
+        self.inicio = time.time()
+        self._inicio_relogio = time.perf_counter()
+        self._lock = threading.Lock()
+        self._spans = []
+        self._perfis = []
+
+    @contextmanager
+    def span(self, nome, **extras):
+        """Mede o bloco; spans abertos dentro dele (em qualquer módulo) ficam como filhos."""
+        pai = _span_atual.get()
+        tokens = (_medidor_atual.set(self), _span_atual.set(nome))
+        perfil = None
+        if self.perfilar and pai is None:
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+            except ValueError:
+                perfil = None  # outro profiler ativo (ex.: etapa de outro job no lote)
+
+        io_antes = _io_processo()
+        cpu_antes = time.thread_time()
+        t0 = time.perf_counter()
+        registro = {'nome': nome, 'pai': pai, 'inicio_s': round(t0 - self._inicio_relogio, 3), **extras}
+        try:
+            yield registro
+        finally:
+            registro['parede_s'] = round(time.perf_counter() - t0, 4)
+            registro['cpu_s'] = round(time.thread_time() - cpu_antes, 4)
+            registro['rss_pico_mb'] = rss_pico_mb()
+            io_depois = _io_processo()
+            if io_antes and io_depois:
+                registro['bytes_lidos'] = io_depois[0] - io_antes[0]
+                registro['bytes_escritos'] = io_depois[1] - io_antes[1]
+            if perfil:
+                perfil.disable()
+            _span_atual.reset(tokens[1])
+            _medidor_atual.reset(tokens[0])
+            with self._lock:
+                self._spans.append(registro)
+                if perfil:
+                    self._perfis.append(perfil)
+
+    def registrar(self, nome, pai=None, **dados):
+        """
+        Adiciona uma medida pronta (ex.: um ffmpeg medido pelo AgendadorRender).
+        Sem inicio_s, considera que terminou agora e durou parede_s.
+        """
+        agora = time.perf_counter() - self._inicio_relogio
+        dados.setdefault('inicio_s', round(agora - dados.get('parede_s', 0), 3))
+        with self._lock:
+            self._spans.append({'nome': nome, 'pai': pai, **dados})
+
+    def _resumo_perfil(self, caminho_prof=None):
+        with self._lock:
+            perfis = list(self._perfis)
+        if not perfis:
+            return None
+        stats = pstats.Stats(perfis[0], stream=io.StringIO())
+        for perfil in perfis[1:]:
+            stats.add(perfil)
+        if caminho_prof:
+            stats.dump_stats(caminho_prof)
+
+        linhas = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:FUNCOES_PERFIL]
+        return {
+            'arquivo': caminho_prof,
+            'funcoes': [
+                {
+                    'funcao': f"{os.path.basename(arquivo)}:{linha}({funcao})",
+                    'chamadas': chamadas,
+                    'tempo_proprio_s': round(proprio, 4),
+                    'tempo_acumulado_s': round(acumulado, 4),
+                }
+                for (arquivo, linha, funcao), (_, chamadas, proprio, acumulado, _) in linhas
+            ],
+        }
+
+    def relatorio(self, caminho_prof=None, **campos):
+        """Relatório do job: campos extras + spans em ordem de início (+ cProfile, se ativo)."""
+        with self._lock:
+            spans = sorted(self._spans, key=lambda s: s.get('inicio_s', 0))
+        relatorio = {
+            **campos,
+            'inicio': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.inicio)),
+            'parede_s': round(time.perf_counter() - self._inicio_relogio, 3),
+            'rss_pico_mb': rss_pico_mb(),
+            'spans': spans,
+        }
+        perfil = self._resumo_perfil(caminho_prof) if self.perfilar else None
+        if perfil:
+            relatorio['perfil'] = perfil
+        return relatorio
+
+    def salvar(self, caminho, **campos):
+        """Grava o relatório em JSON (o .prof do cProfile vai ao lado, com o mesmo nome)."""
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        caminho_prof = os.path.splitext(caminho)[0] + ".prof" if self.perfilar else None
+        relatorio = self.relatorio(caminho_prof, **campos)
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        return relatorio
+
+
+def medidor_atual():
+    """Medidor do span em execução nesta thread, ou None."""
+    return _medidor_atual.get()
+
+
+def span_atual():
+    """Nome do span em execução nesta thread, ou None."""
+    return _span_atual.get()
+
+
+@contextmanager
+def span(nome, **extras):
+    """Span no Medidor ativo nesta thread; sem Medidor ativo, só executa o bloco."""
+    medidor = _medidor_atual.get()
+    if medidor is None:
+        yield None
+        return
+    with medidor.span(nome, **extras) as registro:
+        yield registro
@@ -0,0 +1,907 @@
+import os
+import csv
+import json
+import time
+import queue
+import hashlib
+import threading
+import traceback
+
+from config import (
+    PASTA_VIDEOS, PASTA_CORTES, MODO_RENDER, BAIXAR_SO_TRECHOS, MARGEM_TRECHO, PERFILAR,
+    AJUSTAR_AO_SILENCIO, JANELA_SILENCIO, PASTA_CACHE, PASTA_PREVIAS, FORMATO_SAIDA, POSICAO_SHORTS,
+    DURACAO_MAXIMA_SHORTS,
+)
+from audio import obter_envelope, ajustar_plano_ao_silencio
+from cortes import (
+    DURACAO_MAXIMA_CORTE, PlanoCortes, segundos_para_timestamp, validar_e_ajustar_cortes, sanitizar_nome_arquivo,
+)
+from biblioteca import extrair_id_video, obter_biblioteca
+from download import MOTORES_DOWNLOAD, baixar_midia_youtube, listar_playlist
+from legendas import TrilhaLegenda, converter_para_srt, limpar_arquivo_srt
+from metricas import Medidor, span
+from renderizacao import AgendadorRender, FORMATOS_SAIDA, FORMATO_SHORTS, cortar_video
+from semantica import detectar_pontos_de_corte_semantico
+
+# ================= PIPELINE (sem GUI) ==============
+# Mesmo fluxo do botão "Iniciar Processamento" do App, mas utilizável
+# por linha de comando, scripts e jobs em lote. Não importa tkinter.
+
+MODOS_CORTE = ("manual", "auto")
+
+# Subpasta de PASTA_CACHE com as cópias limpas das legendas locais
+PASTA_LEGENDAS_LIMPAS = "legendas"
+
+# Subpasta da pasta de saída com os relatórios de métricas (JSON) de cada job
+PASTA_RELATORIOS = "relatorios"
+
+# Arquivo, dentro da pasta de uma prévia, com o que aprovar_previa precisa
+# para renderizar os mesmos cortes em qualidade final
+ARQUIVO_PREVIA = "previa.json"
+
+# Se o trecho com os cortes passa dessa fração do vídeo, baixa o vídeo inteiro
+FRACAO_MAXIMA_TRECHO = 0.8
+
+# Etapas informadas a ao_progresso(etapa, fracao, nome=None, eta=None).
+# "corte" é o andamento de um corte específico (nome = nome do arquivo).
+ETAPAS = {
+    'download': "Download",
+    'legenda': "Legenda",
+    'planejamento': "Planejamento dos cortes",
+    'video': "Download do vídeo",
+    'audio': "Análise do áudio",
+    'render': "Renderização",
+    'corte': "Corte",
+}
+
+
+class ProcessamentoCancelado(Exception):
+    """O processamento foi interrompido por agendador.cancelar()."""
+
+
+def _verificar_cancelamento(agendador):
+    if agendador.cancelado:
+        raise ProcessamentoCancelado("Processamento cancelado.")
+
+
+def _sem_progresso(etapa, fracao, nome=None, eta=None):
+    pass
+
+
+class ResultadoJob:
+    """Resultado de um processamento completo (um vídeo)."""
+
+    def __init__(self, id=None, titulo=None, video_path=None, legenda_path=None,
+                 plano=None, pasta_saida=None, resultados=None, erro=None, trecho=None):
+        self.id = id
+        self.titulo = titulo
+        self.video_path = video_path
+        self.legenda_path = legenda_path
+        # PlanoCortes no tempo do vídeo original
+        self.plano = plano
+        self.pasta_saida = pasta_saida
+        self.resultados = resultados or []
+        self.erro = erro
+        # (inicio, fim) em segundos do original quando só um trecho foi baixado
+        self.trecho = trecho
+        # Relatório de métricas do job (Medidor.relatorio) e onde foi salvo
+        self.metricas = None
+        self.relatorio_path = None
+        # Cortes renderizados como prévia de baixa resolução (pasta_saida é a da prévia)
+        self.previa = False
+
+    @property
+    def falhas(self):
+        return [r for r in self.resultados if not r.ok]
+
+    @property
+    def ok(self):
+        return self.erro is None and bool(self.resultados) and not self.falhas
+
+    def para_dict(self):
+        return {
+            'id': self.id,
+            'titulo': self.titulo,
+            'video': self.video_path,
+            'legenda': self.legenda_path,
+            'cortes': self.plano.para_dict()['cortes'] if self.plano else [],
+            'trecho': list(self.trecho) if self.trecho else None,
+            'pasta_saida': self.pasta_saida,
+            'relatorio': self.relatorio_path,
+            'previa': self.previa,
+            'ok': self.ok,
+            'erro': self.erro,
+            'partes': [
+                {'nome': r.nome, 'saida': r.saida, 'codigo': r.codigo, 'duracao': round(r.duracao, 2),
+                 'reaproveitado': r.reaproveitado}
+                for r in self.resultados
+            ],
+        }
+
+
+def ler_arquivo_cortes(caminho):
+    """Lê uma lista de cortes no mesmo formato da caixa de texto do App (HH:MM:SS - Descrição)."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return f.read().strip().split("\n")
+
+
+def _caminho_legenda_limpa(legenda_path):
+    """SRT em PASTA_CACHE onde vai a cópia limpa de uma legenda local."""
+    pasta = os.path.join(PASTA_CACHE, PASTA_LEGENDAS_LIMPAS)
+    os.makedirs(pasta, exist_ok=True)
+    nome = os.path.splitext(os.path.basename(legenda_path))[0]
+    # O hash do caminho separa arquivos de mesmo nome em pastas diferentes
+    marca = hashlib.sha1(os.path.abspath(legenda_path).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(pasta, f"{nome} [{marca}].srt")
+
+
+def _limpar_legenda(legenda_path, logar, automatica=False):
+    """
+    Limpa a legenda e retorna o caminho do SRT usado daqui em diante.
+    automatica=True (legenda baixada pelo yt-dlp): remove também as
+    repetições de rolagem e grava ao lado da original. Uma legenda local do
+    usuário só tem as sobreposições limpas, numa cópia em PASTA_CACHE: o
+    arquivo dele não é alterado.
+    """
+    destino = None if automatica else _caminho_legenda_limpa(legenda_path)
+
+    if legenda_path.lower().endswith('.vtt'):
+        if automatica:
+            logar("🧹 Convertendo legenda WebVTT e removendo repetições...")
+        else:
+            logar("🧹 Convertendo legenda WebVTT...")
+        srt_path = converter_para_srt(legenda_path, destino, colapsar=automatica)
+        logar(f"✅ Legenda convertida: {os.path.basename(srt_path)}")
+        return srt_path
+
+    if automatica:
+        logar("🧹 Limpando sobreposições e repetições na legenda...")
+    else:
+        logar("🧹 Limpando sobreposições na legenda...")
+    if limpar_arquivo_srt(legenda_path, margem_segundos=0.05, colapsar=automatica, caminho_saida=destino):
+        logar("✅ Legenda limpa com sucesso.")
+        return destino or legenda_path
+    logar("⚠️ Não foi possível limpar a legenda (arquivo vazio ou erro). Seguindo assim mesmo.")
+    return legenda_path
+
+
+class Processamento:
+    """
+    Um vídeo passando pelas etapas do pipeline, na ordem:
+    obter_midia → preparar_legenda → planejar_cortes → baixar_video →
+    analisar_audio → renderizar.
+    Cada etapa é um método, para que o lote possa rodar etapas de vídeos
+    diferentes ao mesmo tempo; processar() apenas as chama em sequência.
+    O construtor valida a entrada (ValueError) e o estado vai sendo
+    acumulado em self.resultado (ResultadoJob).
+
+    Com baixar_so_trechos (padrão BAIXAR_SO_TRECHOS do .env), vídeos do
+    YouTube são baixados em duas fases: obter_midia traz só legenda e
+    metadados, e baixar_video, já com os cortes planejados, baixa apenas o
+    trecho do primeiro ao último corte (mais margem_trecho segundos de
+    cada lado). Cortes e legenda são então deslocados para o tempo do trecho.
+    Tudo o que é baixado fica registrado na BibliotecaMidia da pasta de
+    vídeos: a mesma URL de novo usa a legenda e o vídeo (inteiro ou um
+    trecho que contenha os cortes) já em disco. motor_download escolhe o
+    motor de download (padrão MOTOR_DOWNLOAD do .env). Com
+    usar_arquivo_downloads o downloads.txt da biblioteca vai para o yt-dlp
+    como download_archive (só downloads do vídeo inteiro são anotados).
+    limpar_legenda=False usa a legenda como veio, sem preparar_legenda
+    mexer nela (ex.: a de uma prévia já aprovada).
+
+    executar_etapa mede cada etapa (Medidor) e salvar_relatorio grava o
+    relatório JSON do job, com os tempos das etapas e de cada corte.
+
+    Os cortes são planejados uma vez num PlanoCortes (tempos em segundos,
+    nomes de saída já definidos), que segue assim até o ffmpeg. Um plano
+    pronto pode ser passado em plano, no lugar de cortes_raw/modo auto.
+
+    Com formato="shorts" (o padrão vem de FORMATO_SAIDA no .env) os cortes saem
+    verticais e nenhum passa de duracao_maxima_shorts segundos: o modo auto
+    procura assuntos nessa escala e cortes mais longos são divididos.
+    """
+
+    def __init__(self, url=None, video_path=None, legenda_path=None, modo="manual", cortes_raw=None, plano=None,
+                 pasta_videos=None, pasta_saida=None, modo_render=None, perfil=None,
+                 max_jobs_cpu=None, max_jobs_hw=None, agendador=None, logar=print, id=None,
+                 ao_progresso=None, baixar_so_trechos=None, margem_trecho=None, biblioteca=None,
+                 retomar=True, perfilar=None, relatorio=None, ajustar_ao_silencio=None, janela_silencio=None,
+                 previa=False, formato=None, posicao_shorts=None, duracao_maxima_shorts=None,
+                 motor_download=None, usar_arquivo_downloads=False, limpar_legenda=True):
+        if modo not in MODOS_CORTE:
+            raise ValueError(f"Modo de corte inválido: {modo} (use {', '.join(MODOS_CORTE)})")
+        if not url and not (video_path and legenda_path):
+            raise ValueError("Informe uma URL do YouTube ou os arquivos de vídeo e legenda.")
+        if modo == "manual" and not cortes_raw and plano is None:
+            raise ValueError("Modo manual precisa de uma lista de cortes.")
+        formato = formato or FORMATO_SAIDA
+        if formato not in FORMATOS_SAIDA:
+            raise ValueError(f"Formato de saída inválido: {formato} (use {', '.join(FORMATOS_SAIDA)})")
+        if motor_download and motor_download not in MOTORES_DOWNLOAD:
+            raise ValueError(f"Motor de download inválido: {motor_download} (use {', '.join(MOTORES_DOWNLOAD)})")
+
+        self.url = url
+        self.modo = modo
+        self.cortes_raw = cortes_raw
+        self.pasta_videos = pasta_videos or PASTA_VIDEOS
+        self.modo_render = modo_render or MODO_RENDER
+        self.perfil = perfil
+        self.retomar = retomar
+        self.max_jobs_cpu = max_jobs_cpu
+        self.max_jobs_hw = max_jobs_hw
+        self.agendador = agendador or AgendadorRender(max_cpu=max_jobs_cpu, max_hw=max_jobs_hw)
+        self.logar = logar
+        self.progresso = ao_progresso or _sem_progresso
+        self.baixar_so_trechos = BAIXAR_SO_TRECHOS if baixar_so_trechos is None else baixar_so_trechos
+        self.margem_trecho = MARGEM_TRECHO if margem_trecho is None else margem_trecho
+        self.motor_download = motor_download
+        self.usar_arquivo_downloads = usar_arquivo_downloads
+        self.limpar_legenda = limpar_legenda
+        self.ajustar_ao_silencio = AJUSTAR_AO_SILENCIO if ajustar_ao_silencio is None else ajustar_ao_silencio
+        self.janela_silencio = JANELA_SILENCIO if janela_silencio is None else janela_silencio
+        self.previa = previa
+        self.formato = formato
+        self.posicao_shorts = POSICAO_SHORTS if posicao_shorts is None else posicao_shorts
+        self.duracao_maxima_shorts = duracao_maxima_shorts or DURACAO_MAXIMA_SHORTS
+        self.duracao_fonte = None
+        self.video_id = None
+        # Índice de downloads da pasta de vídeos (BibliotecaMidia), aberto no primeiro uso
+        self.biblioteca = biblioteca
+        # Métricas por etapa; o relatório vai para relatorio (padrão: PASTA_RELATORIOS na saída)
+        self.medidor = Medidor(perfilar=PERFILAR if perfilar is None else perfilar)
+        self.caminho_relatorio = relatorio
+        # Plano e legenda no tempo do arquivo que será renderizado (difere do original com trecho)
+        self.plano_render = None
+        self.legenda_render = None
+        self.resultado = ResultadoJob(
+            id=id, video_path=video_path, legenda_path=legenda_path,
+            plano=plano, pasta_saida=pasta_saida or PASTA_CORTES,
+        )
+
+    def _hook_download(self, etapa):
+        def hook(status):
+            # Levantar exceção no hook é o jeito de interromper o yt-dlp
+            _verificar_cancelamento(self.agendador)
+            total = status.get('total_bytes') or status.get('total_bytes_estimate')
+            if status.get('status') == 'downloading' and total:
+                self.progresso(etapa, status.get('downloaded_bytes', 0) / total,
+                               nome=os.path.basename(status.get('filename') or ''), eta=status.get('eta'))
+        return hook
+
+    def _biblioteca(self):
+        if self.biblioteca is None:
+            self.biblioteca = obter_biblioteca(self.pasta_videos)
+        return self.biblioteca
+
+    def _baixar(self, etapa, **opcoes):
+        """Chama baixar_midia_youtube com progresso e cancelamento da etapa."""
+        self.progresso(etapa, 0.0)
+        try:
+            if self.usar_arquivo_downloads:
+                opcoes['arquivo_downloads'] = self._biblioteca().arquivo_downloads
+            midia = baixar_midia_youtube(self.url, self.pasta_videos, ao_progresso=self._hook_download(etapa),
+                                         motor=self.motor_download, logar=self.logar, **opcoes)
+        except Exception:
+            # O yt-dlp pode embrulhar a exceção do hook na dele
+            _verificar_cancelamento(self.agendador)
+            raise
+        self.progresso(etapa, 1.0)
+        return midia
+
+    def obter_midia(self):
+        """Baixa legenda (e vídeo, sem trechos) do YouTube ou confere os arquivos locais."""
+        r, logar = self.resultado, self.logar
+        _verificar_cancelamento(self.agendador)
+
+        if self.url:
+            biblioteca = self._biblioteca()
+            video_id = extrair_id_video(self.url)
+            midia = biblioteca.buscar(video_id) if video_id else None
+            if midia:
+                logar(f"📚 Legenda já baixada: {midia.titulo}")
+            else:
+                if self.baixar_so_trechos:
+                    logar("📥 Baixando legendas e informações do vídeo...")
+                else:
+                    logar("📥 Baixando vídeo e legendas do YouTube...")
+                midia = self._baixar('download', so_legendas=self.baixar_so_trechos)
+                biblioteca.registrar(midia)
+
+            self.video_id = midia.video_id
+            r.titulo, r.legenda_path, self.duracao_fonte = midia.titulo, midia.legenda_path, midia.duracao
+
+            if not self.baixar_so_trechos:
+                encontrado = None if midia.video_path else biblioteca.buscar_video(midia.video_id)
+                if midia.video_path:
+                    r.video_path = midia.video_path
+                    logar(f"✅ Vídeo baixado: {r.titulo}")
+                elif encontrado:
+                    r.video_path = encontrado[0]
+                    logar(f"📚 Vídeo já baixado: {os.path.basename(r.video_path)}")
+                else:
+                    logar("📥 Baixando vídeo do YouTube...")
+                    midia = self._baixar('download')
+                    biblioteca.registrar(midia)
+                    r.video_path = midia.video_path
+                    logar(f"✅ Vídeo baixado: {r.titulo}")
+            else:
+                logar(f"✅ Legendas prontas: {r.titulo}")
+        else:
+            if not os.path.exists(r.video_path):
+                raise ValueError(f"Arquivo de vídeo não encontrado: {r.video_path}")
+            if not os.path.exists(r.legenda_path):
+                raise ValueError(f"Arquivo de transcrição não encontrado: {r.legenda_path}")
+            r.titulo = os.path.splitext(os.path.basename(r.video_path))[0]
+            logar("📁 Usando arquivos locais:")
+            logar(f"   Vídeo: {os.path.basename(r.video_path)}")
+            logar(f"   Transcrição: {os.path.basename(r.legenda_path)}")
+
+    def preparar_legenda(self):
+        _verificar_cancelamento(self.agendador)
+        self.progresso('legenda', 0.0)
+        if self.limpar_legenda:
+            self.resultado.legenda_path = _limpar_legenda(self.resultado.legenda_path, self.logar,
+                                                          automatica=bool(self.url))
+        else:
+            self.logar("📝 Usando a legenda como está (já preparada).")
+        self.progresso('legenda', 1.0)
+
+    def planejar_cortes(self):
+        """Define os pontos de corte (manuais ou por IA) e mostra o plano."""
+        r, logar = self.resultado, self.logar
+        _verificar_cancelamento(self.agendador)
+        self.progresso('planejamento', 0.0)
+
+        if r.plano is not None:
+            logar("✂️ Usando o plano de cortes informado...")
+        elif self.modo == "manual":
+            # CORTES MANUAIS - sem limitação de duração
+            logar("✂️ Processando cortes manuais...")
+            r.plano = PlanoCortes.de_texto(self.cortes_raw)
+        else:
+            # CORTES AUTOMÁTICOS - com todas as validações e limitações
+            segmentos = TrilhaLegenda.de_arquivo(r.legenda_path)
+            logar("🤖 Detectando mudanças de assunto com IA...")
+            limites = {}
+            if self.formato == FORMATO_SHORTS:
+                # Assuntos na escala de um Short, não de um vídeo de 8 a 12 min
+                limites = {'intervalo_min': self.duracao_maxima_shorts / 2,
+                           'intervalo_max': self.duracao_maxima_shorts}
+            with span('deteccao', segmentos=len(segmentos)):
+                pontos = detectar_pontos_de_corte_semantico(segmentos, **limites)
+
+            # No Shorts o limite que vale é o do Short: o plano é dividido logo abaixo
+            limite = DURACAO_MAXIMA_CORTE
+            if self.formato == FORMATO_SHORTS:
+                limite = min(limite, self.duracao_maxima_shorts)
+            maximo = f"{limite / 60:g} min" if limite % 60 == 0 else f"{limite:g}s"
+            logar(f"⏱️ Validando duração dos cortes (máx {maximo})...")
+            if len(pontos) < 2:
+                raise ValueError("Poucos cortes: é necessário pelo menos 2 pontos de corte (início e fim).")
+            # Cortes automáticos não têm descrições
+            r.plano = PlanoCortes.de_pontos(validar_e_ajustar_cortes(pontos))
+
+        if self.formato == FORMATO_SHORTS:
+            total = len(r.plano)
+            r.plano = r.plano.dividido(self.duracao_maxima_shorts)
+            if len(r.plano) > total:
+                logar(f"📱 Cortes com mais de {self.duracao_maxima_shorts:g}s divididos para Shorts: "
+                      f"{total} → {len(r.plano)} partes.")
+        self.progresso('planejamento', 1.0)
+
+        logar(f"✂️ Cortando vídeo em {len(r.plano)} partes...")
+
+        # Mostrar os cortes que serão aplicados
+        for i, corte in enumerate(r.plano):
+            inicio = segundos_para_timestamp(corte.inicio)
+            fim = segundos_para_timestamp(corte.fim)
+            duracao_min = corte.duracao / 60
+            if corte.descricao:
+                logar(f"  📝 {corte.nome}: {inicio} → {fim} (duração: {duracao_min:.1f} min)")
+            else:
+                logar(f"  📹 Corte {i+1}: {inicio} → {fim} (duração: {duracao_min:.1f} min)")
+
+    def baixar_video(self):
+        """
+        Baixa o vídeo se obter_midia só trouxe a legenda: apenas o trecho
+        que contém os cortes, ou o vídeo inteiro se o trecho for quase tudo.
+        """
+        r, logar = self.resultado, self.logar
+        if r.video_path:
+            return
+        _verificar_cancelamento(self.agendador)
+
+        inicio = max(0, int(r.plano.inicio - self.margem_trecho))
+        fim = int(r.plano.fim + self.margem_trecho + 0.999)
+        if self.duracao_fonte:
+            fim = min(fim, int(self.duracao_fonte + 0.999))
+
+        biblioteca = self._biblioteca()
+        encontrado = biblioteca.buscar_video(self.video_id, inicio, fim)
+        if encontrado:
+            r.video_path, r.trecho = encontrado
+            logar(f"📚 Vídeo já baixado: {os.path.basename(r.video_path)}")
+        else:
+            if self.duracao_fonte and (fim - inicio) / self.duracao_fonte > FRACAO_MAXIMA_TRECHO:
+                logar("📥 Os cortes cobrem quase todo o vídeo: baixando o vídeo inteiro...")
+                midia = self._baixar('video')
+            else:
+                logar(f"📥 Baixando só o trecho {segundos_para_timestamp(inicio)} → {segundos_para_timestamp(fim)}...")
+                midia = self._baixar('video', trecho=(inicio, fim))
+            biblioteca.registrar(midia)
+            r.video_path, r.trecho = midia.video_path, midia.trecho
+            logar(f"✅ Vídeo baixado: {os.path.basename(r.video_path)}")
+
+        if r.trecho:
+            # No arquivo do trecho o tempo 0 é o início do trecho no original
+            inicio_trecho, fim_trecho = r.trecho
+            self.plano_render = r.plano.deslocado(-inicio_trecho)
+            self.legenda_render = os.path.splitext(r.video_path)[0] + ".srt"
+            (TrilhaLegenda.de_arquivo(r.legenda_path)
+             .fatia(inicio_trecho, fim_trecho).deslocar(-inicio_trecho).salvar(self.legenda_render))
+
+    def analisar_audio(self):
+        """
+        Com ajustar_ao_silencio (padrão AJUSTAR_AO_SILENCIO do .env), move
+        cada ponto do plano para a pausa mais próxima no áudio, até
+        janela_silencio segundos para qualquer lado. "auto" ajusta só os
+        cortes do modo auto: tempos digitados não mudam sem pedido. O áudio
+        é decodificado uma vez e o envelope fica em cache ao lado do vídeo.
+        """
+        r, logar = self.resultado, self.logar
+        ajustar = self.ajustar_ao_silencio
+        if ajustar == "auto":
+            ajustar = self.modo == "auto"
+        if not ajustar or not self.janela_silencio:
+            return
+        _verificar_cancelamento(self.agendador)
+        self.progresso('audio', 0.0)
+
+        logar("🔊 Procurando pausas no áudio perto dos pontos de corte...")
+        try:
+            envelope = obter_envelope(r.video_path)
+        except OSError as e:
+            envelope = None
+            logar(f"⚠️ Não foi possível ler o áudio ({e}).")
+        if envelope is None:
+            logar("⚠️ Sem envelope de áudio: os pontos de corte ficam como planejados.")
+        else:
+            inicio_trecho = r.trecho[0] if r.trecho else 0.0
+            anterior = r.plano
+            r.plano, movidos = ajustar_plano_ao_silencio(
+                r.plano, envelope, self.janela_silencio, deslocamento=inicio_trecho,
+            )
+            for antes, depois in zip(anterior, r.plano):
+                if (antes.inicio, antes.fim) != (depois.inicio, depois.fim):
+                    logar(f"  🔊 {depois.nome}: {segundos_para_timestamp(depois.inicio)} → "
+                          f"{segundos_para_timestamp(depois.fim)}")
+            if self.formato == FORMATO_SHORTS:
+                # A pausa pode ter esticado um corte além do máximo do Short
+                r.plano = r.plano.aparado(self.duracao_maxima_shorts)
+            if r.trecho:
+                self.plano_render = r.plano.deslocado(-inicio_trecho)
+            logar(f"✅ {movidos} ponto(s) de corte movido(s) para pausas no áudio.")
+        self.progresso('audio', 1.0)
+
+    def renderizar(self):
+        """
+        Renderiza os cortes planejados e retorna o ResultadoJob final.
+        Com previa, renderiza em baixa resolução numa subpasta de
+        PASTA_PREVIAS e grava ARQUIVO_PREVIA para aprovar_previa.
+        """
+        r, logar, progresso = self.resultado, self.logar, self.progresso
+        _verificar_cancelamento(self.agendador)
+
+        pasta_final = r.pasta_saida
+        if self.previa:
+            r.previa = True
+            r.pasta_saida = os.path.join(PASTA_PREVIAS, sanitizar_nome_arquivo(r.id or r.titulo or "previa"))
+            logar("👀 Renderizando prévias em baixa resolução...")
+
+        # Criar pasta de saída se não existir
+        if not os.path.exists(r.pasta_saida):
+            os.makedirs(r.pasta_saida)
+
+        # Executar os cortes
+        total_cortes = len(r.plano)
+        terminados = []
+        progresso('render', 0.0)
+
+        def _corte_terminou(res):
+            terminados.append(res)
+            progresso('corte', 1.0, nome=res.nome, eta=0)
+            progresso('render', len(terminados) / total_cortes)
+
+        r.resultados = cortar_video(
+            r.video_path, self.plano_render or r.plano, self.legenda_render or r.legenda_path, r.pasta_saida,
+            max_jobs_cpu=self.max_jobs_cpu, max_jobs_hw=self.max_jobs_hw,
+            modo_render=self.modo_render, perfil=self.perfil, agendador=self.agendador,
+            ao_terminar=_corte_terminou,
+            ao_progresso=lambda p: progresso('corte', p.fracao, nome=p.nome, eta=p.eta),
+            retomar=self.retomar, previa=self.previa, formato=self.formato, posicao_shorts=self.posicao_shorts,
+            logar=self.logar,
+        )
+
+        for res in r.resultados:
+            if res.reaproveitado:
+                logar(f"  ♻️ {res.nome} (já renderizado, sem mudanças)")
+            elif res.ok:
+                logar(f"  ✅ {res.nome} ({res.duracao:.1f}s)")
+            elif res.cancelado:
+                logar(f"  ⛔ {res.nome}: cancelado")
+            else:
+                logar(f"  ❌ {res.nome}: ffmpeg saiu com código {res.codigo}")
+                ultima_linha = res.stderr.strip().splitlines()[-1:]
+                if ultima_linha:
+                    logar(f"     {ultima_linha[0]}")
+
+        if self.agendador.cancelado:
+            r.erro = "Processamento cancelado."
+            logar("⛔ Processamento cancelado.")
+        elif r.falhas:
+            logar(f"⚠️ {len(r.falhas)} de {len(r.resultados)} cortes falharam.")
+        else:
+            logar("✅ Processamento finalizado com sucesso!")
+        logar(f"📁 Os cortes foram salvos em: {r.pasta_saida}")
+
+        if self.previa and not self.agendador.cancelado:
+            self._salvar_previa(pasta_final)
+        return r
+
+    def _salvar_previa(self, pasta_final):
+        """Grava na pasta da prévia os tempos, a legenda e o vídeo usados nela."""
+        r = self.resultado
+        dados = {
+            'id': r.id,
+            'titulo': r.titulo,
+            'video': os.path.abspath(r.video_path),
+            'legenda': os.path.abspath(self.legenda_render or r.legenda_path),
+            # No tempo do arquivo de vídeo (o trecho baixado, se for o caso)
+            'plano': (self.plano_render or r.plano).para_dict(),
+            'pasta_saida': os.path.abspath(pasta_final) if pasta_final else None,
+            'modo_render': self.modo_render,
+            'formato': self.formato,
+            'posicao_shorts': self.posicao_shorts,
+        }
+        caminho = os.path.join(r.pasta_saida, ARQUIVO_PREVIA)
+        with open(caminho + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        os.replace(caminho + ".tmp", caminho)
+        self.logar(f"👀 Confira as prévias e aprove os cortes com: cli.py aprovar \"{r.pasta_saida}\" [cortes...]")
+
+    def executar_etapa(self, etapa, metodo):
+        """Executa uma etapa (método de ETAPAS_PIPELINE) dentro de um span do Medidor."""
+        with self.medidor.span(etapa):
+            getattr(self, metodo)()
+
+    def salvar_relatorio(self):
+        """
+        Grava o relatório de métricas do job em JSON e o guarda no ResultadoJob.
+        Sem pasta de saída (o job falhou antes de defini-la), vai para
+        relatorios/ dentro de PASTA_CACHE. Roda no finally dos jobs, então
+        nenhum erro daqui pode esconder o resultado do job: só vira aviso.
+        """
+        r = self.resultado
+        try:
+            caminho = self.caminho_relatorio or os.path.join(
+                r.pasta_saida or PASTA_CACHE, PASTA_RELATORIOS,
+                f"{sanitizar_nome_arquivo(r.id or r.titulo or 'execucao')}_{time.strftime('%Y%m%d-%H%M%S')}.json",
+            )
+            r.metricas = self.medidor.salvar(
+                caminho, id=r.id, titulo=r.titulo, ok=r.ok, erro=r.erro,
+                modo_render=self.modo_render, cortes=len(r.plano) if r.plano else 0,
+            )
+        except Exception as e:
+            self.logar(f"⚠️ Não foi possível salvar o relatório de métricas: {e}")
+            return
+        r.relatorio_path = caminho
+        self.logar(f"📊 Relatório de métricas: {caminho}")
+
+
+# Etapas do Processamento na ordem, com o método que executa cada uma
+ETAPAS_PIPELINE = (
+    ('download', 'obter_midia'),
+    ('legenda', 'preparar_legenda'),
+    ('planejamento', 'planejar_cortes'),
+    ('video', 'baixar_video'),
+    ('audio', 'analisar_audio'),
+    ('render', 'renderizar'),
+)
+
+
+def processar(**argumentos):
+    """
+    Executa o fluxo completo para um vídeo: obtém vídeo e legenda (YouTube
+    ou arquivos locais), limpa a legenda, planeja os cortes (manual ou IA)
+    e renderiza. Aceita os mesmos argumentos de Processamento e retorna um
+    ResultadoJob.
+    Erros de entrada levantam ValueError; o restante propaga normalmente.
+    ao_progresso(etapa, fracao, nome=None, eta=None) recebe o andamento
+    (veja ETAPAS); pode ser chamado de outras threads. agendador.cancelar()
+    interrompe o job: entre etapas levanta ProcessamentoCancelado e durante
+    a renderização mata os ffmpeg em execução.
+    """
+    processamento = Processamento(**argumentos)
+    try:
+        for etapa, metodo in ETAPAS_PIPELINE:
+            processamento.executar_etapa(etapa, metodo)
+    except Exception as e:
+        processamento.resultado.erro = processamento.resultado.erro or str(e)
+        raise
+    finally:
+        processamento.salvar_relatorio()
+    return processamento.resultado
+
+
+def aprovar_previa(pasta_previa, nomes=None, **argumentos):
+    """
+    Renderiza em qualidade final só os cortes aprovados (nomes; None = todos)
+    de uma prévia feita com previa=True, com os mesmos tempos, legenda e
+    vídeo da prévia (sem novo download, nova limpeza da legenda nem novo
+    ajuste ao silêncio).
+    Aceita os argumentos de processar (pasta_saida, modo_render, perfil...);
+    por padrão usa a pasta de saída e o modo do job original.
+    Levanta ValueError se a prévia não existe ou um nome não está nela.
+    """
+    try:
+        with open(os.path.join(pasta_previa, ARQUIVO_PREVIA), 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Prévia não encontrada em {pasta_previa}: {e}")
+
+    plano = PlanoCortes.de_dict(dados['plano'])
+    if nomes:
+        desconhecidos = set(nomes) - {c.nome for c in plano}
+        if desconhecidos:
+            raise ValueError(f"Cortes que não estão na prévia: {', '.join(sorted(desconhecidos))}")
+        plano = PlanoCortes([c for c in plano if c.nome in nomes])
+
+    opcoes = {chave: dados.get(chave) for chave in ('id', 'pasta_saida', 'modo_render', 'formato', 'posicao_shorts')}
+    opcoes.update({k: v for k, v in argumentos.items() if v is not None})
+    # Os tempos e a legenda da prévia já passaram pelo ajuste ao silêncio e pela limpeza
+    opcoes.update(ajustar_ao_silencio=False, limpar_legenda=False, previa=False)
+    return processar(video_path=dados['video'], legenda_path=dados['legenda'], plano=plano, **opcoes)
+
+
+# ================= LOTE ==============
+
+def _resolver(caminho, base):
+    if caminho and not os.path.isabs(caminho):
+        return os.path.join(base, caminho)
+    return caminho
+
+
+def normalizar_job(bruto, base, indice):
+    """Converte uma entrada do manifesto nos argumentos de processar()."""
+    job = {k: (v.strip() if isinstance(v, str) else v) for k, v in bruto.items() if v not in (None, "")}
+
+    cortes_raw = job.get('cortes')
+    if isinstance(cortes_raw, str):
+        # No CSV os cortes vêm numa célula só, separados por "|"
+        cortes_raw = cortes_raw.split("|")
+    if job.get('cortes_arquivo'):
+        cortes_raw = ler_arquivo_cortes(_resolver(job['cortes_arquivo'], base))
+    plano = job.get('plano')
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    if isinstance(plano, list):
+        # Mesmo formato de "cortes" na saída --json do cli.py
+        plano = {'cortes': plano}
+    if plano is not None:
+        plano = PlanoCortes.de_dict(plano)
+
+    return {
+        'id': job.get('id') or f"job_{indice:03d}",
+        'url': job.get('url'),
+        'video_path': _resolver(job.get('video'), base),
+        'legenda_path': _resolver(job.get('legenda'), base),
+        'modo': job.get('modo', 'manual'),
+        'cortes_raw': cortes_raw,
+        'plano': plano,
+        'pasta_saida': _resolver(job.get('saida'), base),
+        'modo_render': job.get('modo_render'),
+        'formato': job.get('formato'),
+    }
+
+
+def _expandir_playlist(bruto, biblioteca=None):
+    """
+    Troca um job com "playlist" por um job (url) para cada vídeo dela; com
+    biblioteca, os que já estão no arquivo de downloads dela ficam de fora.
+    """
+    id_base = bruto.get('id') or "playlist"
+    jobs = []
+    for video_id, url in listar_playlist(bruto['playlist']):
+        if biblioteca and biblioteca.no_arquivo_downloads(video_id):
+            continue
+        job = {k: v for k, v in bruto.items() if k != 'playlist'}
+        job.update({'url': url, 'id': f"{id_base}_{video_id}"})
+        jobs.append(job)
+    return jobs
+
+
+def carregar_manifesto(caminho, pasta_videos=None, pular_baixados=False):
+    """
+    Lê um manifesto de lote em JSON ou CSV e retorna a lista de jobs.
+
+    JSON: uma lista de objetos (ou {"jobs": [...]}) com os campos
+      url | playlist | video + legenda, modo ("manual"/"auto"), cortes (lista
+      no formato "HH:MM:SS - Descrição"), cortes_arquivo ou plano (PlanoCortes
+      em JSON, como os "cortes" da saída --json), e opcionalmente saida,
+      modo_render, formato ("original"/"shorts") e id.
+    CSV: as mesmas colunas; cortes inline separados por "|".
+    Caminhos relativos são resolvidos a partir da pasta do manifesto.
+    Um job com playlist vira um job por vídeo; com pular_baixados, vídeos
+    (de playlist ou url) que já estão no arquivo de downloads da pasta de
+    vídeos (o mesmo do --download-archive do yt-dlp) ficam de fora.
+    """
+    base = os.path.dirname(os.path.abspath(caminho))
+    if caminho.lower().endswith('.csv'):
+        with open(caminho, 'r', encoding='utf-8', newline='') as f:
+            brutos = list(csv.DictReader(f))
+    else:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        brutos = dados.get('jobs', []) if isinstance(dados, dict) else dados
+
+    biblioteca = obter_biblioteca(pasta_videos or PASTA_VIDEOS) if pular_baixados else None
+    expandidos = []
+    for bruto in brutos:
+        if bruto.get('playlist'):
+            expandidos += _expandir_playlist(bruto, biblioteca)
+        elif biblioteca and bruto.get('url') and biblioteca.no_arquivo_downloads(extrair_id_video(bruto['url'])):
+            continue
+        else:
+            expandidos.append(bruto)
+
+    return [normalizar_job(bruto, base, i) for i, bruto in enumerate(expandidos, start=1)]
+
+
+# Quantos vídeos cada etapa processa ao mesmo tempo no lote.
+# O download é limitado pela rede e a renderização pelo AgendadorRender,
+# então só ela precisa de poucas vagas; a legenda e o planejamento são rápidos
+# (o modelo de IA é um só por processo).
+LIMITES_ETAPAS = {
+    'download': 2,
+    'legenda': 1,
+    'planejamento': 1,
+    'video': 2,
+    'audio': 2,
+    'render': 2,
+}
+
+# Vídeos que podem ficar esperando entre uma etapa e a seguinte. Limita
+# quantos downloads ficam prontos (ocupando disco) à frente da renderização.
+TAMANHO_FILA_ETAPAS = 2
+
+_FIM = object()
+
+
+def _executar_em_etapas(itens, etapas, tamanho_fila=TAMANHO_FILA_ETAPAS):
+    """
+    Passa os itens por uma cadeia produtor/consumidor: etapas é uma lista
+    de (funcao, trabalhadores), ligadas por filas limitadas a tamanho_fila.
+    Cada etapa tem suas próprias threads, então o item N+1 pode estar numa
+    etapa enquanto o item N está na seguinte; o ritmo do lote fica o da
+    etapa mais lenta, não a soma delas.
+    funcao(item) retorna True para seguir adiante ou False para pular as
+    etapas restantes (ex.: falhou). Retorna os itens na ordem recebida.
+    """
+    filas = [queue.Queue(maxsize=max(1, tamanho_fila)) for _ in etapas] + [queue.Queue()]
+    threads = []
+
+    def _trabalhador(entrada, saida, funcao, restantes):
+        while True:
+            item = entrada.get()
+            if item is _FIM:
+                entrada.put(_FIM)  # devolve para os outros trabalhadores da etapa
+                with restantes['lock']:
+                    restantes['n'] -= 1
+                    ultimo = restantes['n'] == 0
+                if ultimo:
+                    saida.put(_FIM)
+                return
+            indice, valor, seguir = item
+            if seguir:
+                seguir = funcao(valor)
+            saida.put((indice, valor, seguir))
+
+    for i, (funcao, trabalhadores) in enumerate(etapas):
+        trabalhadores = max(1, trabalhadores)
+        restantes = {'n': trabalhadores, 'lock': threading.Lock()}
+        for _ in range(trabalhadores):
+            t = threading.Thread(target=_trabalhador, args=(filas[i], filas[i + 1], funcao, restantes), daemon=True)
+            t.start()
+            threads.append(t)
+
+    itens = list(itens)
+
+    def _produzir():
+        for indice, valor in enumerate(itens):
+            filas[0].put((indice, valor, True))
+        filas[0].put(_FIM)
+
+    produtor = threading.Thread(target=_produzir, daemon=True)
+    produtor.start()
+
+    saidas = [None] * len(itens)
+    while True:
+        item = filas[-1].get()
+        if item is _FIM:
+            break
+        indice, valor, _ = item
+        saidas[indice] = valor
+    return saidas
+
+
+def processar_lote(jobs, concorrencia=None, pasta_saida=None, logar=print,
+                   max_jobs_cpu=None, max_jobs_hw=None, limites=None,
+                   tamanho_fila=TAMANHO_FILA_ETAPAS, **opcoes):
+    """
+    Processa vários jobs (como os de carregar_manifesto) em pipeline:
+    download → legenda → planejamento → renderização, cada etapa com seu
+    limite de vídeos simultâneos (LIMITES_ETAPAS, sobrescritos por limites)
+    e filas limitadas entre elas, de modo que o vídeo seguinte baixa
+    enquanto o atual renderiza. concorrencia, se dado, vale para todas as
+    etapas que não estão em limites.
+    Todos compartilham um único AgendadorRender, então o limite de ffmpeg
+    simultâneos vale para o lote inteiro. Jobs sem pasta de saída própria
+    vão para uma subpasta com o id do job. Um job que falha não interrompe
+    os outros. Retorna um ResultadoJob por job, na ordem recebida.
+    """
+    pasta_saida = pasta_saida or PASTA_CORTES
+    agendador = AgendadorRender(max_cpu=max_jobs_cpu, max_hw=max_jobs_hw)
+    trava_log = threading.Lock()
+
+    limites_etapas = dict(LIMITES_ETAPAS)
+    if concorrencia:
+        limites_etapas.update({etapa: concorrencia for etapa in limites_etapas})
+    limites_etapas.update(limites or {})
+
+    def _logar_job(id_job):
+        def logar_job(msg):
+            with trava_log:
+                logar(f"[{id_job}] {msg}")
+        return logar_job
+
+    def _preparar(job):
+        """Monta o Processamento do job; entradas inválidas viram ResultadoJob com erro."""
+        job = dict(job)
+        id_job = job.pop('id')
+        if not job.get('pasta_saida'):
+            job['pasta_saida'] = os.path.join(pasta_saida, sanitizar_nome_arquivo(id_job))
+        # Campos vazios do job não sobrescrevem as opções do lote
+        argumentos = {**opcoes, **{k: v for k, v in job.items() if v is not None}}
+        try:
+            return Processamento(id=id_job, agendador=agendador, logar=_logar_job(id_job), **argumentos)
+        except ValueError as e:
+            _logar_job(id_job)(f"⚠️ {e}")
+            return ResultadoJob(id=id_job, erro=str(e))
+
+    def _etapa(etapa, metodo):
+        def executar(processamento):
+            if isinstance(processamento, ResultadoJob):
+                return False
+            logar_job = processamento.logar
+            try:
+                processamento.executar_etapa(etapa, metodo)
+                if etapa == ETAPAS_PIPELINE[-1][0]:
+                    processamento.salvar_relatorio()
+                return True
+            except ProcessamentoCancelado as e:
+                logar_job(f"⛔ {e}")
+                processamento.resultado.erro = str(e)
+            except ValueError as e:
+                logar_job(f"⚠️ {e}")
+                processamento.resultado.erro = str(e)
+            except Exception as e:
+                logar_job(f"❌ Erro durante o processamento: {e}")
+                logar_job(f"🔍 Detalhes do erro: {traceback.format_exc()}")
+                processamento.resultado.erro = str(e)
+            processamento.salvar_relatorio()
+            return False
+        return executar
+
+    etapas = [(_etapa(etapa, metodo), limites_etapas.get(etapa, 1)) for etapa, metodo in ETAPAS_PIPELINE]
+    processados = _executar_em_etapas([_preparar(job) for job in jobs], etapas, tamanho_fila)
+    return [p if isinstance(p, ResultadoJob) else p.resultado for p in processados]
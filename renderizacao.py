@@ -0,0 +1,1029 @@
+import os
+import re
+import json
+import bisect
+import hashlib
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import ENCODER, PERFIL_ENCODE, ALTURA_PREVIA
+from biblioteca import assinatura_arquivo
+from encoders import PERFIL_PREVIA, escolher_encoder, perfil_encoder, perfil_para_host
+from legendas import TrilhaLegenda
+from metricas import medidor_atual, span_atual, rss_pico_mb
+
+# ============ AGENDADOR DE RENDERIZAÇÃO ============
+
+# Quantos caracteres finais do stderr do ffmpeg guardar por job
+LIMITE_STDERR = 4000
+
+# Código de saída usado para jobs cancelados (antes ou durante o ffmpeg)
+CODIGO_CANCELADO = -15
+# Segundos entre o pedido de término do ffmpeg e o kill forçado
+ESPERA_CANCELAMENTO = 5
+
+# Modos de renderização do cortar_video
+MODO_RENDER_PARALELO = "paralelo"  # um ffmpeg por corte
+MODO_RENDER_UNICO = "unico"        # um ffmpeg decodifica a fonte uma vez para todos os cortes
+MODO_RENDER_COPIA = "copia"        # sem reencode: cortes alinhados ao keyframe mais próximo
+MODO_RENDER_INTELIGENTE = "inteligente"  # reencoda só o GOP inicial, copia o resto
+MODOS_RENDER = (MODO_RENDER_PARALELO, MODO_RENDER_UNICO, MODO_RENDER_COPIA, MODO_RENDER_INTELIGENTE)
+MODOS_SEM_REENCODE = (MODO_RENDER_COPIA, MODO_RENDER_INTELIGENTE)
+
+
+def _ler_limite_env(nome, padrao):
+    valor = os.getenv(nome)
+    if not valor:
+        return padrao
+    try:
+        return max(1, int(valor))
+    except ValueError:
+        return padrao
+
+
+def limites_padrao():
+    """
+    Limites de jobs simultâneos (cpu, hw).
+    CPU: metade dos núcleos (cada ffmpeg já usa várias threads).
+    HW: 2 sessões, que é o limite comum de NVENC em placas de consumo.
+    Ambos podem ser sobrescritos por RENDER_JOBS_CPU e RENDER_JOBS_HW no .env.
+    """
+    cpu = max(1, (os.cpu_count() or 2) // 2)
+    return _ler_limite_env("RENDER_JOBS_CPU", cpu), _ler_limite_env("RENDER_JOBS_HW", 2)
+
+
+class JobRender:
+    """
+    Um comando ffmpeg a ser executado pelo agendador.
+    comando pode ser uma lista de comandos, executados em sequência (o job
+    para no primeiro que falhar). Arquivos em temporarios são apagados ao final.
+    duracao (segundos de saída esperados) permite acompanhar o progresso.
+    """
+
+    def __init__(self, nome, comando, saida, hardware=False, temporarios=None, duracao=None):
+        self.nome = nome
+        self.comando = comando
+        self.saida = saida
+        self.hardware = hardware
+        self.temporarios = temporarios or []
+        self.duracao = duracao
+
+    @property
+    def comandos(self):
+        if self.comando and isinstance(self.comando[0], (list, tuple)):
+            return list(self.comando)
+        return [self.comando]
+
+
+class ResultadoRender:
+    """
+    Resultado de um JobRender: código de saída, stderr e tempo gasto.
+    metricas traz o que foi medido do ffmpeg (veja AgendadorRender._executar).
+    """
+
+    def __init__(self, nome, saida, codigo, stderr, duracao, reaproveitado=False, metricas=None):
+        self.nome = nome
+        self.saida = saida
+        self.codigo = codigo
+        self.stderr = stderr
+        self.duracao = duracao
+        # True quando a saída já existia com a mesma chave no manifesto
+        self.reaproveitado = reaproveitado
+        self.metricas = metricas or {}
+
+    @property
+    def ok(self):
+        return self.codigo == 0
+
+    @property
+    def cancelado(self):
+        return self.codigo == CODIGO_CANCELADO
+
+    def __repr__(self):
+        estado = "ok" if self.ok else f"erro {self.codigo}"
+        return f"ResultadoRender({self.nome!r}, {estado}, {self.duracao:.1f}s)"
+
+
+class ProgressoRender:
+    """Andamento de um job, lido do -progress do ffmpeg (tempos em segundos)."""
+
+    def __init__(self, nome, feito, total, eta=None):
+        self.nome = nome
+        self.feito = feito
+        self.total = total
+        self.eta = eta
+
+    @property
+    def fracao(self):
+        return min(1.0, self.feito / self.total) if self.total else 0.0
+
+
+def _ler_progresso(fluxo, nome, total, ao_progresso):
+    """
+    Consome a saída de `-progress pipe:1` (blocos chave=valor terminados
+    por progress=continue/end) e chama ao_progresso a cada bloco.
+    O ETA é extrapolado do tempo de parede gasto até agora.
+    Retorna os valores do último bloco (fps, speed, total_size...).
+    """
+    inicio = time.perf_counter()
+    feito = 0.0
+    ultimo = {}
+    for linha in fluxo:
+        chave, _, valor = linha.decode('utf-8', errors='replace').strip().partition('=')
+        ultimo[chave] = valor
+        # out_time_ms também vem em microssegundos (nome histórico do ffmpeg)
+        if chave in ('out_time_us', 'out_time_ms'):
+            try:
+                feito = max(0.0, int(valor) / 1_000_000)
+            except ValueError:
+                pass
+        elif chave == 'progress':
+            fracao = min(1.0, feito / total) if total else 0.0
+            if valor == 'end':
+                fracao, feito = 1.0, total
+            decorrido = time.perf_counter() - inicio
+            eta = decorrido * (1 - fracao) / fracao if fracao > 0 else None
+            ao_progresso(ProgressoRender(nome, min(feito, total), total, eta))
+    return ultimo
+
+
+_RE_FPS = re.compile(r'fps=\s*([\d.]+)')
+_RE_VELOCIDADE = re.compile(r'speed=\s*([\d.]+)x')
+
+
+def _velocidade_encode(progresso, stderr):
+    """
+    (fps, velocidade em x tempo real) do encode: do último bloco do
+    -progress, ou da última linha de estatísticas do stderr.
+    """
+    fps = progresso.get('fps') or next(iter(_RE_FPS.findall(stderr)[-1:]), None)
+    velocidade = (progresso.get('speed') or '').rstrip('x') or next(iter(_RE_VELOCIDADE.findall(stderr)[-1:]), None)
+    try:
+        fps = float(fps) if fps else None
+    except ValueError:
+        fps = None
+    try:
+        velocidade = float(velocidade) if velocidade else None
+    except ValueError:
+        velocidade = None
+    return fps, velocidade
+
+
+def _esperar(proc):
+    """Espera o ffmpeg sair e retorna o rusage dele (None onde os.wait4 não existe)."""
+    if not hasattr(os, 'wait4'):
+        proc.wait()
+        return None
+    try:
+        _, status, uso = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        # Já coletado (ex.: poll() do kill forçado no cancelamento)
+        proc.wait()
+        return None
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return uso
+
+
+class AgendadorRender:
+    """
+    Executa vários jobs de ffmpeg ao mesmo tempo.
+    Jobs de CPU e de hardware têm limites separados, de modo que um encode
+    em NVENC não ocupa a vaga de um libx264 e vice-versa.
+    """
+
+    def __init__(self, max_cpu=None, max_hw=None):
+        cpu_padrao, hw_padrao = limites_padrao()
+        self.max_cpu = max_cpu or cpu_padrao
+        self.max_hw = max_hw or hw_padrao
+        self._sem_cpu = threading.Semaphore(self.max_cpu)
+        self._sem_hw = threading.Semaphore(self.max_hw)
+        self._cancelado = threading.Event()
+        self._lock = threading.Lock()
+        self._processos = set()
+
+    @property
+    def cancelado(self):
+        return self._cancelado.is_set()
+
+    def cancelar(self):
+        """
+        Cancela tudo: jobs na fila não começam e os ffmpeg em execução
+        recebem SIGTERM (o kill vem ESPERA_CANCELAMENTO segundos depois
+        se algum não sair). Não bloqueia, pode ser chamado de qualquer thread.
+        """
+        self._cancelado.set()
+        with self._lock:
+            processos = list(self._processos)
+        for proc in processos:
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+
+        def _forcar():
+            for proc in processos:
+                if proc.poll() is None:
+                    try:
+                        proc.kill()
+                    except OSError:
+                        pass
+
+        if processos:
+            temporizador = threading.Timer(ESPERA_CANCELAMENTO, _forcar)
+            temporizador.daemon = True
+            temporizador.start()
+
+    def _executar(self, job, ao_progresso=None):
+        """
+        Roda os comandos do job. ResultadoRender.metricas soma os comandos:
+        cpu_s (usuário + sistema do ffmpeg), rss_pico_mb, bytes_lidos_disco
+        (blocos lidos do disco, sem o que veio do cache de páginas) e
+        bytes_escritos (tamanho das saídas); fps e velocidade (x tempo real)
+        são os do último comando, que gera a saída final.
+        """
+        semaforo = self._sem_hw if job.hardware else self._sem_cpu
+        with semaforo:
+            inicio = time.perf_counter()
+            codigo, stderr = 0, ""
+            metricas = {'cpu_s': 0.0, 'rss_pico_mb': 0.0, 'bytes_lidos_disco': 0}
+            comandos = job.comandos
+            try:
+                for i, comando in enumerate(comandos):
+                    # Só o último comando gera a saída final: é ele que mostra progresso
+                    ultimo = i == len(comandos) - 1
+                    progresso = ao_progresso if ultimo and job.duracao else None
+                    codigo, stderr, medidas = self._rodar(comando, job, progresso)
+                    uso = medidas.get('uso')
+                    if uso is not None:
+                        metricas['cpu_s'] += uso.ru_utime + uso.ru_stime
+                        metricas['rss_pico_mb'] = max(metricas['rss_pico_mb'], rss_pico_mb(uso))
+                        metricas['bytes_lidos_disco'] += uso.ru_inblock * 512
+                    metricas['fps'], metricas['velocidade'] = medidas.get('fps'), medidas.get('velocidade')
+                    if codigo != 0:
+                        break
+                saidas = job.saida if isinstance(job.saida, list) else [job.saida]
+                metricas['bytes_escritos'] = sum(os.path.getsize(s) for s in saidas if os.path.exists(s))
+                metricas['cpu_s'] = round(metricas['cpu_s'], 3)
+            finally:
+                apagar = list(job.temporarios)
+                if codigo == CODIGO_CANCELADO:
+                    # Saída parcial de um job cancelado não serve para nada
+                    apagar += job.saida if isinstance(job.saida, list) else [job.saida]
+                for caminho in apagar:
+                    try:
+                        os.remove(caminho)
+                    except OSError:
+                        pass
+            duracao = time.perf_counter() - inicio
+        return ResultadoRender(job.nome, job.saida, codigo, stderr[-LIMITE_STDERR:], duracao, metricas=metricas)
+
+    def _rodar(self, comando, job=None, ao_progresso=None):
+        """Executa um comando; retorna (código, stderr, medidas do ffmpeg: uso, fps, velocidade)."""
+        if ao_progresso:
+            comando = [comando[0], '-progress', 'pipe:1', '-nostats', *comando[1:]]
+
+        with self._lock:
+            if self._cancelado.is_set():
+                return CODIGO_CANCELADO, "Cancelado antes de iniciar.", {}
+            try:
+                proc = subprocess.Popen(
+                    comando,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE if ao_progresso else subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                )
+            except OSError as e:
+                return -1, str(e), {}
+            self._processos.add(proc)
+
+        progresso = {}
+        try:
+            if ao_progresso:
+                # stderr é drenado em paralelo para o ffmpeg não travar com o pipe cheio
+                blocos = []
+                leitor = threading.Thread(target=lambda: blocos.append(proc.stderr.read()), daemon=True)
+                leitor.start()
+                progresso = _ler_progresso(proc.stdout, job.nome, job.duracao, ao_progresso)
+                uso = _esperar(proc)
+                leitor.join()
+                stderr = b"".join(blocos)
+            else:
+                stderr = proc.stderr.read()
+                uso = _esperar(proc)
+        finally:
+            for fluxo in (proc.stdout, proc.stderr):
+                if fluxo:
+                    fluxo.close()
+            with self._lock:
+                self._processos.discard(proc)
+
+        stderr = stderr.decode('utf-8', errors='replace')
+        fps, velocidade = _velocidade_encode(progresso, stderr)
+        medidas = {'uso': uso, 'fps': fps, 'velocidade': velocidade}
+        if proc.returncode != 0 and self._cancelado.is_set():
+            return CODIGO_CANCELADO, stderr, medidas
+        return proc.returncode, stderr, medidas
+
+    def executar(self, jobs, ao_terminar=None, ao_progresso=None):
+        """
+        Executa todos os jobs e retorna os resultados na mesma ordem.
+        ao_terminar(resultado) é chamado assim que cada job termina e
+        ao_progresso(ProgressoRender) durante o encode dos jobs com duracao.
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return []
+
+        # Threads só esperam o ffmpeg; o limite real fica nos semáforos
+        max_threads = min(len(jobs), self.max_cpu + self.max_hw)
+        resultados = [None] * len(jobs)
+
+        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+            futuros = {executor.submit(self._executar, job, ao_progresso): idx for idx, job in enumerate(jobs)}
+            for futuro in as_completed(futuros):
+                resultado = futuro.result()
+                resultados[futuros[futuro]] = resultado
+                if ao_terminar:
+                    ao_terminar(resultado)
+
+        return resultados
+
+
+# ============ DECODIFICAÇÃO ÚNICA (VÁRIAS SAÍDAS) ============
+
+class ParteRender:
+    """
+    Um corte já planejado: tempos (s), cadeia de filtros de vídeo e arquivo
+    de saída. inteligente=True faz um corte do modo "copia" seguir o
+    caminho do corte inteligente (tempos exatos).
+    """
+
+    def __init__(self, nome, inicio_sec, fim_sec, filtro_video, saida, inteligente=False):
+        self.nome = nome
+        self.inicio_sec = inicio_sec
+        self.fim_sec = fim_sec
+        self.filtro_video = filtro_video
+        self.saida = saida
+        self.inteligente = inteligente
+
+
+def montar_comando_decodificacao_unica(video_path, partes, args_codec, args_entrada=()):
+    """
+    Monta um único comando ffmpeg que lê e decodifica video_path uma vez e
+    distribui os quadros para todas as partes (split/asplit + trim/atrim).
+    A entrada é posicionada no início da primeira parte e lida só até o fim
+    da última, então trechos fora dos cortes não são decodificados.
+    """
+    base = min(p.inicio_sec for p in partes)
+    fim_total = max(p.fim_sec for p in partes)
+    n = len(partes)
+
+    grafo = [
+        "[0:v]split=%d%s" % (n, "".join(f"[v{i}]" for i in range(n))),
+        "[0:a]asplit=%d%s" % (n, "".join(f"[a{i}]" for i in range(n))),
+    ]
+    for i, parte in enumerate(partes):
+        ini = parte.inicio_sec - base
+        fim = parte.fim_sec - base
+        grafo.append(f"[v{i}]trim=start={ini}:end={fim},setpts=PTS-STARTPTS,{parte.filtro_video}[vo{i}]")
+        grafo.append(f"[a{i}]atrim=start={ini}:end={fim},asetpts=PTS-STARTPTS[ao{i}]")
+
+    comando = [
+        'ffmpeg', '-y', '-hide_banner',
+        '-ss', f"{base:.3f}",
+        '-to', f"{fim_total:.3f}",
+        *args_entrada,
+        '-i', video_path,
+        '-filter_complex', ";".join(grafo),
+    ]
+    for i, parte in enumerate(partes):
+        comando += ['-map', f'[vo{i}]', '-map', f'[ao{i}]', *args_codec, parte.saida]
+    return comando
+
+
+def renderizar_decodificacao_unica(video_path, partes, args_codec, hardware, args_entrada=(),
+                                   max_jobs_cpu=None, max_jobs_hw=None, ao_terminar=None,
+                                   agendador=None, ao_progresso=None):
+    """
+    Renderiza as partes decodificando a fonte uma única vez.
+    Com encoder de CPU todas as saídas saem de um só ffmpeg. Com encoder de
+    hardware cada ffmpeg abre uma sessão por saída, então as partes são
+    divididas em grupos de max_jobs_hw saídas, executados um de cada vez.
+    Um agendador compartilhado pode ser passado; nesse caso os grupos seguem
+    os limites dele.
+    Retorna um ResultadoRender por parte.
+    """
+    if not partes:
+        return []
+
+    agendador = agendador or AgendadorRender(max_cpu=max_jobs_cpu, max_hw=1)
+    if hardware:
+        tamanho_grupo = max_jobs_hw or limites_padrao()[1]
+    else:
+        tamanho_grupo = len(partes)
+
+    grupos = [partes[i:i + tamanho_grupo] for i in range(0, len(partes), tamanho_grupo)]
+    grupos_por_job = {}
+    jobs = []
+    for idx, grupo in enumerate(grupos, start=1):
+        nome = f"grupo_{idx:02d}"
+        comando = montar_comando_decodificacao_unica(video_path, grupo, args_codec, args_entrada)
+        duracao = max(p.fim_sec for p in grupo) - min(p.inicio_sec for p in grupo)
+        jobs.append(JobRender(nome, comando, [p.saida for p in grupo], hardware=hardware, duracao=duracao))
+        grupos_por_job[nome] = grupo
+
+    posicao = {id(p): i for i, p in enumerate(partes)}
+    resultados = [None] * len(partes)
+
+    def _grupo_terminou(resultado_grupo):
+        for parte in grupos_por_job[resultado_grupo.nome]:
+            # As medidas do ffmpeg são do grupo inteiro, não da parte
+            resultado = ResultadoRender(
+                parte.nome, parte.saida, resultado_grupo.codigo,
+                resultado_grupo.stderr, resultado_grupo.duracao,
+                metricas={**resultado_grupo.metricas, 'grupo': resultado_grupo.nome},
+            )
+            resultados[posicao[id(parte)]] = resultado
+            if ao_terminar:
+                ao_terminar(resultado)
+
+    def _progresso_grupo(progresso):
+        # O tempo do grupo conta a partir do início da primeira parte dele
+        grupo = grupos_por_job[progresso.nome]
+        base = min(p.inicio_sec for p in grupo)
+        for parte in grupo:
+            total = parte.fim_sec - parte.inicio_sec
+            feito = min(max(0.0, base + progresso.feito - parte.inicio_sec), total)
+            ao_progresso(ProgressoRender(parte.nome, feito, total, progresso.eta))
+
+    agendador.executar(jobs, ao_terminar=_grupo_terminou,
+                       ao_progresso=_progresso_grupo if ao_progresso else None)
+    return resultados
+
+
+# ============ ÍNDICE DE KEYFRAMES / CORTE SEM REENCODE ============
+
+# Encoder usado para reencodar o GOP inicial no corte inteligente,
+# por codec da fonte (precisa ser o mesmo codec para o concat funcionar)
+ENCODER_POR_CODEC = {
+    'h264': 'libx264',
+    'hevc': 'libx265',
+}
+
+# Perfis do ffprobe -> -profile:v do encoder; fora daqui o trecho reencodado
+# não casaria com o stream copiado
+PERFIS_X264 = {
+    'Constrained Baseline': 'baseline',
+    'Baseline': 'baseline',
+    'Main': 'main',
+    'High': 'high',
+    'High 10': 'high10',
+    'High 4:2:2': 'high422',
+    'High 4:4:4 Predictive': 'high444',
+}
+PERFIS_X265 = {
+    'Main': 'main',
+    'Main 10': 'main10',
+}
+
+# Sobe quando o índice em cache passa a ter campos novos (força novo probe)
+VERSAO_INDICE_KEYFRAMES = 2
+
+# Menor corte (s) aceito no modo cópia depois do alinhamento aos keyframes
+DURACAO_MINIMA_COPIA = 0.05
+
+_indices_keyframes = {}
+
+
+def _caminho_indice_keyframes(video_path):
+    return video_path + ".keyframes.json"
+
+
+def _probe_keyframes(video_path):
+    """Lê os pacotes de vídeo com ffprobe (sem decodificar) e retorna o índice."""
+    info = subprocess.run([
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'stream=codec_name,profile,level,pix_fmt,time_base,r_frame_rate',
+        '-of', 'json', video_path,
+    ], capture_output=True, text=True, check=True)
+    stream = (json.loads(info.stdout).get('streams') or [{}])[0]
+
+    pacotes = subprocess.run([
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0', video_path,
+    ], capture_output=True, text=True, check=True)
+
+    keyframes = []
+    for linha in pacotes.stdout.splitlines():
+        pts, _, flags = linha.partition(',')
+        if 'K' in flags and pts not in ('', 'N/A'):
+            keyframes.append(float(pts))
+    keyframes.sort()
+
+    return {
+        'versao': VERSAO_INDICE_KEYFRAMES,
+        'codec': stream.get('codec_name'),
+        'perfil': stream.get('profile'),
+        'nivel': stream.get('level'),
+        'pix_fmt': stream.get('pix_fmt'),
+        'time_base': stream.get('time_base'),
+        'fps': stream.get('r_frame_rate'),
+        'keyframes': keyframes,
+    }
+
+
+def obter_indice_keyframes(video_path):
+    """
+    Retorna o índice de keyframes do vídeo ({'codec', 'perfil', 'nivel',
+    'pix_fmt', 'time_base', 'fps', 'keyframes'}).
+    O probe roda uma vez só: o resultado fica em memória e num arquivo
+    .keyframes.json ao lado do vídeo, invalidado se o vídeo mudar.
+    """
+    assinatura = assinatura_arquivo(video_path)
+    em_memoria = _indices_keyframes.get(video_path)
+    if em_memoria and em_memoria['assinatura'] == assinatura:
+        return em_memoria
+
+    caminho_cache = _caminho_indice_keyframes(video_path)
+    indice = None
+    if os.path.exists(caminho_cache):
+        try:
+            with open(caminho_cache, 'r', encoding='utf-8') as f:
+                indice = json.load(f)
+            if indice.get('assinatura') != assinatura or indice.get('versao') != VERSAO_INDICE_KEYFRAMES:
+                indice = None
+        except (OSError, ValueError):
+            indice = None
+
+    if indice is None:
+        indice = _probe_keyframes(video_path)
+        indice['assinatura'] = assinatura
+        try:
+            with open(caminho_cache, 'w', encoding='utf-8') as f:
+                json.dump(indice, f)
+        except OSError:
+            pass  # sem permissão de escrita: fica só o cache em memória
+
+    _indices_keyframes[video_path] = indice
+    return indice
+
+
+def keyframe_mais_proximo(keyframes, tempo):
+    """Keyframe mais próximo de tempo (em segundos)."""
+    if not keyframes:
+        return tempo
+    pos = bisect.bisect_left(keyframes, tempo)
+    candidatos = keyframes[max(0, pos - 1):pos + 1]
+    return min(candidatos, key=lambda k: abs(k - tempo))
+
+
+def keyframe_anterior(keyframes, tempo, tolerancia=0.001):
+    """Último keyframe em ou antes de tempo (0.0 se não houver)."""
+    pos = bisect.bisect_right(keyframes, tempo + tolerancia)
+    return keyframes[pos - 1] if pos else 0.0
+
+
+def proximo_keyframe(keyframes, tempo, tolerancia=0.001):
+    """Primeiro keyframe em ou depois de tempo, ou None."""
+    pos = bisect.bisect_left(keyframes, tempo - tolerancia)
+    return keyframes[pos] if pos < len(keyframes) else None
+
+
+def comando_copia(video_path, inicio_sec, fim_sec, saida):
+    """Corte por cópia de stream; inicio_sec deve estar num keyframe."""
+    return [
+        'ffmpeg', '-y', '-hide_banner',
+        '-ss', f"{inicio_sec:.3f}",
+        '-to', f"{fim_sec:.3f}",
+        '-i', video_path,
+        '-map', '0:v:0', '-map', '0:a?',
+        '-c', 'copy',
+        '-avoid_negative_ts', 'make_zero',
+        '-sn',
+        saida,
+    ]
+
+
+def _args_encoder_cabeca(indice):
+    """
+    Args do encoder para o trecho reencodado casar com o stream copiado:
+    mesmo codec, perfil, nível, pix_fmt e taxa de quadros. None se algum
+    deles não for conhecido ou não tiver equivalente no encoder.
+    """
+    codec = indice.get('codec')
+    encoder = ENCODER_POR_CODEC.get(codec)
+    nivel = indice.get('nivel')
+    pix_fmt = indice.get('pix_fmt')
+    fps = indice.get('fps')
+    if encoder is None or not pix_fmt or not fps or fps == '0/0' or not nivel or nivel <= 0:
+        return None
+
+    args = ['-c:v', encoder, '-preset', 'veryfast', '-crf', '18', '-pix_fmt', pix_fmt, '-r', fps]
+    if codec == 'h264':
+        perfil = PERFIS_X264.get(indice.get('perfil'))
+        if perfil is None:
+            return None
+        # ffprobe dá o nível do H.264 x10 (ex.: 41 = 4.1)
+        return args + ['-profile:v', perfil, '-level', f"{nivel / 10:g}"]
+    perfil = PERFIS_X265.get(indice.get('perfil'))
+    if perfil is None:
+        return None
+    # ... e o do HEVC x30 (ex.: 123 = 4.1)
+    return args + ['-profile:v', perfil, '-x265-params', f"level-idc={nivel / 30:g}"]
+
+
+def _timescale(indice):
+    """Denominador do time_base da fonte (ex.: 1/15360 -> 15360), ou None."""
+    _, _, denominador = (indice.get('time_base') or '').partition('/')
+    return denominador if denominador.isdigit() and int(denominador) > 0 else None
+
+
+def job_corte_inteligente(nome, video_path, indice, inicio_sec, fim_sec, saida):
+    """
+    Monta o job de corte inteligente: o vídeo entre inicio_sec e o próximo
+    keyframe é reencodado (mesmo codec da fonte) e o restante é copiado.
+    As duas partes são unidas com o concat demuxer e o áudio é copiado direto
+    da fonte. O trecho reencodado usa o perfil, nível, pix_fmt e taxa de
+    quadros da fonte, e a saída mantém o timescale dela. Se o corte já começa
+    num keyframe vira uma cópia simples; se o codec não tem encoder conhecido
+    ou esses parâmetros não dão para casar, o início recua até o keyframe
+    anterior (nunca passa do fim do corte).
+    """
+    keyframes = indice['keyframes']
+    k1 = proximo_keyframe(keyframes, inicio_sec)
+    encoder = ENCODER_POR_CODEC.get(indice.get('codec'))
+    args_encoder = _args_encoder_cabeca(indice)
+    juntar = k1 is not None and k1 < fim_sec
+
+    duracao = fim_sec - inicio_sec
+
+    if k1 is not None and abs(k1 - inicio_sec) <= 0.001:
+        return JobRender(nome, comando_copia(video_path, inicio_sec, fim_sec, saida), saida, duracao=duracao)
+    if encoder is None or (juntar and args_encoder is None):
+        inicio_alinhado = keyframe_anterior(keyframes, inicio_sec)
+        return JobRender(nome, comando_copia(video_path, inicio_alinhado, fim_sec, saida), saida,
+                         duracao=fim_sec - inicio_alinhado)
+
+    if not juntar:
+        # Corte menor que um GOP: reencoda tudo (nada a casar com stream copiado)
+        if args_encoder is None:
+            args_encoder = ['-c:v', encoder, '-preset', 'veryfast', '-crf', '18']
+            if indice.get('pix_fmt'):
+                args_encoder += ['-pix_fmt', indice['pix_fmt']]
+        comando = [
+            'ffmpeg', '-y', '-hide_banner',
+            '-ss', f"{inicio_sec:.3f}", '-to', f"{fim_sec:.3f}", '-i', video_path,
+            '-map', '0:v:0', '-map', '0:a?', *args_encoder, '-c:a', 'copy', '-sn', saida,
+        ]
+        return JobRender(nome, comando, saida, duracao=duracao)
+
+    timescale = _timescale(indice)
+    args_timescale = ['-video_track_timescale', timescale] if timescale else []
+
+    base = os.path.splitext(saida)[0]
+    cabeca = base + ".cabeca.ts"
+    resto = base + ".resto.ts"
+    lista = base + ".concat.txt"
+    with open(lista, 'w', encoding='utf-8') as f:
+        for caminho in (cabeca, resto):
+            f.write("file '%s'\n" % os.path.abspath(caminho).replace("'", "'\\''"))
+
+    comandos = [
+        [
+            'ffmpeg', '-y', '-hide_banner',
+            '-ss', f"{inicio_sec:.3f}", '-to', f"{k1:.3f}", '-i', video_path,
+            '-map', '0:v:0', '-an', *args_encoder, cabeca,
+        ],
+        [
+            'ffmpeg', '-y', '-hide_banner',
+            '-ss', f"{k1:.3f}", '-to', f"{fim_sec:.3f}", '-i', video_path,
+            '-map', '0:v:0', '-an', '-c:v', 'copy', resto,
+        ],
+        [
+            'ffmpeg', '-y', '-hide_banner',
+            '-f', 'concat', '-safe', '0', '-i', lista,
+            '-ss', f"{inicio_sec:.3f}", '-to', f"{fim_sec:.3f}", '-i', video_path,
+            '-map', '0:v:0', '-map', '1:a?',
+            '-c', 'copy', '-sn', *args_timescale, saida,
+        ],
+    ]
+    return JobRender(nome, comandos, saida, temporarios=[cabeca, resto, lista], duracao=duracao)
+
+
+# ============ MANIFESTO DE RENDERIZAÇÃO (RETOMADA) ============
+
+# Arquivo, dentro da pasta de saída, com a chave de cada corte já concluído
+ARQUIVO_MANIFESTO = ".manifesto_render.json"
+
+
+def caminho_parcial(saida):
+    """Arquivo temporário onde o ffmpeg escreve; vira `saida` só quando termina."""
+    pasta, nome = os.path.split(saida)
+    return os.path.join(pasta, f".{nome}.parcial{os.path.splitext(nome)[1]}")
+
+
+def _hash_arquivo(caminho):
+    with open(caminho, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class ManifestoRender:
+    """
+    Registro dos cortes concluídos numa pasta de saída. Cada corte tem uma
+    chave que resume tudo o que define o arquivo gerado (checksum da fonte,
+    tempos, legenda e parâmetros de encode); se a chave e o arquivo batem,
+    o corte não precisa ser renderizado de novo. O JSON é regravado a cada
+    corte concluído via arquivo temporário + rename, então uma interrupção
+    no meio nunca deixa o manifesto (nem um .mp4) pela metade.
+    """
+
+    def __init__(self, pasta):
+        self.caminho = os.path.join(pasta, ARQUIVO_MANIFESTO)
+        self._lock = threading.Lock()
+        self.cortes = {}
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                self.cortes = json.load(f).get('cortes', {})
+        except (OSError, ValueError, AttributeError):
+            self.cortes = {}
+
+    @staticmethod
+    def chave(**especificacao):
+        return hashlib.sha256(json.dumps(especificacao, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def concluido(self, saida, chave):
+        registro = self.cortes.get(os.path.basename(saida))
+        return bool(registro) and registro.get('chave') == chave and os.path.exists(saida)
+
+    def marcar(self, saida, chave):
+        with self._lock:
+            self.cortes[os.path.basename(saida)] = {'chave': chave, 'concluido_em': time.time()}
+            temporario = self.caminho + ".tmp"
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump({'cortes': self.cortes}, f, indent=2)
+            os.replace(temporario, self.caminho)
+
+
+# ============ CORTE DE VÍDEO ============
+
+BITRATE_AUDIO = '256k'
+BITRATE_AUDIO_PREVIA = '64k'
+
+# Formatos de saída: proporção da fonte ou Shorts verticais
+FORMATO_ORIGINAL = "original"
+FORMATO_SHORTS = "shorts"
+FORMATOS_SAIDA = (FORMATO_ORIGINAL, FORMATO_SHORTS)
+LARGURA_SHORTS, ALTURA_SHORTS = 1080, 1920
+
+# Estilos da legenda queimada. O libass mede a fonte em relação a 288
+# linhas e escala pela altura do vídeo: no vertical a mesma fonte ficaria
+# larga demais para a linha, então ela é menor, com contorno mais grosso e
+# subida acima da interface do app (título, botões)
+ESTILO_LEGENDA = (
+    "FontName=Arial,FontSize=24,PrimaryColour=&HFFFFFF&,"
+    "OutlineColour=&H000000&,BorderStyle=1,Outline=1"
+)
+ESTILO_LEGENDA_SHORTS = (
+    "FontName=Arial,FontSize=13,Bold=1,PrimaryColour=&HFFFFFF&,"
+    "OutlineColour=&H000000&,BorderStyle=1,Outline=2,Alignment=2,MarginV=60,MarginL=24,MarginR=24"
+)
+
+
+def _filtro_enquadramento(formato, previa=False, posicao=0.5):
+    """
+    Início da cadeia de filtros: recorte e escala para o tamanho de saída,
+    antes de fades e legenda, para que eles já rodem na resolução final
+    (vazio = resolução da fonte).
+    Shorts: recorta 9:16 na altura da fonte (o crop só desloca ponteiros,
+    então custa quase nada) e escala uma vez para 1080x1920; na prévia, para
+    ALTURA_PREVIA pixels de largura.
+    """
+    if formato == FORMATO_SHORTS:
+        largura, altura = LARGURA_SHORTS, ALTURA_SHORTS
+        if previa:
+            largura, altura = ALTURA_PREVIA, ALTURA_PREVIA * ALTURA_SHORTS // LARGURA_SHORTS // 2 * 2
+        return (
+            f"crop='min(iw,trunc(ih*9/32)*2)':'min(ih,trunc(iw*8/9)*2)':'(iw-ow)*{posicao}':'(ih-oh)/2',"
+            f"scale={largura}:{altura},setsar=1,"
+        )
+    if previa:
+        return f"scale=-2:{ALTURA_PREVIA},"
+    return ""
+
+
+def _filtro_video_corte(duracao, srt_saida, formato=FORMATO_ORIGINAL, previa=False, posicao=0.5):
+    """Cadeia de filtros de um corte: enquadramento, fade in/out e hardcode da legenda."""
+    estilo = ESTILO_LEGENDA_SHORTS if formato == FORMATO_SHORTS else ESTILO_LEGENDA
+    return (
+        _filtro_enquadramento(formato, previa, posicao) +
+        f"fade=in:0:60,"
+        f"fade=out:st={duracao-3}:d=90,"
+        f"subtitles='{srt_saida}':force_style='{estilo}'"
+    )
+
+
+def cortar_video(video_path, plano, legenda_path, pasta_saida,
+                 max_jobs_cpu=None, max_jobs_hw=None, ao_terminar=None,
+                 modo_render=MODO_RENDER_PARALELO, perfil=None, agendador=None, ao_progresso=None,
+                 retomar=True, previa=False, formato=FORMATO_ORIGINAL, posicao_shorts=0.5, logar=print):
+    """
+    Renderiza todos os cortes do plano (PlanoCortes), no tempo de video_path.
+    modo_render:
+      - "paralelo": um ffmpeg por corte, vários ao mesmo tempo
+      - "unico": um único ffmpeg decodifica o vídeo uma vez e gera todos os cortes
+      - "copia": sem fades nem legenda queimada; cortes alinhados ao keyframe
+        mais próximo e copiados sem reencode
+      - "inteligente": como "copia", mas com corte exato: só o trecho até o
+        primeiro keyframe de cada corte é reencodado
+    Nos modos sem reencode a legenda de cada corte é salva apenas como .srt.
+    No modo "copia", um corte que some ao alinhar (início e fim no mesmo
+    keyframe, ou início depois do fim) vai pelo corte inteligente com os
+    tempos originais; logar recebe o aviso.
+    perfil: PerfilEncoder a usar; por padrão o encoder mais rápido que
+    funciona neste host (ENCODER/PERFIL_ENCODE do .env).
+    agendador: AgendadorRender compartilhado (ex.: vários vídeos em lote
+    respeitando um limite global); por padrão cria um com os limites dados.
+    ao_progresso(ProgressoRender) recebe o andamento de cada corte.
+    Cada corte é escrito num arquivo .parcial e renomeado ao terminar, e
+    fica registrado no ManifestoRender da pasta. Com retomar=True, cortes
+    cuja chave (fonte, tempos, legenda, encode) não mudou e cujo arquivo
+    existe não são renderizados de novo (ResultadoRender.reaproveitado).
+    Se houver um Medidor ativo (metricas.span), cada corte entra nele com
+    as medidas do ffmpeg (ResultadoRender.metricas).
+    Com previa=True os cortes saem com ALTURA_PREVIA pixels no lado menor, no
+    preset mais rápido do encoder e com áudio a BITRATE_AUDIO_PREVIA, mas
+    com os mesmos tempos, fades e legenda; modos sem reencode viram
+    "paralelo" (os tempos continuam alinhados a keyframes no modo cópia).
+    formato="shorts" gera vídeos verticais 1080x1920: recorte 9:16 na
+    posição horizontal posicao_shorts (0 a 1) e legenda no estilo vertical;
+    como a prévia, também reencoda nos modos sem reencode.
+    Retorna a lista de ResultadoRender (um por corte, na ordem dos cortes).
+    """
+    if modo_render not in MODOS_RENDER:
+        raise ValueError(f"Modo de renderização inválido: {modo_render}")
+    if formato not in FORMATOS_SAIDA:
+        raise ValueError(f"Formato de saída inválido: {formato} (use {', '.join(FORMATOS_SAIDA)})")
+
+    # Lê e (por segurança) limpa novamente as legendas antes de usar
+    trilha = TrilhaLegenda.de_arquivo(legenda_path).limpar_sobreposicoes(margem_ms=50)
+
+    # Prévia e Shorts sempre reencodam: a prévia mostra fades e legenda como
+    # no final e o Short precisa do recorte vertical
+    reencodar = previa or formato == FORMATO_SHORTS
+    modo_encode = MODO_RENDER_PARALELO if reencodar and modo_render in MODOS_SEM_REENCODE else modo_render
+
+    args_codec = None
+    if modo_encode not in MODOS_SEM_REENCODE:
+        if previa:
+            perfil = perfil_encoder(perfil.encoder if perfil else escolher_encoder(preferido=ENCODER), PERFIL_PREVIA)
+        elif perfil is None:
+            perfil = perfil_para_host(PERFIL_ENCODE, preferido=ENCODER)
+        args_codec = [
+            *perfil.args_video,
+            '-c:a', 'aac',
+            '-b:a', BITRATE_AUDIO_PREVIA if previa else BITRATE_AUDIO,
+            '-sn',
+        ]
+    partes = []
+
+    manifesto = ManifestoRender(pasta_saida)
+    medidor, span_pai = medidor_atual(), span_atual()
+    checksum_fonte = assinatura_arquivo(video_path)
+    destinos = {}   # caminho parcial -> (saida final, chave)
+    prontos = {}    # índice do corte -> ResultadoRender reaproveitado
+
+    indice_keyframes = None
+    alinhados = {}  # início original -> início no keyframe (modo cópia)
+    exatos = set()  # índices dos cortes que vão pelo corte inteligente no modo cópia
+    if modo_render == MODO_RENDER_COPIA or modo_encode == MODO_RENDER_INTELIGENTE:
+        indice_keyframes = obter_indice_keyframes(video_path)
+        if modo_render == MODO_RENDER_COPIA:
+            # Alinha todo início de corte (e o fim do anterior, se encostado) a um keyframe
+            keyframes = indice_keyframes['keyframes']
+            alinhados = {c.inicio: keyframe_mais_proximo(keyframes, c.inicio) for c in plano}
+            # Corte que some no alinhamento (início e fim no mesmo keyframe) fica com
+            # os tempos exatos, e o anterior termina onde ele começa de verdade
+            exatos = {i for i, c in enumerate(plano)
+                      if alinhados.get(c.fim, c.fim) - alinhados[c.inicio] < DURACAO_MINIMA_COPIA}
+            for i in exatos:
+                alinhados[plano[i].inicio] = plano[i].inicio
+
+    for i, corte in enumerate(plano):
+        nome_base = corte.nome
+        video_saida = os.path.join(pasta_saida, nome_base + ".mp4")
+        srt_saida = os.path.join(pasta_saida, nome_base + ".srt")
+
+        inicio_sec = alinhados.get(corte.inicio, corte.inicio)
+        fim_sec = alinhados.get(corte.fim, corte.fim)
+        inteligente = i in exatos or fim_sec - inicio_sec < DURACAO_MINIMA_COPIA
+        if inteligente:
+            logar(f"⚠️ {nome_base}: sem keyframe dentro do corte; usando corte inteligente só nele.")
+            inicio_sec, fim_sec = corte.inicio, corte.fim
+        duracao = fim_sec - inicio_sec
+
+        # Legendas do corte, com tempos relativos ao início dele
+        trilha.fatia(inicio_sec, fim_sec).deslocar(-inicio_sec).salvar(srt_saida)
+
+        filtro_video = ""
+        if perfil:
+            filtro_video = perfil.filtro(_filtro_video_corte(duracao, srt_saida, formato, previa, posicao_shorts))
+        chave = ManifestoRender.chave(
+            fonte=checksum_fonte, inicio=inicio_sec, fim=fim_sec, legenda=_hash_arquivo(srt_saida),
+            modo=modo_encode, filtro=filtro_video, codec=args_codec,
+            entrada=perfil.args_entrada if perfil else None,
+        )
+        if retomar and manifesto.concluido(video_saida, chave):
+            prontos[i] = ResultadoRender(nome_base, video_saida, 0, "", 0.0, reaproveitado=True)
+            continue
+
+        parcial = caminho_parcial(video_saida)
+        destinos[parcial] = (video_saida, chave)
+        partes.append(ParteRender(nome_base, inicio_sec, fim_sec, filtro_video, parcial, inteligente))
+
+    def _medir(resultado):
+        if medidor:
+            medidor.registrar(
+                resultado.nome, pai=span_pai, tipo='corte', modo=modo_encode, formato=formato, previa=previa,
+                codigo=resultado.codigo, reaproveitado=resultado.reaproveitado,
+                parede_s=round(resultado.duracao, 4), **resultado.metricas,
+            )
+
+    def _finalizar(resultado):
+        # Só um corte completo ganha o nome final e entra no manifesto
+        saida, chave = destinos[resultado.saida]
+        if resultado.ok:
+            os.replace(resultado.saida, saida)
+            manifesto.marcar(saida, chave)
+        else:
+            try:
+                os.remove(resultado.saida)
+            except OSError:
+                pass
+        resultado.saida = saida
+        _medir(resultado)
+        if ao_terminar:
+            ao_terminar(resultado)
+
+    for resultado in prontos.values():
+        _medir(resultado)
+        if ao_terminar:
+            ao_terminar(resultado)
+    resultados = _renderizar_partes(
+        video_path, partes, modo_encode, perfil, args_codec, indice_keyframes, max_jobs_cpu, max_jobs_hw,
+        _finalizar, agendador, ao_progresso,
+    )
+
+    # Junta reaproveitados e renderizados na ordem dos cortes
+    renderizados = iter(resultados)
+    return [prontos[i] if i in prontos else next(renderizados) for i in range(len(plano))]
+
+
+def _renderizar_partes(video_path, partes, modo_render, perfil, args_codec, indice_keyframes,
+                       max_jobs_cpu, max_jobs_hw, ao_terminar, agendador, ao_progresso):
+    """Despacha as partes para o modo de renderização escolhido."""
+    if not partes:
+        return []
+
+    if modo_render in MODOS_SEM_REENCODE:
+        jobs = []
+        for parte in partes:
+            if modo_render == MODO_RENDER_COPIA and not parte.inteligente:
+                comando = comando_copia(video_path, parte.inicio_sec, parte.fim_sec, parte.saida)
+                jobs.append(JobRender(parte.nome, comando, parte.saida,
+                                      duracao=parte.fim_sec - parte.inicio_sec))
+            else:
+                jobs.append(job_corte_inteligente(
+                    parte.nome, video_path, indice_keyframes,
+                    parte.inicio_sec, parte.fim_sec, parte.saida,
+                ))
+        agendador = agendador or AgendadorRender(max_cpu=max_jobs_cpu, max_hw=max_jobs_hw)
+        return agendador.executar(jobs, ao_terminar=ao_terminar, ao_progresso=ao_progresso)
+
+    if modo_render == MODO_RENDER_UNICO:
+        return renderizar_decodificacao_unica(
+            video_path, partes, args_codec, perfil.hardware, args_entrada=perfil.args_entrada,
+            max_jobs_cpu=max_jobs_cpu, max_jobs_hw=max_jobs_hw, ao_terminar=ao_terminar,
+            agendador=agendador, ao_progresso=ao_progresso,
+        )
+
+    jobs = []
+    for parte in partes:
+        # Aplica o corte com fade in/out e hardcode da legenda no corte
+        comando = [
+            'ffmpeg', '-y', '-hide_banner',
+            '-ss', f"{parte.inicio_sec:.3f}",
+            '-to', f"{parte.fim_sec:.3f}",
+            *perfil.args_entrada,
+            '-i', video_path,
+            '-vf', parte.filtro_video,
+            *args_codec,
+            parte.saida
+        ]
+        jobs.append(JobRender(parte.nome, comando, parte.saida, hardware=perfil.hardware,
+                              duracao=parte.fim_sec - parte.inicio_sec))
+
+    agendador = agendador or AgendadorRender(max_cpu=max_jobs_cpu, max_hw=max_jobs_hw)
+    return agendador.executar(jobs, ao_terminar=ao_terminar, ao_progresso=ao_progresso)
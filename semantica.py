@@ -0,0 +1,381 @@
+import os
+
+from cortes import PlanoCortes, validar_e_ajustar_cortes
+from embeddings import codificar_textos, NOME_MODELO
+from legendas import str_time_to_seconds, TrilhaLegenda
+from metricas import span
+
+
+def _similaridade_adjacente(embeddings):
+    """Similaridade de cosseno entre cada linha e a seguinte (n-1 valores)."""
+    import numpy as np
+
+    normas = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unitarios = embeddings / np.maximum(normas, 1e-12)
+    return np.einsum('ij,ij->i', unitarios[:-1], unitarios[1:])
+
+
+# ================= SEGMENTAÇÃO POR TÓPICOS ==============
+# Motor estilo TextTiling: cada segmento da legenda é embedado uma vez
+# (em lotes grandes), as janelas à esquerda/direita de cada fronteira são
+# médias desses embeddings obtidas por soma acumulada, e a similaridade
+# de todas as fronteiras sai de uma única operação vetorizada, em várias
+# escalas de janela. As fronteiras finais são escolhidas por programação
+# dinâmica sobre o "depth score", respeitando as durações mín./máx.
+
+MOTOR_TEXTTILING = "texttiling"
+MOTOR_BLOCOS = "blocos"
+MOTORES = (MOTOR_TEXTTILING, MOTOR_BLOCOS)
+
+# Tamanhos (s) das janelas comparadas em cada fronteira
+ESCALAS_JANELA = (30, 60, 120)
+# Duração mínima (s) da última parte, como em validar_e_ajustar_cortes
+SOBRA_MINIMA = 60
+
+
+def _tempos_segmentos(segmentos):
+    import numpy as np
+
+    if isinstance(segmentos, TrilhaLegenda):
+        return segmentos.inicios_segundos(), segmentos.fins_segundos()
+
+    inicios = np.fromiter((str_time_to_seconds(s[0]) for s in segmentos), dtype=np.float64, count=len(segmentos))
+    fins = np.fromiter((str_time_to_seconds(s[1]) for s in segmentos), dtype=np.float64, count=len(segmentos))
+    return inicios, fins
+
+
+def curva_similaridade(inicios, embeddings, escalas=ESCALAS_JANELA):
+    """
+    Similaridade entre a janela anterior e a posterior de cada fronteira
+    (fronteira k = início do segmento k, para k = 1..n-1), média das escalas.
+    Tudo em O(n) por escala: somas acumuladas + searchsorted.
+    """
+    import numpy as np
+
+    n = len(inicios)
+    acumulado = np.vstack([np.zeros((1, embeddings.shape[1]), dtype=np.float64),
+                           np.cumsum(embeddings, axis=0, dtype=np.float64)])
+    fronteiras = np.arange(1, n)
+    t = inicios[fronteiras]
+
+    curvas = []
+    for escala in escalas:
+        # Janela esquerda: segmentos [esq, k); direita: [k, dir)
+        esq = np.searchsorted(inicios, t - escala, side='left')
+        dir = np.searchsorted(inicios, t + escala, side='left')
+        esq = np.minimum(esq, fronteiras - 1)   # pelo menos um segmento de cada lado
+        dir = np.maximum(dir, fronteiras + 1)
+
+        soma_esq = acumulado[fronteiras] - acumulado[esq]
+        soma_dir = acumulado[dir] - acumulado[fronteiras]
+        norma = np.linalg.norm(soma_esq, axis=1) * np.linalg.norm(soma_dir, axis=1)
+        curvas.append(np.einsum('ij,ij->i', soma_esq, soma_dir) / np.maximum(norma, 1e-12))
+
+    return np.mean(curvas, axis=0)
+
+
+def _maximo_deslizante(valores, limites_esq):
+    """
+    maximo[i] = max(valores[limites_esq[i]:i+1]), com limites_esq não decrescente.
+    Fila monotônica: O(n) no total.
+    """
+    import numpy as np
+    from collections import deque
+
+    resultado = np.empty_like(valores)
+    fila = deque()
+    for i, v in enumerate(valores):
+        while fila and valores[fila[-1]] <= v:
+            fila.pop()
+        fila.append(i)
+        while fila[0] < limites_esq[i]:
+            fila.popleft()
+        resultado[i] = valores[fila[0]]
+    return resultado
+
+
+def depth_scores(tempos, similaridade, alcance):
+    """
+    Depth score de cada fronteira: quanto a similaridade cai em relação ao
+    pico à esquerda e ao pico à direita dentro de `alcance` segundos.
+    """
+    import numpy as np
+
+    esq = np.searchsorted(tempos, tempos - alcance, side='left')
+    pico_esq = _maximo_deslizante(similaridade, esq)
+
+    # Pico à direita = mesmo cálculo sobre as sequências invertidas
+    invertidos = -tempos[::-1]
+    esq_inv = np.searchsorted(invertidos, invertidos - alcance, side='left')
+    pico_dir = _maximo_deslizante(similaridade[::-1], esq_inv)[::-1]
+
+    return (pico_esq - similaridade) + (pico_dir - similaridade)
+
+
+def escolher_fronteiras(inicio, fim, candidatos, ganhos, intervalo_min, intervalo_max):
+    """
+    Escolhe os cortes entre inicio e fim maximizando a soma dos ganhos,
+    com cada parte entre intervalo_min e intervalo_max segundos (a última
+    parte pode ser mais curta, mas não menos que SOBRA_MINIMA). Programação dinâmica: cada candidato só olha
+    os anteriores dentro da janela [min, max], então o custo é linear no
+    número de candidatos para durações limitadas.
+    """
+    import numpy as np
+
+    pos = np.concatenate([[inicio], candidatos, [fim]])
+    ganho = np.concatenate([[0.0], ganhos, [0.0]])
+    n = len(pos)
+
+    melhor = np.full(n, -np.inf)
+    anterior = np.full(n, -1, dtype=np.int64)
+    melhor[0] = 0.0
+
+    for j in range(1, n):
+        minimo = min(SOBRA_MINIMA, intervalo_min) if j == n - 1 else intervalo_min
+        lo = int(np.searchsorted(pos, pos[j] - intervalo_max, side='left'))
+        hi = min(int(np.searchsorted(pos, pos[j] - minimo, side='right')), j)
+        if lo >= hi:
+            continue
+        janela = melhor[lo:hi]
+        k = int(np.argmax(janela))
+        if janela[k] == -np.inf:
+            continue
+        melhor[j] = janela[k] + ganho[j]
+        anterior[j] = lo + k
+
+    if melhor[-1] == -np.inf:
+        return None
+
+    escolhidos = []
+    j = anterior[-1]
+    while j > 0:
+        escolhidos.append(pos[j])
+        j = anterior[j]
+    return escolhidos[::-1]
+
+
+def segmentar_por_topicos(segmentos, intervalo_min=480, intervalo_max=720, limite_similaridade=0.6,
+                          escalas=ESCALAS_JANELA, nome_modelo=NOME_MODELO, usar_cache=True,
+                          embeddings=None):
+    """
+    Retorna os tempos de corte (float, em segundos, no início de um
+    segmento da legenda), incluindo início e fim da transcrição.
+
+    Ganho de cortar numa fronteira = depth score acima do limiar clássico do
+    TextTiling (média - desvio/2), mais um bônus quando a similaridade fica
+    abaixo de limite_similaridade.
+    """
+    import numpy as np
+
+    inicios, fins = _tempos_segmentos(segmentos)
+    inicio, fim = float(inicios[0]), float(fins[-1])
+    if len(segmentos) < 3 or fim - inicio <= intervalo_min:
+        return [inicio, fim]
+
+    if embeddings is None:
+        textos = segmentos.textos if isinstance(segmentos, TrilhaLegenda) else [s[2] for s in segmentos]
+        embeddings = codificar_textos(textos, nome_modelo=nome_modelo, usar_cache=usar_cache)
+
+    similaridade = curva_similaridade(inicios, embeddings, escalas)
+    tempos = inicios[1:]
+    profundidade = depth_scores(tempos, similaridade, max(escalas))
+
+    limiar = profundidade.mean() - profundidade.std() / 2
+    ganhos = (profundidade - limiar) + np.maximum(0.0, limite_similaridade - similaridade)
+
+    cortes = escolher_fronteiras(inicio, fim, tempos, ganhos, intervalo_min, intervalo_max)
+    if cortes is None:
+        # Há trechos sem fala maiores que intervalo_max: ignora o máximo aqui
+        # (validar_e_ajustar_cortes divide as partes longas depois)
+        cortes = escolher_fronteiras(inicio, fim, tempos, ganhos, intervalo_min, float('inf')) or []
+
+    return [inicio] + [float(c) for c in cortes] + [fim]
+
+
+# ================= CORTE AUTOMÁTICO (IA) ==============
+def detectar_pontos_de_corte_semantico(segmentos, intervalo_min=480, intervalo_max=720, limite_similaridade=0.6,
+                                       nome_modelo=NOME_MODELO, usar_cache=True, motor=MOTOR_TEXTTILING):
+    """
+    Detecta mudanças de assunto e retorna os pontos de corte em segundos.
+    motor:
+      - "texttiling": segmentação multiescala por depth score, com cortes
+        no início de um segmento da legenda (padrão)
+      - "blocos": detector original, em blocos fixos de ~4 min
+    Os embeddings ficam no cache em disco, então rodar de novo a mesma
+    transcrição com outros limites não executa o modelo.
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de segmentação inválido: {motor}")
+    if motor == MOTOR_BLOCOS:
+        return _detectar_por_blocos(segmentos, intervalo_min, intervalo_max, limite_similaridade,
+                                    nome_modelo, usar_cache)
+
+    return segmentar_por_topicos(segmentos, intervalo_min, intervalo_max, limite_similaridade,
+                                 nome_modelo=nome_modelo, usar_cache=usar_cache)
+
+
+def _montar_blocos(segmentos):
+    """Junta os segmentos em blocos (inicio_s, fim_s, texto) de ~4 min."""
+    blocos = []
+    buffer = []
+    inicio_bloco = str_time_to_seconds(segmentos[0][0])
+
+    for i in range(len(segmentos)):
+        buffer.append(segmentos[i])
+        duracao_bloco = str_time_to_seconds(segmentos[i][1]) - inicio_bloco
+
+        if duracao_bloco >= 240:
+            texto_bloco = " ".join([b[2] for b in buffer])
+            blocos.append((inicio_bloco, str_time_to_seconds(segmentos[i][1]), texto_bloco))
+            buffer = []
+            if i + 1 < len(segmentos):
+                inicio_bloco = str_time_to_seconds(segmentos[i + 1][0])
+
+    if buffer:
+        texto_bloco = " ".join([b[2] for b in buffer])
+        blocos.append((inicio_bloco, str_time_to_seconds(segmentos[-1][1]), texto_bloco))
+    return blocos
+
+
+def _detectar_por_blocos(segmentos, intervalo_min, intervalo_max, limite_similaridade,
+                         nome_modelo, usar_cache, blocos=None, embeddings=None):
+    """Detector original: compara blocos fixos de ~4 min, vizinho a vizinho."""
+    if blocos is None:
+        blocos = _montar_blocos(segmentos)
+    if embeddings is None:
+        textos = [b[2] for b in blocos]
+        embeddings = codificar_textos(textos, nome_modelo=nome_modelo, usar_cache=usar_cache)
+    similaridades = _similaridade_adjacente(embeddings)
+
+    cortes = [blocos[0][0]]
+    ultimo_corte = blocos[0][0]
+
+    for i in range(1, len(blocos)):
+        tempo_atual = blocos[i][0]
+        duracao = tempo_atual - ultimo_corte
+        similaridade = float(similaridades[i - 1])
+
+        if duracao >= intervalo_min and (similaridade < limite_similaridade or duracao >= intervalo_max):
+            cortes.append(tempo_atual)
+            ultimo_corte = tempo_atual
+
+    cortes.append(blocos[-1][1])
+    return [float(c) for c in cortes]
+
+
+# ================= PLANEJAMENTO EM LOTE ==============
+# Para um acervo de transcrições no modo automático: cada transcrição é
+# lida (e agrupada em blocos, no motor "blocos") num pool de processos, os
+# textos de todas vão numa chamada só de codificar_textos (um modelo, lotes
+# cheios, textos repetidos entre vídeos codificados uma vez) e a escolha
+# das fronteiras de cada vídeo volta para o pool. Os processos do pool não
+# carregam o modelo: só o processo principal roda o encode.
+
+# Com menos transcrições que isso tudo roda no próprio processo: subir o
+# pool custa mais que o que ele paralelizaria
+MINIMO_PARA_POOL = 4
+
+
+def _ler_transcricao(entrada):
+    """TrilhaLegenda de um caminho (SRT/WebVTT, limpa como no pipeline), de segmentos ou já pronta."""
+    if isinstance(entrada, TrilhaLegenda):
+        return entrada
+    if isinstance(entrada, str):
+        return TrilhaLegenda.de_arquivo(entrada, colapsar=True).limpar_sobreposicoes()
+    return TrilhaLegenda.de_segmentos(entrada)
+
+
+def _preparar_transcricao(entrada, motor):
+    """Etapa 1 (no pool): (trilha, blocos ou None, textos a codificar)."""
+    trilha = _ler_transcricao(entrada)
+    if not len(trilha):
+        return trilha, None, []
+    if motor == MOTOR_BLOCOS:
+        blocos = _montar_blocos(trilha)
+        return trilha, blocos, [b[2] for b in blocos]
+    return trilha, None, trilha.textos
+
+
+def _segmentar_transcricao(trilha, blocos, embeddings, motor, opcoes):
+    """Etapa 2 (no pool): pontos de corte de uma transcrição com os embeddings já calculados."""
+    if not len(trilha):
+        return []
+    if motor == MOTOR_BLOCOS:
+        return _detectar_por_blocos(trilha, opcoes['intervalo_min'], opcoes['intervalo_max'],
+                                    opcoes['limite_similaridade'], None, False, blocos=blocos,
+                                    embeddings=embeddings)
+    return segmentar_por_topicos(trilha, opcoes['intervalo_min'], opcoes['intervalo_max'],
+                                 opcoes['limite_similaridade'], embeddings=embeddings)
+
+
+def _aplicar(executor, funcao, *argumentos):
+    """map no pool, ou no próprio processo se não houver pool."""
+    if executor is None:
+        return list(map(funcao, *argumentos))
+    return list(executor.map(funcao, *argumentos))
+
+
+def detectar_pontos_em_lote(legendas, intervalo_min=480, intervalo_max=720, limite_similaridade=0.6,
+                            nome_modelo=NOME_MODELO, usar_cache=True, motor=MOTOR_TEXTTILING,
+                            processos=None, tamanho_lote=None):
+    """
+    Mesmo resultado de detectar_pontos_de_corte_semantico para cada item
+    de legendas (caminhos de SRT/WebVTT, TrilhaLegenda ou listas de
+    segmentos), na mesma ordem, mas com um único encode para todas as
+    transcrições e a leitura e a segmentação divididas entre processos
+    (processos=None usa um por CPU; 1 roda tudo aqui). Transcrições vazias
+    retornam [].
+    """
+    import numpy as np
+    from itertools import repeat
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de segmentação inválido: {motor}")
+    legendas = list(legendas)
+    processos = min(processos or os.cpu_count() or 1, len(legendas))
+
+    executor = None
+    if processos > 1 and len(legendas) >= MINIMO_PARA_POOL:
+        # spawn: um fork depois do torch carregado (threads do intra-op) pode travar
+        executor = ProcessPoolExecutor(processos, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        with span('leitura_lote', transcricoes=len(legendas), processos=processos if executor else 1):
+            preparadas = _aplicar(executor, _preparar_transcricao, legendas, repeat(motor))
+
+        # Um encode para todas: os textos de cada transcrição ficam contíguos
+        todos = [texto for _, _, textos in preparadas for texto in textos]
+        extras = {'tamanho_lote': tamanho_lote} if tamanho_lote else {}
+        vetores = codificar_textos(todos, nome_modelo=nome_modelo, usar_cache=usar_cache, **extras)
+        fatias = np.cumsum([0] + [len(textos) for _, _, textos in preparadas])
+        embeddings = [vetores[a:b] for a, b in zip(fatias[:-1], fatias[1:])]
+
+        opcoes = {'intervalo_min': intervalo_min, 'intervalo_max': intervalo_max,
+                  'limite_similaridade': limite_similaridade}
+        with span('fronteiras_lote', transcricoes=len(legendas)):
+            return _aplicar(executor, _segmentar_transcricao,
+                            [p[0] for p in preparadas], [p[1] for p in preparadas], embeddings,
+                            repeat(motor), repeat(opcoes))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def planejar_cortes_em_lote(legendas, logar=print, **opcoes):
+    """
+    PlanoCortes automático (pontos da IA validados com as durações máx./mín.,
+    como no modo auto do pipeline) para cada item de legendas, na mesma
+    ordem; None para transcrições sem pontos suficientes. Aceita as opções
+    de detectar_pontos_em_lote.
+    """
+    legendas = list(legendas)
+    planos = []
+    for i, pontos in enumerate(detectar_pontos_em_lote(legendas, **opcoes)):
+        if len(pontos) < 2:
+            nome = legendas[i] if isinstance(legendas[i], str) else f"#{i + 1}"
+            logar(f"⚠️ {nome}: poucos pontos de corte (transcrição vazia ou curta demais).")
+            planos.append(None)
+            continue
+        planos.append(PlanoCortes.de_pontos(validar_e_ajustar_cortes(pontos)))
+    return planos
@@ -0,0 +1,510 @@
+"""
+Serviço HTTP local de jobs de corte.
+
+Recebe jobs (o mesmo formato de um item do manifesto de lote) por HTTP,
+guarda a fila num SQLite e executa os jobs em trabalhadores que vivem
+enquanto o serviço estiver no ar: o modelo de IA e o probe de encoders são
+carregados uma vez e servem a todos os jobs seguintes. Jobs que estavam na
+fila ou executando quando o serviço parou voltam para a fila ao reiniciar.
+
+    python cli.py servir --porta 8765 --trabalhadores 2
+
+Rotas (JSON):
+    POST /jobs                  envia um job; responde {"id", "estado"}
+    GET  /jobs                  lista os jobs
+    GET  /jobs/<id>             estado, andamento e últimas linhas de log
+    GET  /jobs/<id>/resultado   ResultadoJob.para_dict() de um job terminado
+    POST /jobs/<id>/cancelar    cancela um job na fila ou em execução
+    GET  /saude                 trabalhadores, jobs por estado e aquecimento
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import traceback
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import PASTA_CORTES, PERFIL_ENCODE, ENCODER, caminho_cache
+from cortes import sanitizar_nome_arquivo
+from pipeline import Processamento, ProcessamentoCancelado, ETAPAS_PIPELINE, normalizar_job
+from renderizacao import AgendadorRender
+
+# ================= FILA DE JOBS (SQLite) ==============
+
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+CANCELADO = "cancelado"
+ESTADOS_FINAIS = (CONCLUIDO, FALHOU, CANCELADO)
+
+# Linhas de log guardadas por job
+LINHAS_LOG = 200
+
+
+class FilaJobs:
+    """
+    Fila durável dos jobs do serviço. Cada job guarda o pedido original
+    (JSON), o estado, o resultado e o log; o estado é atualizado a cada
+    mudança, então nada se perde se o processo cair.
+    Seguro para uso por várias threads.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or caminho_cache("servico.sqlite")
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                pedido TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                resultado TEXT,
+                erro TEXT,
+                log TEXT,
+                criado_em REAL NOT NULL,
+                iniciado_em REAL,
+                terminado_em REAL
+            )
+        """)
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_jobs_estado ON jobs (estado, criado_em)")
+        self._conexao.commit()
+
+    def adicionar(self, id_job, pedido):
+        """Coloca um job na fila; levanta KeyError se o id já existe."""
+        with self._lock:
+            try:
+                self._conexao.execute(
+                    "INSERT INTO jobs (id, pedido, estado, criado_em) VALUES (?, ?, ?, ?)",
+                    (id_job, json.dumps(pedido, ensure_ascii=False), NA_FILA, time.time()),
+                )
+            except sqlite3.IntegrityError:
+                raise KeyError(id_job)
+            self._conexao.commit()
+
+    def retomar_interrompidos(self):
+        """Jobs que estavam executando quando o serviço parou voltam para a fila."""
+        with self._lock:
+            n = self._conexao.execute(
+                "UPDATE jobs SET estado = ?, iniciado_em = NULL WHERE estado = ?", (NA_FILA, EXECUTANDO)
+            ).rowcount
+            self._conexao.commit()
+        return n
+
+    def devolver(self, id_job):
+        """Um job que estava executando volta para a fila (serviço desligando no meio dele)."""
+        with self._lock:
+            self._conexao.execute(
+                "UPDATE jobs SET estado = ?, iniciado_em = NULL WHERE id = ? AND estado = ?",
+                (NA_FILA, id_job, EXECUTANDO),
+            )
+            self._conexao.commit()
+
+    def pegar(self):
+        """Tira o job mais antigo da fila, marcando-o como executando. Retorna (id, pedido) ou None."""
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT id, pedido FROM jobs WHERE estado = ? ORDER BY criado_em LIMIT 1", (NA_FILA,)
+            ).fetchone()
+            if not linha:
+                return None
+            self._conexao.execute(
+                "UPDATE jobs SET estado = ?, iniciado_em = ? WHERE id = ?", (EXECUTANDO, time.time(), linha[0])
+            )
+            self._conexao.commit()
+        return linha[0], json.loads(linha[1])
+
+    def terminar(self, id_job, estado, resultado=None, erro=None, log=None):
+        with self._lock:
+            self._conexao.execute(
+                "UPDATE jobs SET estado = ?, resultado = ?, erro = ?, log = ?, terminado_em = ? WHERE id = ?",
+                (estado, json.dumps(resultado, ensure_ascii=False) if resultado is not None else None,
+                 erro, "\n".join(log) if log else None, time.time(), id_job),
+            )
+            self._conexao.commit()
+
+    def cancelar_na_fila(self, id_job):
+        """Cancela o job se ele ainda não começou; retorna True se cancelou."""
+        with self._lock:
+            n = self._conexao.execute(
+                "UPDATE jobs SET estado = ?, terminado_em = ? WHERE id = ? AND estado = ?",
+                (CANCELADO, time.time(), id_job, NA_FILA),
+            ).rowcount
+            self._conexao.commit()
+        return n > 0
+
+    def buscar(self, id_job):
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT id, pedido, estado, resultado, erro, log, criado_em, iniciado_em, terminado_em "
+                "FROM jobs WHERE id = ?", (id_job,)
+            ).fetchone()
+        return self._para_dict(linha) if linha else None
+
+    def listar(self, limite=100):
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT id, pedido, estado, NULL, erro, NULL, criado_em, iniciado_em, terminado_em "
+                "FROM jobs ORDER BY criado_em DESC LIMIT ?", (limite,)
+            ).fetchall()
+        return [self._para_dict(linha) for linha in linhas]
+
+    def contagem(self):
+        with self._lock:
+            return dict(self._conexao.execute("SELECT estado, COUNT(*) FROM jobs GROUP BY estado").fetchall())
+
+    @staticmethod
+    def _para_dict(linha):
+        id_job, pedido, estado, resultado, erro, log, criado, iniciado, terminado = linha
+        return {
+            'id': id_job,
+            'pedido': json.loads(pedido),
+            'estado': estado,
+            'resultado': json.loads(resultado) if resultado else None,
+            'erro': erro,
+            'log': log.splitlines() if log else [],
+            'criado_em': criado,
+            'iniciado_em': iniciado,
+            'terminado_em': terminado,
+        }
+
+
+# ================= SERVIÇO ==============
+
+class ServicoCortes:
+    """
+    Fila durável + trabalhadores de longa duração. Cada trabalhador é uma
+    thread que pega o próximo job da fila e roda o pipeline completo;
+    modelo de IA, cache de embeddings e probe de encoders são globais do
+    processo, então só o primeiro job paga a carga deles (aquecer=True
+    adianta isso para a subida do serviço).
+    """
+
+    def __init__(self, fila=None, trabalhadores=1, pasta_saida=None, base=None, aquecer=True, **opcoes):
+        self.fila = fila or FilaJobs()
+        self.trabalhadores = max(1, trabalhadores)
+        self.pasta_saida = pasta_saida or PASTA_CORTES
+        # Caminhos relativos dos jobs são resolvidos a partir daqui
+        self.base = base or os.getcwd()
+        self.aquecer = aquecer
+        self.opcoes = opcoes
+        self.aquecido = {'modelo': False, 'encoders': False}
+        self._parar = threading.Event()
+        self._novo_job = threading.Condition()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._em_execucao = {}   # id -> AgendadorRender
+        self._cancelados = set()  # ids cancelados pelo usuário durante a execução
+        self._andamento = {}     # id -> {'etapa', 'fracao', 'cortes'}
+        self._logs = {}          # id -> deque de linhas
+
+    # ----- ciclo de vida -----
+
+    def iniciar(self):
+        retomados = self.fila.retomar_interrompidos()
+        if retomados:
+            print(f"♻️ {retomados} job(s) interrompido(s) voltaram para a fila.")
+        if self.aquecer:
+            threading.Thread(target=self._aquecer, name="aquecer-servico", daemon=True).start()
+        for i in range(self.trabalhadores):
+            t = threading.Thread(target=self._trabalhador, name=f"trabalhador-{i+1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def parar(self, esperar=True):
+        """Para de pegar jobs novos e cancela os que estão em execução (eles voltam para a fila)."""
+        self._parar.set()
+        with self._novo_job:
+            self._novo_job.notify_all()
+        with self._lock:
+            agendadores = list(self._em_execucao.values())
+        for agendador in agendadores:
+            agendador.cancelar()
+        if esperar:
+            for t in self._threads:
+                t.join()
+
+    def _aquecer(self):
+        # Importados aqui: torch/sentence_transformers só carregam nesta thread
+        from embeddings import carregar_modelo
+        from encoders import perfil_para_host
+
+        try:
+            perfil_para_host(PERFIL_ENCODE, preferido=ENCODER)
+            self.aquecido['encoders'] = True
+        except Exception as e:
+            print(f"⚠️ Probe de encoders falhou no aquecimento: {e}")
+        try:
+            carregar_modelo()
+            self.aquecido['modelo'] = True
+        except Exception as e:
+            print(f"⚠️ Não foi possível carregar o modelo de IA no aquecimento: {e}")
+
+    # ----- jobs -----
+
+    def _argumentos(self, id_job, pedido):
+        if pedido.get('playlist'):
+            raise ValueError("Playlists não são aceitas pelo serviço: envie um job por vídeo.")
+        argumentos = normalizar_job(pedido, self.base, 0)
+        argumentos.pop('id')
+        if not argumentos.get('pasta_saida'):
+            argumentos['pasta_saida'] = os.path.join(self.pasta_saida, sanitizar_nome_arquivo(id_job))
+        return {**self.opcoes, **{k: v for k, v in argumentos.items() if v is not None}}
+
+    def enviar(self, pedido):
+        """
+        Valida e enfileira um job. Levanta ValueError para pedido inválido
+        e KeyError se o id pedido já existe. Retorna o id.
+        """
+        if not isinstance(pedido, dict):
+            raise ValueError("O job deve ser um objeto JSON.")
+        id_job = str(pedido.get('id') or uuid.uuid4().hex[:12])
+        # Valida agora (arquivos, modo, cortes) para o erro voltar na resposta
+        try:
+            Processamento(id=id_job, **self._argumentos(id_job, pedido))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Job inválido: {e}")
+        self.fila.adicionar(id_job, {k: v for k, v in pedido.items() if k != 'id'})
+        with self._novo_job:
+            self._novo_job.notify()
+        return id_job
+
+    def cancelar(self, id_job):
+        """Cancela um job; retorna False se ele não existe ou já terminou."""
+        # Sob o mesmo lock em que _trabalhador pega e registra o job: ele
+        # está na fila ou já tem agendador, nunca entre os dois
+        with self._lock:
+            if self.fila.cancelar_na_fila(id_job):
+                return True
+            agendador = self._em_execucao.get(id_job)
+            if agendador:
+                self._cancelados.add(id_job)
+        if agendador:
+            agendador.cancelar()
+            return True
+        return False
+
+    def estado(self, id_job):
+        job = self.fila.buscar(id_job)
+        if job is None:
+            return None
+        with self._lock:
+            if id_job in self._andamento:
+                job['andamento'] = self._andamento[id_job]
+            if id_job in self._logs:
+                job['log'] = list(self._logs[id_job])
+        return job
+
+    def _trabalhador(self):
+        while not self._parar.is_set():
+            with self._lock:
+                proximo = self.fila.pegar()
+                if proximo is not None:
+                    self._em_execucao[proximo[0]] = AgendadorRender(
+                        max_cpu=self.opcoes.get('max_jobs_cpu'), max_hw=self.opcoes.get('max_jobs_hw'),
+                    )
+            if proximo is None:
+                with self._novo_job:
+                    self._novo_job.wait(timeout=1.0)
+                continue
+            self._executar(*proximo)
+
+    def _executar(self, id_job, pedido):
+        log = deque(maxlen=LINHAS_LOG)
+        andamento = {'etapa': None, 'fracao': 0.0, 'cortes': {}}
+        with self._lock:
+            agendador = self._em_execucao[id_job]
+            self._logs[id_job] = log
+            self._andamento[id_job] = andamento
+
+        def logar(msg):
+            log.append(msg)
+            print(f"[{id_job}] {msg}")
+
+        def ao_progresso(etapa, fracao, nome=None, eta=None):
+            if etapa == 'corte':
+                andamento['cortes'][nome] = round(fracao, 3)
+            else:
+                andamento['etapa'], andamento['fracao'] = etapa, round(fracao, 3)
+
+        estado, resultado, erro = FALHOU, None, None
+        processamento = None
+        try:
+            processamento = Processamento(
+                id=id_job, agendador=agendador, logar=logar, ao_progresso=ao_progresso,
+                **self._argumentos(id_job, pedido),
+            )
+            for etapa, metodo in ETAPAS_PIPELINE:
+                processamento.executar_etapa(etapa, metodo)
+            resultado = processamento.resultado
+            erro = resultado.erro
+            estado = CONCLUIDO if resultado.ok else (CANCELADO if agendador.cancelado else FALHOU)
+        except ProcessamentoCancelado as e:
+            logar(f"⛔ {e}")
+            estado, erro = CANCELADO, str(e)
+        except ValueError as e:
+            logar(f"⚠️ {e}")
+            erro = str(e)
+        except Exception as e:
+            logar(f"❌ Erro durante o processamento: {e}")
+            logar(f"🔍 Detalhes do erro: {traceback.format_exc()}")
+            erro = str(e)
+        finally:
+            if processamento is not None:
+                processamento.resultado.erro = processamento.resultado.erro or erro
+                processamento.salvar_relatorio()
+                resultado = processamento.resultado
+
+            with self._lock:
+                pelo_usuario = id_job in self._cancelados
+                self._cancelados.discard(id_job)
+            if self._parar.is_set() and estado == CANCELADO and not pelo_usuario:
+                # Cancelado pelo desligamento do serviço: volta para a fila na próxima subida
+                self.fila.devolver(id_job)
+            else:
+                self.fila.terminar(id_job, estado, resultado.para_dict() if resultado else None, erro, list(log))
+            with self._lock:
+                self._em_execucao.pop(id_job, None)
+                self._logs.pop(id_job, None)
+                self._andamento.pop(id_job, None)
+
+
+# ================= HTTP ==============
+
+class _Manipulador(BaseHTTPRequestHandler):
+    servico = None  # ServicoCortes, definido por criar_servidor
+
+    def log_message(self, formato, *args):
+        pass  # o log dos jobs já vai para o terminal
+
+    def _responder(self, status, dados):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _partes(self):
+        return [p for p in self.path.split('?', 1)[0].split('/') if p]
+
+    def do_GET(self):
+        partes = self._partes()
+        if partes == ['saude']:
+            servico = self.servico
+            return self._responder(200, {
+                'ok': True, 'trabalhadores': servico.trabalhadores,
+                'jobs': servico.fila.contagem(), 'aquecido': servico.aquecido,
+            })
+        if partes == ['jobs']:
+            return self._responder(200, {'jobs': self.servico.fila.listar()})
+        if len(partes) in (2, 3) and partes[0] == 'jobs':
+            job = self.servico.estado(partes[1])
+            if job is None:
+                return self._responder(404, {'erro': "Job não encontrado."})
+            if len(partes) == 2:
+                return self._responder(200, job)
+            if partes[2] == 'resultado':
+                if job['estado'] not in ESTADOS_FINAIS:
+                    return self._responder(409, {'erro': "Job ainda não terminou.", 'estado': job['estado']})
+                return self._responder(200, {'estado': job['estado'], 'erro': job['erro'],
+                                             'resultado': job['resultado']})
+        self._responder(404, {'erro': "Rota não encontrada."})
+
+    def do_POST(self):
+        partes = self._partes()
+        if partes == ['jobs']:
+            try:
+                tamanho = int(self.headers.get('Content-Length') or 0)
+                pedido = json.loads(self.rfile.read(tamanho) or b"null")
+                id_job = self.servico.enviar(pedido)
+            except json.JSONDecodeError as e:
+                return self._responder(400, {'erro': f"JSON inválido: {e}"})
+            except ValueError as e:
+                return self._responder(400, {'erro': str(e)})
+            except KeyError:
+                return self._responder(409, {'erro': "Já existe um job com esse id."})
+            return self._responder(201, {'id': id_job, 'estado': NA_FILA})
+        if len(partes) == 3 and partes[0] == 'jobs' and partes[2] == 'cancelar':
+            if self.servico.cancelar(partes[1]):
+                return self._responder(202, {'id': partes[1], 'cancelando': True})
+            return self._responder(409, {'erro': "Job não existe ou já terminou."})
+        self._responder(404, {'erro': "Rota não encontrada."})
+
+
+def criar_servidor(servico, host="127.0.0.1", porta=8765):
+    """Servidor HTTP (ainda sem servir) para o serviço; porta 0 escolhe uma livre."""
+    manipulador = type('Manipulador', (_Manipulador,), {'servico': servico})
+    return ThreadingHTTPServer((host, porta), manipulador)
+
+
+def servir(host="127.0.0.1", porta=8765, trabalhadores=1, fila=None, **opcoes):
+    """Sobe o serviço e atende até Ctrl+C; jobs em execução voltam para a fila ao sair."""
+    servico = ServicoCortes(fila=FilaJobs(fila) if fila else None, trabalhadores=trabalhadores, **opcoes)
+    servidor = criar_servidor(servico, host, porta)
+    servico.iniciar()
+    print(f"🌐 Serviço de cortes em http://{host}:{servidor.server_address[1]} "
+          f"({servico.trabalhadores} trabalhador(es), fila em {servico.fila.caminho})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("⛔ Encerrando o serviço...")
+    finally:
+        servidor.server_close()
+        servico.parar()
+
+
+# ================= CLIENTE ==============
+
+class ClienteServico:
+    """Cliente mínimo (só biblioteca padrão) do serviço, para scripts e testes."""
+
+    def __init__(self, url="http://127.0.0.1:8765", timeout=10):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _pedir(self, metodo, caminho, dados=None):
+        corpo = json.dumps(dados).encode('utf-8') if dados is not None else None
+        pedido = urllib.request.Request(self.url + caminho, data=corpo, method=metodo,
+                                        headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(pedido, timeout=self.timeout) as resposta:
+                return resposta.status, json.loads(resposta.read() or b"null")
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b"null")
+
+    def enviar(self, job):
+        """Envia um job; retorna o id. Levanta ValueError com a mensagem do serviço se for recusado."""
+        status, dados = self._pedir('POST', '/jobs', job)
+        if status != 201:
+            raise ValueError(dados.get('erro') if isinstance(dados, dict) else dados)
+        return dados['id']
+
+    def estado(self, id_job):
+        return self._pedir('GET', f'/jobs/{id_job}')[1]
+
+    def resultado(self, id_job):
+        return self._pedir('GET', f'/jobs/{id_job}/resultado')[1]
+
+    def cancelar(self, id_job):
+        return self._pedir('POST', f'/jobs/{id_job}/cancelar')[0] == 202
+
+    def saude(self):
+        return self._pedir('GET', '/saude')[1]
+
+    def aguardar(self, id_job, intervalo=0.5, timeout=None):
+        """Espera o job terminar e retorna o estado final."""
+        limite = time.monotonic() + timeout if timeout else None
+        while True:
+            job = self.estado(id_job)
+            if job.get('estado') in ESTADOS_FINAIS:
+                return job
+            if limite and time.monotonic() > limite:
+                raise TimeoutError(f"Job {id_job} não terminou em {timeout}s")
+            time.sleep(intervalo)